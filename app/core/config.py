@@ -13,16 +13,84 @@ class Settings(BaseSettings):
     # MongoDB settings
     MONGO_URI: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "diet_plan"
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = 300000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = 10000  # None = wait forever for a connection
+    MONGO_CONNECT_TIMEOUT_MS: int = 10000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 10000
+    MONGO_ENSURE_INDEXES: bool = True  # create missing indexes (app/core/mongo_indexes.py) at startup
+
+    # SQL (SQLAlchemy async engine) pool settings
+    SQL_POOL_SIZE: int = 5
+    SQL_MAX_OVERFLOW: int = 10
+    SQL_POOL_TIMEOUT: float = 30.0  # seconds to wait for a connection
+    SQL_POOL_RECYCLE: int = 1800  # seconds, -1 = never
     
     # Security settings
     SECRET_KEY: str = "change-me-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 10080
+    # bcrypt cost; hashes with another cost are rehashed on the next login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64  # calls waiting for a worker before returning 503
+
+    # Authenticated-user cache used by get_current_user
+    USER_CACHE_TTL_SECONDS: int = 30  # 0 disables the cache
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_REDIS_URL: Optional[str] = None  # shared backend across workers (needs the redis package)
+
+    # Rate limiting: memory:// (per process), sqlite:///ratelimits.db (per host) or redis://host:6379
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+    RATE_LIMIT_STRATEGY: str = "sliding-window-counter"  # or fixed-window; moving-window needs memory:// or redis://
+
+    # First day (YYYY-MM-DD) with daily rollups: earlier days without one are aggregated
+    # from raw events. Leave unset once scripts/backfill_progress_rollups.py has run.
+    PROGRESS_ROLLUPS_SINCE: Optional[str] = None
+
+    # Write-behind buffer for steps/water logs (rollups lag by up to the flush interval)
+    PROGRESS_WRITE_BUFFER: bool = False
+    PROGRESS_BUFFER_INTERVAL_SECONDS: int = 300  # events of a user/type inside one interval become one event
+    PROGRESS_BUFFER_FLUSH_SECONDS: float = 5.0
+    PROGRESS_BUFFER_MAX_EVENTS: int = 1000  # flush early once this many events are buffered
+
+    # Store raw progress events in a time-series collection (migrate with scripts/migrate_progress_timeseries.py)
+    PROGRESS_TIMESERIES: bool = False
+    PROGRESS_TIMESERIES_COLLECTION: str = "progress_ts"
+    PROGRESS_TIMESERIES_GRANULARITY: str = "hours"
+    PROGRESS_TIMESERIES_BUCKET_SECONDS: Optional[int] = None  # MongoDB 6.3+: custom bucket span instead of granularity
+
+    PROGRESS_EXPORT_BATCH_SIZE: int = 500  # events fetched per cursor batch by the progress exports
+
+    # Per-meal split of the daily targets (default: app/services/meal_generator/data/meal_distribution.json,
+    # read-only; set a path outside the package to edit it through the admin API)
+    MEAL_DISTRIBUTION_PATH: Optional[str] = None
+    MEAL_DISTRIBUTION_CHECK_SECONDS: float = 5.0  # how often the file is checked for changes
+    MEAL_DISTRIBUTION_MIN_SUM: float = 0.85  # allowed range of the per-meal shares of one nutrient
+    MEAL_DISTRIBUTION_MAX_SUM: float = 1.2
+
+    # Emails allowed to call /admin endpoints
+    ADMIN_EMAILS: Union[str, List[str]] = []
+
+    # Meal generator settings
+    CATALOG_REFRESH_SECONDS: int = 60
+    TEMPLATE_REFRESH_SECONDS: int = 60  # meal_templates is re-read at most this often (edits made outside the ORM)
+    MEAL_SELECTION_TOP_K: int = 5
+    MEAL_GENERATOR_MODE: str = "random"  # random | optimized
+    OPTIMIZER_TIME_BUDGET_MS: int = 50
+    OPTIMIZER_REPEAT_WINDOW_DAYS: int = 3
+    # Accepted meal calories as a fraction of the meal target
+    PLAN_CALORIE_BAND_LOW: float = 0.5
+    PLAN_CALORIE_BAND_HIGH: float = 1.5
+    BATCH_GENERATION_CONCURRENCY: int = 4
+    GENERATION_EXECUTOR: str = "thread"  # inline | thread | process
+    GENERATION_WORKERS: int = 0  # process pool size, 0 = CPU count
     
     # CORS settings
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:3000"]
 
-    @field_validator("CORS_ORIGINS", mode="before")
+    @field_validator("CORS_ORIGINS", "ADMIN_EMAILS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
         if isinstance(v, str) and not v.startswith("["):
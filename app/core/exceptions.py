@@ -26,4 +26,40 @@ class DietPlanNotFoundException(HTTPException):
         super().__init__(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Diet plan not found"
-        )
\ No newline at end of file
+        )
+
+class DietPlanConflictException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Diet plan was modified concurrently, please retry"
+        )
+
+class PlanGenerationFailedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Plan generation failed, please try again"
+        )
+
+class AdminRequiredException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+
+class ServiceBusyException(HTTPException):
+    def __init__(self, detail: str = "Server is busy, please retry shortly"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+
+class InvalidCursorException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid continuation token"
+        )
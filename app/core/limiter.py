@@ -1,7 +1,32 @@
+from jose import JWTError, jwt
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.requests import Request
 
-# TODO: Switch to RedisStorage before multi-worker/production deployment
-# from slowapi.storage import RedisStorage
-# limiter = Limiter(key_func=get_remote_address, storage_uri="redis://localhost:6379")
-limiter = Limiter(key_func=get_remote_address)
+from .config import settings
+from . import limiter_storage  # noqa: F401  registers the sqlite:// storage scheme
+
+
+def user_or_ip_key(request: Request) -> str:
+    """
+    Rate limit key for authenticated routes: the token subject when the
+    request carries a valid bearer token, else the client IP.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]).get("sub")
+        except JWTError:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+    return get_remote_address(request)
+
+
+# The one limiter of the app; storage is shared by all workers unless it is memory://
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+)
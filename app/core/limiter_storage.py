@@ -0,0 +1,133 @@
+"""
+SQLite storage for the `limits` package, so every worker on one host shares
+rate limit counters without running Redis.
+
+Importing this module registers the "sqlite" scheme, e.g.
+RATE_LIMIT_STORAGE_URI=sqlite:///ratelimits.db (relative path) or
+sqlite:////var/run/app/ratelimits.db (absolute path).
+"""
+import sqlite3
+import threading
+import time
+from math import floor
+from typing import Optional, Tuple
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        path = uri.split("://", 1)[1]
+        if path.startswith("/"):
+            path = path[1:]
+        self.path = path or ":memory:"
+        self._lock = threading.Lock()
+        # Autocommit; writes use explicit BEGIN IMMEDIATE so processes serialize on the file lock
+        self._conn = sqlite3.connect(self.path, timeout=float(options.get("timeout", 5.0)), isolation_level=None, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _get(self, key: str, now: float) -> Tuple[int, Optional[float]]:
+        row = self._conn.execute("SELECT count, expires_at FROM counters WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return 0, None
+        return row[0], row[1]
+
+    def _incr(self, key: str, expiry: float, amount: int, now: float) -> int:
+        count, expires_at = self._get(key, now)
+        if expires_at is None:
+            count, expires_at = 0, now + expiry
+        count += amount
+        self._conn.execute(
+            "INSERT OR REPLACE INTO counters (key, count, expires_at) VALUES (?, ?, ?)",
+            (key, count, expires_at),
+        )
+        return count
+
+    def _write(self, fn, *args):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._write(self._incr, key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            return self._get(key, time.time())[0]
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            now = time.time()
+            _, expires_at = self._get(key, now)
+            return expires_at if expires_at is not None else now
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        def delete_all():
+            return self._conn.execute("DELETE FROM counters").rowcount
+
+        return self._write(delete_all)
+
+    def clear(self, key: str) -> None:
+        self._write(lambda: self._conn.execute("DELETE FROM counters WHERE key = ?", (key,)))
+
+    def purge_expired(self) -> int:
+        return self._write(lambda: self._conn.execute("DELETE FROM counters WHERE expires_at <= ?", (time.time(),)).rowcount)
+
+    def _sliding_window_info(self, key: str, expiry: int, now: float) -> Tuple[int, float, int, float]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, _ = self._get(previous_key, now)
+        current_count, _ = self._get(current_key, now)
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        def acquire():
+            # Read and increment in one transaction, so concurrent workers cannot overshoot
+            now = time.time()
+            previous_count, previous_ttl, current_count, _ = self._sliding_window_info(key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            _, current_key = self.sliding_window_keys(key, expiry, now)
+            self._incr(current_key, 2 * expiry, amount, now)
+            return True
+
+        return self._write(acquire)
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        with self._lock:
+            return self._sliding_window_info(key, expiry, time.time())
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
@@ -0,0 +1,153 @@
+"""
+Declared MongoDB indexes and the manager that applies them.
+
+INDEXES is the source of truth, like the Alembic migrations are for
+Postgres: add an entry here and it is created at startup (MONGO_ENSURE_INDEXES)
+or with scripts/mongo_indexes.py.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MongoIndex(BaseModel):
+    collection: str
+    name: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None  # TTL index
+
+    def model(self) -> IndexModel:
+        options = {"name": self.name, "unique": self.unique}
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(self.keys, **options)
+
+    def matches(self, info: Dict) -> bool:
+        """True if an existing index (index_information() entry) has the same definition."""
+        return (
+            [(k, int(d)) for k, d in info.get("key", [])] == self.keys
+            and bool(info.get("unique", False)) == self.unique
+            and info.get("expireAfterSeconds") == self.expire_after_seconds
+        )
+
+
+INDEXES: List[MongoIndex] = [
+    # get_user_by_email on every authenticated request; also enforces one account per email
+    MongoIndex(collection="users", name="email_unique", keys=[("email", ASCENDING)], unique=True),
+    # One plan per user, looked up by user_id
+    MongoIndex(collection="diet_plans", name="user_id_unique", keys=[("user_id", ASCENDING)], unique=True),
+    # Daily/weekly logs by time range, latest entry of a type (e.g. weight);
+    # the _id suffix lets exports page in (timestamp, _id) order without a sort
+    MongoIndex(collection="progress", name="user_id_timestamp_id", keys=[("user_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    MongoIndex(collection="progress", name="user_id_type_timestamp", keys=[("user_id", ASCENDING), ("type", ASCENDING), ("timestamp", DESCENDING)]),
+    # One rollup document per user and day (upsert target)
+    MongoIndex(collection="progress_daily", name="user_id_date_unique", keys=[("user_id", ASCENDING), ("date", ASCENDING)], unique=True),
+]
+
+if settings.PROGRESS_TIMESERIES:
+    # Secondary indexes on the metaField subfields; time-series collections
+    # cannot have unique indexes. ProgressService.ensure_timeseries_collection
+    # creates the collection first.
+    INDEXES += [
+        MongoIndex(collection=settings.PROGRESS_TIMESERIES_COLLECTION, name="meta_user_id_timestamp", keys=[("meta.user_id", ASCENDING), ("timestamp", DESCENDING)]),
+        MongoIndex(collection=settings.PROGRESS_TIMESERIES_COLLECTION, name="meta_user_id_type_timestamp", keys=[("meta.user_id", ASCENDING), ("meta.type", ASCENDING), ("timestamp", DESCENDING)]),
+    ]
+
+
+class IndexReport(BaseModel):
+    collection: str
+    missing: List[str] = []     # declared, not present
+    changed: List[str] = []     # present under the declared name with another definition
+    extra: List[str] = []       # present, not declared
+    unused: List[str] = []      # present, no operations since the server last started ($indexStats)
+    created: List[str] = []
+    failed: Dict[str, str] = {}
+
+
+class MongoIndexManager:
+    """Compares INDEXES with the database, and creates or reports differences."""
+
+    def __init__(self, db: AsyncIOMotorDatabase, indexes: Optional[List[MongoIndex]] = None):
+        self.db = db
+        self.indexes = indexes if indexes is not None else INDEXES
+
+    def _collections(self) -> List[str]:
+        return list(dict.fromkeys(index.collection for index in self.indexes))
+
+    async def status(self, with_usage: bool = True) -> List[IndexReport]:
+        reports = []
+        for collection in self._collections():
+            existing = await self.db[collection].index_information()
+            existing.pop("_id_", None)
+            declared = [index for index in self.indexes if index.collection == collection]
+            report = IndexReport(collection=collection)
+            for index in declared:
+                if index.name not in existing:
+                    report.missing.append(index.name)
+                elif not index.matches(existing[index.name]):
+                    report.changed.append(index.name)
+            declared_names = {index.name for index in declared}
+            report.extra = [name for name in existing if name not in declared_names]
+            if with_usage:
+                usage = await self.usage(collection)
+                report.unused = [name for name, ops in usage.items() if ops == 0 and name != "_id_"]
+            reports.append(report)
+        return reports
+
+    async def usage(self, collection: str) -> Dict[str, int]:
+        """Operations per index since the server started; empty if $indexStats is not permitted."""
+        try:
+            stats = await self.db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+        except OperationFailure as exc:
+            logger.warning(f"$indexStats unavailable for {collection}: {exc}")
+            return {}
+        return {stat["name"]: int(stat.get("accesses", {}).get("ops", 0)) for stat in stats}
+
+    async def ensure(self, sequential: bool = False, rebuild_changed: bool = False) -> List[IndexReport]:
+        """
+        Create missing indexes. With sequential, a collection's indexes are
+        built one at a time (each build finishes before the next starts)
+        instead of in one createIndexes call, so only one build holds
+        resources at once. Builds still run on the primary and replicate to
+        every member; this is not a replica-by-replica rolling build, which
+        has to be done by hand per member. With rebuild_changed, indexes whose
+        definition changed are dropped and recreated; otherwise they are
+        only reported. A failed build (e.g. duplicates under a unique index)
+        is reported and does not stop the others.
+        """
+        reports = await self.status(with_usage=False)
+        for report in reports:
+            to_build = list(report.missing)
+            if rebuild_changed:
+                for name in report.changed:
+                    await self.db[report.collection].drop_index(name)
+                to_build += report.changed
+            models = [index.model() for index in self.indexes if index.collection == report.collection and index.name in to_build]
+            if not models:
+                continue
+
+            batches = [[model] for model in models] if sequential else [models]
+            for batch in batches:
+                names = [model.document["name"] for model in batch]
+                try:
+                    await self.db[report.collection].create_indexes(batch)
+                    report.created.extend(names)
+                    logger.info(f"Created Mongo indexes on {report.collection}: {', '.join(names)}")
+                except OperationFailure as exc:
+                    for name in names:
+                        report.failed[name] = str(exc)
+                    logger.error(f"Failed to create Mongo indexes {names} on {report.collection}: {exc}")
+        return reports
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> List[IndexReport]:
+    return await MongoIndexManager(db).ensure()
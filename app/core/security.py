@@ -1,5 +1,9 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import bcrypt
@@ -8,8 +12,9 @@ if not hasattr(bcrypt, "__about__"):
     bcrypt.__about__ = type('About', (), {'__version__': bcrypt.__version__})
 
 from .config import settings
+from .exceptions import ServiceBusyException
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -26,4 +31,96 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop in a dedicated, size-limited thread pool.
+
+    At most PASSWORD_HASH_WORKERS hashes run at once and at most
+    PASSWORD_HASH_QUEUE_LIMIT more wait for a worker; further calls raise
+    ServiceBusyException (503) instead of queueing without bound.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_limit: Optional[int] = None):
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS
+        self.queue_limit = settings.PASSWORD_HASH_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.calls = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_verify_ms = 0.0
+        self.max_verify_ms = 0.0
+        self.verifications = 0
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise ServiceBusyException()
+            self._in_flight += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        submitted = time.perf_counter()
+
+        def timed():
+            wait_ms = (time.perf_counter() - submitted) * 1000
+            with self._lock:
+                self.calls += 1
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            return fn(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Returns (valid, new_hash). new_hash is set when the stored hash uses
+        outdated cost parameters and should replace it.
+        """
+        started = time.perf_counter()
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed_password)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.verifications += 1
+            self.total_verify_ms += elapsed_ms
+            self.max_verify_ms = max(self.max_verify_ms, elapsed_ms)
+            if new_hash:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_queue_wait_ms": round(self.total_wait_ms / self.calls, 3) if self.calls else 0.0,
+                "max_queue_wait_ms": round(self.max_wait_ms, 3),
+                "avg_verify_ms": round(self.total_verify_ms / self.verifications, 3) if self.verifications else 0.0,
+                "max_verify_ms": round(self.max_verify_ms, 3),
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher()
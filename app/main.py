@@ -1,24 +1,47 @@
+import logging
 from fastapi import FastAPI, Request
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from fastapi.middleware.cors import CORSMiddleware  # Add this import
 from .core.config import settings
-from .core.database import connect_to_mongodb, close_mongodb_connection
-from .routers import auth, users, diet_plans
+from .core.database import connect_to_mongodb, close_mongodb_connection, get_database, AsyncSessionLocal
+from .core.mongo_indexes import ensure_indexes
+from .core.security import password_hasher
+from .core.limiter import limiter
+from .services.meal_generator.executor import generation_executor
+from .services.progress_buffer import progress_buffer
+from .services.progress_service import progress_service
+from .routers import auth, users, diet_plans, admin
 from .routers.calculations import router as calculations_router
 from .routers.progress import router as progress_router
 from .routers.meal_plan import router as meal_plan_router
 
+logger = logging.getLogger(__name__)
+
 async def lifespan(app: FastAPI):
     await connect_to_mongodb()
+    if settings.PROGRESS_TIMESERIES:
+        # Created before the first insert (or index build) could create a regular collection
+        await progress_service.ensure_timeseries_collection(get_database())
+    if settings.MONGO_ENSURE_INDEXES:
+        try:
+            await ensure_indexes(get_database())
+        except Exception as exc:
+            logger.warning(f"Could not ensure Mongo indexes at startup: {exc}")
+    try:
+        async with AsyncSessionLocal() as session:
+            await generation_executor.start(session)
+    except Exception as exc:
+        # Pool is started lazily on the first generation instead
+        logger.warning(f"Could not warm generation executor at startup: {exc}")
+    await progress_buffer.start(lambda events: progress_service.write_events(events, get_database()))
     yield
+    # Buffered progress events are written before the Mongo client closes
+    await progress_buffer.stop()
+    generation_executor.shutdown()
+    password_hasher.shutdown()
     await close_mongodb_connection()
 
-# TODO: Switch to RedisStorage before multi-worker/production deployment
-# from slowapi.storage import RedisStorage
-# limiter = Limiter(key_func=get_remote_address, storage_uri="redis://localhost:6379")
-limiter = Limiter(key_func=get_remote_address)
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -37,6 +60,7 @@ app.include_router(diet_plans.router, prefix=f"{settings.API_V1_STR}/diet-plans"
 app.include_router(calculations_router,prefix=f"{settings.API_V1_STR}/calculations",tags=["calculations"])
 app.include_router(progress_router,prefix=f"{settings.API_V1_STR}/progress",tags=["progress"])
 app.include_router(meal_plan_router,prefix=f"{settings.API_V1_STR}/meal-plan",tags=["meal-plan"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
 @app.get("/")
 async def root():
     return {"message": "Welcome to Diet Plan API"}
\ No newline at end of file
@@ -27,4 +27,9 @@ class DietPlan(BaseModel):
     user_id: Optional[str] = None
     created_at: Optional[datetime] = None
     meals: List[Dict] = []
-    ingredient_checklist: List[Dict]=[]
\ No newline at end of file
+    ingredient_checklist: List[Dict]=[]
+    # Precomputed per date ("YYYY-MM-DD"), so one day can be read with a projection
+    daily_checklists: Dict[str, List[Dict]] = {}
+    daily_totals: Dict[str, Dict[str, float]] = {}
+    # Incremented by every partial update, so concurrent ones can detect each other
+    version: int = 0
\ No newline at end of file
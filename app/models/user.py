@@ -1,12 +1,12 @@
-from typing import Optional
+from typing import Optional, Union
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 
-class UserInDB(BaseModel):
+class UserProfile(BaseModel):
+    """A stored user without the password hash: what request handlers and the user cache get."""
     id: str
     email: EmailStr
     name: str
-    hashed_password: str
     age: int
     gender: str
     height: float
@@ -20,6 +20,15 @@ class UserInDB(BaseModel):
     diabetes_status: Optional[str]=None
     gym_goal: Optional[str]=None
     region: Optional[str]=None
+    # Latest logged weight (progress log), kept in step by UserService.set_current_weight
+    current_weight: Optional[float]=None
+    weight_updated_at: Optional[datetime]=None
+
+class UserInDB(UserProfile):
+    hashed_password: str
+
+    def profile(self) -> UserProfile:
+        return UserProfile(**self.model_dump(exclude={"hashed_password"}))
 
 class User(BaseModel):
     email: EmailStr
@@ -35,4 +44,10 @@ class User(BaseModel):
     health_condition: Optional[str]=None
     diabetes_status: Optional[str]=None
     gym_goal: Optional[str]=None
-    region: Optional[str]=None
\ No newline at end of file
+    region: Optional[str]=None
+
+
+def latest_weight(user: Union[User, UserProfile]) -> float:
+    """Most recently logged weight, else the profile weight."""
+    current = getattr(user, "current_weight", None)
+    return current if current is not None else user.weight
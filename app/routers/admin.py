@@ -0,0 +1,112 @@
+from datetime import date
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..services.user_service import get_current_admin
+from ..services.batch_generation_service import batch_generation_service
+from ..services.meal_generator.templates import meal_template_cache
+from ..services.meal_generator.distribution import meal_distribution
+from ..services.user_cache import user_cache
+from ..services.progress_buffer import progress_buffer
+from ..services.progress_export import export_progress
+from ..models.user import UserProfile
+from ..schemas.diet_plan import BatchGenerationRequest, BatchGenerationReport
+from ..schemas.progress import LogType
+from ..core.database import get_db, get_database, get_pool_stats
+from ..core.security import password_hasher
+
+router = APIRouter()
+
+@router.post("/meal-templates/reload")
+async def reload_meal_templates(
+    current_user: UserProfile = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_db)
+):
+    """Drop and reload the resolved meal template cache"""
+    count = await meal_template_cache.reload(session)
+    return {"message": "Meal templates reloaded", "templates": count}
+
+@router.get("/meal-distribution")
+async def get_meal_distribution(current_user: UserProfile = Depends(get_current_admin)):
+    """Active per-plan split of the daily targets over the meals"""
+    return {**meal_distribution.get().to_config(), "status": meal_distribution.stats()}
+
+@router.put("/meal-distribution")
+async def update_meal_distribution(
+    config: Dict[str, Any] = Body(...),
+    current_user: UserProfile = Depends(get_current_admin)
+):
+    """
+    Validate and store a new meal distribution; other workers pick it up on
+    their next file check. Refused while MEAL_DISTRIBUTION_PATH is unset
+    (the packaged default file is read-only here).
+    """
+    if not meal_distribution.writable:
+        raise HTTPException(
+            status_code=409,
+            detail="Meal distribution is the packaged default; set MEAL_DISTRIBUTION_PATH to a writable file outside the package",
+        )
+    try:
+        distribution = meal_distribution.update(config)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except OSError as exc:
+        raise HTTPException(status_code=500, detail=f"Could not write {meal_distribution.path}: {exc.strerror or exc}")
+    return {"message": "Meal distribution updated", "plans": distribution.plans}
+
+@router.post("/meal-distribution/reload")
+async def reload_meal_distribution(current_user: UserProfile = Depends(get_current_admin)):
+    """Reload the meal distribution file now instead of on the next file check"""
+    try:
+        distribution = meal_distribution.reload()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"message": "Meal distribution reloaded", "plans": distribution.plans}
+
+@router.post("/diet-plans/batch-generate", response_model=BatchGenerationReport)
+async def batch_generate_diet_plans(
+    batch: BatchGenerationRequest,
+    current_user: UserProfile = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_db),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Generate diet plans for a list of users (or all users) in one call"""
+    return await batch_generation_service.generate_for_users(
+        batch.user_ids, session, db, replace_existing=batch.replace_existing
+    )
+
+@router.get("/pool-stats")
+async def pool_stats(current_user: UserProfile = Depends(get_current_admin)):
+    """Connection pool usage of the shared Mongo client and SQL engine"""
+    return get_pool_stats()
+
+@router.get("/user-cache-stats")
+async def user_cache_stats(current_user: UserProfile = Depends(get_current_admin)):
+    """Hit rate and size of the authenticated-user cache"""
+    return user_cache.stats()
+
+@router.get("/password-hasher-stats")
+async def password_hasher_stats(current_user: UserProfile = Depends(get_current_admin)):
+    """Queue wait, verify latency and rejections of the bcrypt thread pool"""
+    return password_hasher.stats()
+
+@router.get("/progress-buffer-stats")
+async def progress_buffer_stats(current_user: UserProfile = Depends(get_current_admin)):
+    """Depth and flush latency of the progress write-behind buffer"""
+    return progress_buffer.stats()
+
+@router.get("/users/{user_id}/progress/export")
+async def export_user_progress(
+    user_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    type: Optional[List[LogType]] = Query(None),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: UserProfile = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Stream a user's progress history for review, same format as /progress/export"""
+    return export_progress(user_id, db, format, start, end, type, after, limit)
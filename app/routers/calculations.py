@@ -1,26 +1,31 @@
+from typing import List
 from fastapi import APIRouter, Depends
-from ..services.user_service import get_current_user
-from ..models.user import User
-from ..services.meal_generator.calculations import calculate_bmr, calculate_tdee, calculate_bmi
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from ..services.user_service import get_current_admin, user_service
+from ..services.progress_service import get_current_user_with_weight
+from ..models.user import User, UserProfile, latest_weight
+from ..services.meal_generator.calculations import calculate_bmr, calculate_tdee, calculate_bmi, calculate_targets_batch, macro_split_key
+from ..schemas.calculations import CohortTargetsRequest, CohortTargets
+from ..core.database import get_database
 from pydantic import BaseModel
 
 router = APIRouter()
 
 @router.get("/bmr")
-async def get_bmr(current_user: User = Depends(get_current_user)):
+async def get_bmr(current_user: User = Depends(get_current_user_with_weight)):
     bmr = calculate_bmr(
         current_user.gender,
-        float(current_user.weight),
+        float(latest_weight(current_user)),
         float(current_user.height),
         int(current_user.age)
     )
     return {"bmr": round(bmr, 2)}
 
 @router.get("/tdee")
-async def get_tdee(current_user: User = Depends(get_current_user)):
+async def get_tdee(current_user: User = Depends(get_current_user_with_weight)):
     bmr = calculate_bmr(
         current_user.gender,
-        float(current_user.weight),
+        float(latest_weight(current_user)),
         float(current_user.height),
         int(current_user.age)
     )
@@ -28,6 +33,41 @@ async def get_tdee(current_user: User = Depends(get_current_user)):
     return {"tdee": round(tdee, 2)}
 
 @router.get("/bmi")
-async def get_bmi(current_user: User = Depends(get_current_user)):
-    bmi = calculate_bmi(float(current_user.height), float(current_user.weight))
-    return {"bmi": round(bmi, 2)}
\ No newline at end of file
+async def get_bmi(current_user: User = Depends(get_current_user_with_weight)):
+    bmi = calculate_bmi(float(current_user.height), float(latest_weight(current_user)))
+    return {"bmi": round(bmi, 2)}
+
+@router.post("/targets/batch", response_model=List[CohortTargets])
+async def get_cohort_targets(
+    request: CohortTargetsRequest,
+    current_user: UserProfile = Depends(get_current_admin),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    BMI, BMR, TDEE and daily macro targets for many people in one call:
+    the registered users in user_ids (unknown ids are skipped), then the
+    inline profiles, in request order. Values are unrounded and identical
+    to the single-user calculations.
+    """
+    users = await user_service.get_users(request.user_ids, db) if request.user_ids else []
+    by_id = {user.id: user for user in users}
+    people = [(user_id, by_id[user_id]) for user_id in request.user_ids if user_id in by_id]
+    people += [(None, profile) for profile in request.profiles]
+    if not people:
+        return []
+
+    # Same macro split inputs as plan generation (MealGenerator._calculate_targets)
+    split_keys = [macro_split_key(person.health_condition, person.gym_goal, person.diabetes_status) for _, person in people]
+    targets = calculate_targets_batch(
+        height=[float(person.height) for _, person in people],
+        weight=[float(latest_weight(person)) for _, person in people],
+        age=[int(person.age) for _, person in people],
+        gender=[person.gender for _, person in people],
+        activity_level=[person.activity_level for _, person in people],
+        health_condition=[condition for condition, _ in split_keys],
+        diabetes_status=[status for _, status in split_keys],
+    )
+    return [
+        CohortTargets(user_id=user_id, **{name: float(values[i]) for name, values in targets.items()})
+        for i, (user_id, _) in enumerate(people)
+    ]
@@ -1,24 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from ..services.user_service import get_current_user
-from ..models.user import User
+from ..services.progress_service import get_current_user_with_weight
+from ..models.user import User, latest_weight
 from ..services.meal_generator.calculations import calculate_bmr, calculate_tdee
-from ..services.diet_plan_service import DietPlanService
+from ..services.diet_plan_service import diet_plan_service
+from ..core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict
 
 router = APIRouter()
 
-from ..core.limiter import limiter
+from ..core.limiter import limiter, user_or_ip_key
 
 class CalorieReductionInput(BaseModel):
     reduction_amount: int
 
 @router.post("/adjust")
-@limiter.limit("10/hour")
+@limiter.limit("10/hour", key_func=user_or_ip_key)
 async def adjust_meal_plan(
     request: Request,
     reduction: CalorieReductionInput,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_with_weight),
+    session: AsyncSession = Depends(get_db)
 ):
     """Adjust meal plan with rate limiting"""
     if not getattr(current_user, 'meal_plan_purchased', False):
@@ -28,12 +31,10 @@ async def adjust_meal_plan(
         )
     
     try:
-        diet_service = DietPlanService()
-        
         # Calculate original TDEE
         bmr = calculate_bmr(
             current_user.gender,
-            float(current_user.weight),
+            float(latest_weight(current_user)),
             float(current_user.height),
             int(current_user.age)
         )
@@ -45,11 +46,12 @@ async def adjust_meal_plan(
         # Prepare user data dictionary with all required fields
         user_data = current_user.model_dump()
         user_data["id"] = str(current_user.id)
+        user_data["weight"] = latest_weight(current_user)
         user_data["target_calories"] = target_calories
         
         # Generate new plan with adjusted calories
-        new_plan = await diet_service.generate_diet_plan(user_data)
-        await diet_service.update_diet_plan(str(current_user.id), new_plan)
+        new_plan = await diet_plan_service.generate_diet_plan(user_data, session)
+        await diet_plan_service.update_diet_plan(str(current_user.id), new_plan)
         
         return {
             "message": "Meal plan adjusted successfully",
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from ..services.user_service import get_current_user
-from ..models.user import User, UserInDB
-from ..services.progress_service import progress_service
-from ..schemas.progress import MealLogCreate, WaterLogCreate, StepsLogCreate, WeightLogCreate, ActivityLogCreate
+from ..models.user import User, UserProfile, latest_weight
+from ..services.progress_service import progress_service, get_current_user_with_weight
+from ..schemas.progress import MealLogCreate, WaterLogCreate, StepsLogCreate, WeightLogCreate, ActivityLogCreate, ProgressBatchRequest, ProgressBatchResponse, WeightHistoryPoint, LogType
+from ..services.progress_export import export_progress as stream_progress_export
 from ..core.database import get_database
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional
 import random
 
 router = APIRouter()
@@ -13,7 +15,7 @@ router = APIRouter()
 @router.post("/log/meal")
 async def log_meal(
     meal: MealLogCreate,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Log a meal consumed by the user"""
@@ -23,7 +25,7 @@ async def log_meal(
 @router.post("/log/water")
 async def log_water(
     water: WaterLogCreate,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Log water intake"""
@@ -33,7 +35,7 @@ async def log_water(
 @router.post("/log/steps")
 async def log_steps(
     steps: StepsLogCreate,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Log daily steps"""
@@ -43,57 +45,94 @@ async def log_steps(
 @router.post("/log/weight")
 async def log_weight(
     weight: WeightLogCreate,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Log current weight"""
+    """Log current weight (also becomes the user's current weight)"""
     await progress_service.log_weight(str(current_user.id), weight.weight, db)
-    # Also update user's current weight in profile?
-    # For now, just log it.
     return {"message": "Weight logged successfully"}
 
 @router.post("/log/activity")
 async def log_activity(
     activity: ActivityLogCreate,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Log daily activity"""
     await progress_service.log_activity(str(current_user.id), activity.model_dump(), db)
     return {"message": "Activity logged successfully"}
 
+@router.post("/log/batch", response_model=ProgressBatchResponse)
+async def log_batch(
+    batch: ProgressBatchRequest,
+    current_user: UserProfile = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Log many events at once (offline sync); entries with a known idempotency key are skipped"""
+    return await progress_service.ingest_batch(str(current_user.id), batch.entries, db)
+
 @router.get("/weight")
 async def get_weight(
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user_with_weight),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get current weight"""
-    latest_log = await progress_service.get_collection(db).find_one(
-        {"user_id": str(current_user.id), "type": "weight"},
-        sort=[("timestamp", -1)]
-    )
-    weight = latest_log["data"].get("weight") if latest_log else current_user.weight
-    return {"current_weight": weight}
+    """Get current weight (latest logged weight, else the profile weight)"""
+    return {"current_weight": latest_weight(current_user), "updated_at": current_user.weight_updated_at}
+
+@router.get("/weight/history", response_model=List[WeightHistoryPoint])
+async def get_weight_history(
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    bucket: Literal["day", "week", "month"] = "day",
+    current_user: UserProfile = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Weight series for charts from start to end (inclusive; defaults to the
+    last 90 days), one point per day, week or month.
+    """
+    end_date = datetime.strptime(end, "%Y-%m-%d") if end else datetime.utcnow()
+    start_date = datetime.strptime(start, "%Y-%m-%d") if start else end_date - timedelta(days=89)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    return await progress_service.get_weight_history(str(current_user.id), start_date, end_date, bucket, db)
+
+@router.get("/export")
+async def export_progress(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    type: Optional[List[LogType]] = Query(None),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: UserProfile = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Stream the full progress history (optionally a date range / log types) as NDJSON or CSV"""
+    return stream_progress_export(str(current_user.id), db, format, start, end, type, after, limit)
 
 @router.get("/weekly")
 async def get_weekly_stats(
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get weekly progress summary"""
+    """Get weekly progress summary (last 7 days, from the daily rollups)"""
     today = datetime.utcnow()
-    logs = await progress_service.get_collection(db).find({
-        "user_id": str(current_user.id),
-        "timestamp": {"$gte": today - timedelta(days=7)}
-    }).to_list(length=500)
-    
-    meal_logs = [log for log in logs if log["type"] == "meal"]
-    total_cals = sum(log["data"].get("calories", 0) for log in meal_logs)
-    avg_cals = total_cals / 7 if meal_logs else 0
-    
+    days = await progress_service.get_daily_summaries(str(current_user.id), today - timedelta(days=6), 7, db)
+
+    total_cals = sum(day["calories"] for day in days)
+    avg_cals = total_cals / 7 if any(day["meals_logged"] for day in days) else 0
+
     return {
         "daily_data": [
-            {"date": str(today.date()), "calories": total_cals}
+            {
+                "date": day["date"],
+                "calories": day["calories"],
+                "water_glasses": day["water_glasses"],
+                "steps": day["steps"],
+                "weight": day["last_weight"],
+            }
+            for day in days
         ],
         "summary": {
             "average_calories_consumed": avg_cals
@@ -102,17 +141,13 @@ async def get_weekly_stats(
 
 @router.get("/today")
 async def get_today_stats(
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get summarized stats for today"""
-    logs = await progress_service.get_daily_logs(str(current_user.id), datetime.utcnow(), db)
-    
-    # Simple summary logic
-    total_calories = sum(log["data"].get("calories", 0) for log in logs if log["type"] == "meal")
-    total_water = sum(log["data"].get("glasses", 0) for log in logs if log["type"] == "water")
-    total_steps = sum(log["data"].get("steps", 0) for log in logs if log["type"] in ["steps", "activity"])
-    
+    today = await progress_service.get_daily_summary(str(current_user.id), datetime.utcnow(), db)
+    total_calories = today["calories"]
+
     return {
         "calories": {
             "consumed": total_calories,
@@ -120,11 +155,11 @@ async def get_today_stats(
             "remaining": 2000 - total_calories
         },
         "water_intake": {
-            "glasses": total_water,
+            "glasses": today["water_glasses"],
             "target": 8
         },
         "activity": {
-            "steps": total_steps,
+            "steps": today["steps"],
             "target_steps": 10000
         }
-    }
\ No newline at end of file
+    }
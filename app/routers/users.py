@@ -2,29 +2,31 @@ from fastapi import APIRouter, Depends, HTTPException
 from jose import JWTError, jwt
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from ..services.user_service import user_service, get_current_user
-from ..models.user import User, UserInDB
+from ..services.user_cache import user_cache
+from ..services.progress_service import get_current_user_with_weight
+from ..models.user import User, UserProfile, latest_weight
 from ..schemas.user import UserUpdate, UserResponse
 from ..core.database import get_database
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
-async def get_user_profile(current_user: UserInDB = Depends(get_current_user)):
+async def get_user_profile(current_user: UserProfile = Depends(get_current_user)):
     """Get current user profile"""
     return current_user
 
 @router.get("/bmi")
-async def get_user_bmi(current_user: UserInDB = Depends(get_current_user)):
+async def get_user_bmi(current_user: UserProfile = Depends(get_current_user_with_weight)):
     """Get current user's BMI"""
-    if not current_user.height or not current_user.weight:
+    if not current_user.height or not latest_weight(current_user):
         raise HTTPException(status_code=400, detail="User height or weight is not set")
-    bmi = current_user.weight / ((current_user.height / 100) ** 2)
+    bmi = latest_weight(current_user) / ((current_user.height / 100) ** 2)
     return {"bmi": round(bmi, 2)}
 
 @router.put("/me", response_model=UserResponse)
 async def update_user_profile(
     update_data: UserUpdate,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserProfile = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update current user profile"""
@@ -36,6 +38,8 @@ async def update_user_profile(
     success = await user_service.update_user(str(current_user.id), data, db)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to update profile")
+    # update_user already invalidated; this covers a cache filled by a concurrent request
+    await user_cache.invalidate(current_user.email)
     
     updated_user = await user_service.get_user_by_id(str(current_user.id), db)
     return updated_user
\ No newline at end of file
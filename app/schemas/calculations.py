@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class TargetsProfile(BaseModel):
+    """Body data of one person, for cohorts that are not (all) registered users."""
+    height: float = Field(..., gt=0)
+    weight: float = Field(..., gt=0)
+    age: int = Field(..., gt=0)
+    gender: str
+    activity_level: str
+    health_condition: Optional[str] = "Healthy"
+    diabetes_status: Optional[str] = None
+    gym_goal: Optional[str] = None
+
+class CohortTargetsRequest(BaseModel):
+    user_ids: List[str] = Field(default_factory=list, max_length=1000)
+    profiles: List[TargetsProfile] = Field(default_factory=list, max_length=1000)
+
+class CohortTargets(BaseModel):
+    user_id: Optional[str] = None  # None for entries of profiles
+    bmi: float
+    bmr: float
+    tdee: float
+    protein: float
+    carbs: float
+    fiber: float
+    fat: float
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Literal
 from datetime import datetime
 
 class MealBase(BaseModel):
@@ -32,4 +32,28 @@ class DietPlanResponse(DietPlanBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BatchGenerationRequest(BaseModel):
+    user_ids: Optional[List[str]] = None  # None = every registered user
+    replace_existing: bool = False
+
+class BatchGenerationFailure(BaseModel):
+    user_id: str
+    error: str
+
+class BatchGenerationReport(BaseModel):
+    requested: int
+    generated: int
+    stored: int
+    failures: List[BatchGenerationFailure] = []
+    elapsed_seconds: float
+    plans_per_second: float
+
+
+MealType = Literal["Breakfast", "MorningSnacks", "Lunch", "EveningSnacks", "Dinner"]
+
+
+class MealRegenerationRequest(BaseModel):
+    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")  # YYYY-MM-DD
+    meal_type: Optional[MealType] = None  # None = whole day
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
 class MealLogCreate(BaseModel):
     meal_type: str  # breakfast, lunch, dinner, snack
@@ -22,3 +22,59 @@ class ActivityLogCreate(BaseModel):
     steps: int
     calories_burned: Optional[float] = 0
     activity_type: Optional[str] = "Walking"
+
+
+LogType = Literal["meal", "water", "steps", "weight", "activity"]
+
+
+class BatchLogEntry(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=128)
+    timestamp: datetime  # client time of the event; naive values are UTC
+
+class MealBatchEntry(BatchLogEntry):
+    type: Literal["meal"]
+    data: MealLogCreate
+
+class WaterBatchEntry(BatchLogEntry):
+    type: Literal["water"]
+    data: WaterLogCreate
+
+class StepsBatchEntry(BatchLogEntry):
+    type: Literal["steps"]
+    data: StepsLogCreate
+
+class WeightBatchEntry(BatchLogEntry):
+    type: Literal["weight"]
+    data: WeightLogCreate
+
+class ActivityBatchEntry(BatchLogEntry):
+    type: Literal["activity"]
+    data: ActivityLogCreate
+
+ProgressBatchEntry = Annotated[
+    Union[MealBatchEntry, WaterBatchEntry, StepsBatchEntry, WeightBatchEntry, ActivityBatchEntry],
+    Field(discriminator="type"),
+]
+
+class ProgressBatchRequest(BaseModel):
+    # Entries are validated one by one so a bad entry does not reject the batch
+    entries: List[dict] = Field(..., max_length=500)
+
+class ProgressBatchItemResult(BaseModel):
+    index: int
+    idempotency_key: Optional[str] = None
+    status: Literal["created", "duplicate", "invalid", "failed"]
+    error: Optional[str] = None
+
+class ProgressBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    rejected: int
+    results: List[ProgressBatchItemResult]
+
+class WeightHistoryPoint(BaseModel):
+    date: str  # first day of the bucket
+    weight: float  # last weight logged in the bucket
+    min: float
+    max: float
+    samples: int  # days with a logged weight
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.diet_plan import DietPlan
+from ..schemas.diet_plan import BatchGenerationFailure, BatchGenerationReport
+from .diet_plan_service import diet_plan_service
+from .meal_generator.catalog import food_catalog
+from .meal_generator.meal_generator import meal_generator
+from .meal_generator.validation import Severity
+from .user_service import user_service
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPlanGenerationService:
+    """
+    Generates diet plans for many users at once.
+
+    The catalog snapshot and templates are loaded once for the whole batch,
+    plans are built and validated concurrently (with the same retries as
+    single-user generation), and all valid plans are written with a single
+    Mongo bulk write. Users whose plan fails validation are reported.
+    """
+
+    async def generate_for_users(
+        self,
+        user_ids: Optional[List[str]],
+        session: AsyncSession,
+        db: AsyncIOMotorDatabase,
+        replace_existing: bool = False,
+    ) -> BatchGenerationReport:
+        """Generate plans for the given user IDs, or every user if None."""
+        users = await user_service.get_users(user_ids, db)
+        profiles = [user.model_dump() for user in users]
+
+        missing = []
+        if user_ids is not None:
+            found = {profile["id"] for profile in profiles}
+            missing = [
+                BatchGenerationFailure(user_id=user_id, error="User not found")
+                for user_id in user_ids if user_id not in found
+            ]
+
+        report = await self.generate_for_profiles(profiles, session, replace_existing)
+        report.requested += len(missing)
+        report.failures = missing + report.failures
+        return report
+
+    async def generate_for_profiles(
+        self,
+        profiles: List[Dict],
+        session: AsyncSession,
+        replace_existing: bool = False,
+    ) -> BatchGenerationReport:
+        started = time.perf_counter()
+        failures: List[BatchGenerationFailure] = []
+
+        if not replace_existing:
+            existing = await diet_plan_service.get_user_ids_with_plans([p["id"] for p in profiles])
+            failures += [
+                BatchGenerationFailure(user_id=user_id, error="Diet plan already exists for this user")
+                for user_id in existing
+            ]
+            pending = [p for p in profiles if p["id"] not in existing]
+        else:
+            pending = list(profiles)
+
+        # Shared inputs: one catalog load, cached template lookups
+        snapshot = await food_catalog.get_snapshot(session)
+        templates = [await meal_generator.resolve_templates(p, session) for p in pending]
+
+        semaphore = asyncio.Semaphore(settings.BATCH_GENERATION_CONCURRENCY)
+
+        async def build(profile: Dict, profile_templates: Dict) -> DietPlan:
+            async with semaphore:
+                plan, issues = await diet_plan_service.build_validated_diet_plan(
+                    profile, snapshot, profile_templates
+                )
+            if plan is None:
+                errors = [issue for issue in issues if issue.severity == Severity.ERROR] or issues
+                detail = "; ".join(issue.message for issue in errors[:3]) or "generation failed on every attempt"
+                raise ValueError(f"Plan failed validation: {detail}")
+            return plan
+
+        results = await asyncio.gather(
+            *(build(p, t) for p, t in zip(pending, templates)),
+            return_exceptions=True,
+        )
+
+        plans = []
+        for profile, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"Batch generation failed for user {profile['id']}: {result}")
+                failures.append(BatchGenerationFailure(user_id=profile["id"], error=str(result)))
+            else:
+                plans.append(result)
+
+        try:
+            stored = await diet_plan_service.store_diet_plans(plans, replace_existing=replace_existing)
+        except BulkWriteError as exc:
+            details = exc.details
+            stored = details.get("nInserted", 0) + details.get("nUpserted", 0) + details.get("nModified", 0)
+            failures += [
+                BatchGenerationFailure(user_id=plans[error["index"]].user_id, error=error.get("errmsg", "Write failed"))
+                for error in details.get("writeErrors", [])
+            ]
+
+        elapsed = time.perf_counter() - started
+        report = BatchGenerationReport(
+            requested=len(profiles),
+            generated=len(plans),
+            stored=stored,
+            failures=failures,
+            elapsed_seconds=round(elapsed, 3),
+            plans_per_second=round(len(plans) / elapsed, 2) if elapsed > 0 else 0.0,
+        )
+        logger.info(
+            f"Batch generation: {report.generated}/{report.requested} plans in "
+            f"{report.elapsed_seconds}s ({report.plans_per_second} plans/sec), "
+            f"{len(failures)} failures"
+        )
+        return report
+
+
+# Singleton instance
+batch_generation_service = BatchPlanGenerationService()
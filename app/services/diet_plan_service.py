@@ -1,12 +1,32 @@
-from typing import Dict, List, Optional
+import logging
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from ..models.diet_plan import DietPlan, Meal
 from ..core.config import settings
-from motor.motor_asyncio import AsyncIOMotorClient
+from ..core.exceptions import DietPlanConflictException, PlanGenerationFailedException
+from ..core.database import get_database
+from pymongo import InsertOne, ReplaceOne
 from enum import Enum
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .meal_generator.executor import generation_executor
+from .meal_generator.catalog import CatalogSnapshot, food_catalog
 from .meal_generator.meal_generator import meal_generator
+from .meal_generator.checklist import IngredientChecklist
+from .meal_generator.validation import PlanValidationIssue, Severity, ValidationCode
+
+logger = logging.getLogger(__name__)
+
+# Reads of the plan before regenerate_meals gives up on concurrent updates (409)
+REGENERATE_ATTEMPTS = 3
+
+# Issues fixed by regenerating only the affected (date, meal_type) slots
+SLOT_REPAIRABLE = {
+    ValidationCode.MISSING_MEAL,
+    ValidationCode.DUPLICATE_MEAL,
+    ValidationCode.DIET_MISMATCH,
+    ValidationCode.CALORIES_OUT_OF_BAND,
+}
 
 class ActivityLevel(str, Enum):
     SEDENTARY = "S"
@@ -32,29 +52,196 @@ class region(str, Enum):
     none = "none"
 # Service class for diet plan generation and storage
 class DietPlanService:
-    def __init__(self):
-        self._mongo_client = None
-
     @property
     def diet_plans(self):
-        if self._mongo_client is None:
-            self._mongo_client = AsyncIOMotorClient(settings.MONGO_URI)
-        return self._mongo_client[settings.DATABASE_NAME].diet_plans
+        # Shared, pooled client owned by core.database
+        return get_database().diet_plans
 
 
     async def generate_diet_plan(self, user_data: Dict, session: AsyncSession) -> DietPlan:
         """Generate personalized diet plan using nutritional science principles."""
         # Validate inputs
-        # Use the singleton meal_generator instance
-        meal_plan = await meal_generator.generate_meal_plan(user_data, session)
+        if "start_date" not in user_data:
+            user_data["start_date"] = datetime.now().strftime("%Y-%m-%d")
+        # CPU work runs in the configured generation executor (thread/process pool)
+        meal_plan = await generation_executor.generate_meal_plan(user_data, session)
+        return self._to_diet_plan(user_data, meal_plan)
+
+    def _to_diet_plan(self, user_data: Dict, meal_plan: Dict) -> DietPlan:
         return DietPlan(
             user_id=user_data["id"],
             created_at=datetime.now(),
             meals=meal_plan.get("meals", []),
-            ingredient_checklist=meal_plan.get("ingredient_checklist", [])
+            ingredient_checklist=meal_plan.get("ingredient_checklist", []),
+            daily_checklists=meal_plan.get("daily_checklists", {}),
+            daily_totals=meal_plan.get("daily_totals", {}),
+        )
+
+
+
+    async def generate_validated_diet_plan(self, user_data: Dict, session: AsyncSession, max_attempts: int = 3) -> Tuple[Optional[DietPlan], List[PlanValidationIssue]]:
+        """
+        Generate a plan and validate it, retrying up to max_attempts times.
+
+        Slot-level issues (missing/duplicate meal, wrong diet type, calories
+        out of band) are retried by regenerating only those slots; anything
+        else triggers a full regeneration. Calorie band issues that remain
+        after the last attempt are accepted. Returns (plan, issues), with
+        plan None if no acceptable plan was produced (also when the catalog
+        or templates cannot be loaded).
+        """
+        try:
+            snapshot = await food_catalog.get_snapshot(session)
+            templates = await meal_generator.resolve_templates(user_data, session)
+        except Exception as exc:
+            logger.error(f"Loading the food catalog or meal templates failed: {exc}", exc_info=True)
+            return None, []
+        return await self.build_validated_diet_plan(user_data, snapshot, templates, max_attempts)
+
+    async def build_validated_diet_plan(
+        self,
+        user_data: Dict,
+        snapshot: CatalogSnapshot,
+        templates: Dict[str, Optional[List[dict]]],
+        max_attempts: int = 3,
+    ) -> Tuple[Optional[DietPlan], List[PlanValidationIssue]]:
+        """
+        generate_validated_diet_plan with an already loaded catalog snapshot
+        and templates; no database session is used, so many users can be
+        generated concurrently (batch generation).
+        """
+        if "start_date" not in user_data:
+            user_data["start_date"] = datetime.now().strftime("%Y-%m-%d")
+
+        diet_plan: Optional[DietPlan] = None
+        issues: List[PlanValidationIssue] = []
+        for attempt in range(1, max_attempts + 1):
+            slots = {issue.slot for issue in issues if issue.code in SLOT_REPAIRABLE and issue.slot}
+            full_regeneration = diet_plan is None or any(
+                issue.code not in SLOT_REPAIRABLE and issue.code != ValidationCode.EMPTY_CHECKLIST
+                for issue in issues
+            )
+            try:
+                if full_regeneration:
+                    meal_plan = await generation_executor.build_meal_plan(user_data, snapshot, templates)
+                    diet_plan = self._to_diet_plan(user_data, meal_plan)
+                elif slots:
+                    diet_plan = self._refill_slots(diet_plan, user_data, snapshot, templates, slots)
+            except Exception as exc:
+                logger.error(f"Diet plan generation attempt {attempt} raised an exception: {exc}", exc_info=True)
+                diet_plan, issues = None, []
+                continue
+
+            # Rebuild an empty checklist so we don't waste a retry on a trivial issue
+            if not diet_plan.ingredient_checklist:
+                diet_plan.ingredient_checklist = meal_generator.generate_ingredient_checklist(diet_plan.meals)
+
+            issues = meal_generator.validate_plan(diet_plan.meals, diet_plan.ingredient_checklist, user_data, snapshot)
+            errors = [issue for issue in issues if issue.severity == Severity.ERROR]
+            if not issues or (not errors and attempt == max_attempts):
+                return diet_plan, issues
+
+            logger.warning(
+                f"Attempt {attempt} produced {len(issues)} plan issues "
+                f"({', '.join(sorted({issue.code.value for issue in issues}))})"
+            )
+
+        return None, issues
+
+    def _refill_slots(self, diet_plan: DietPlan, user_data: Dict, snapshot: CatalogSnapshot, templates: Dict[str, Optional[List[dict]]], slots: set) -> DietPlan:
+        meals, removed, added = meal_generator.refill_slots(user_data, diet_plan.meals, snapshot, templates, slots)
+        diet_plan.ingredient_checklist = meal_generator.patch_ingredient_checklist(
+            diet_plan.ingredient_checklist, removed, added
         )
+        diet_plan.meals = meals
+        diet_plan.daily_checklists, diet_plan.daily_totals = meal_generator.daily_summaries(meals)
+        return diet_plan
+
+    async def regenerate_meals(self, user_data: Dict, session: AsyncSession, date: str, meal_type: Optional[str] = None) -> Optional[DietPlan]:
+        """
+        Replace one meal (or every meal of one day) of the user's stored plan.
 
+        Only the affected array elements and the ingredient checklist are
+        written back. Returns a DietPlan holding the new meals and the
+        patched checklist, None if the user has no plan, or an empty meal
+        list if nothing matched or could be regenerated.
+        PlanGenerationFailedException (503) if the catalog or templates
+        cannot be loaded.
+        """
+        try:
+            snapshot = await food_catalog.get_snapshot(session)
+            templates = await meal_generator.resolve_templates(user_data, session)
+        except Exception as exc:
+            logger.error(f"Loading the food catalog or meal templates failed: {exc}", exc_info=True)
+            raise PlanGenerationFailedException()
+        # A plan changed between the read and the write is read again
+        for _ in range(REGENERATE_ATTEMPTS):
+            plan = await self.get_diet_plan(user_data["id"])
+            if plan is None:
+                return None
 
+            replacements = meal_generator.regenerate_meals(
+                user_data, plan.meals, snapshot, templates, date, meal_type
+            )
+            if not replacements:
+                return DietPlan(user_id=plan.user_id, created_at=plan.created_at, meals=[], ingredient_checklist=plan.ingredient_checklist)
+
+            checklist = meal_generator.patch_ingredient_checklist(
+                plan.ingredient_checklist,
+                removed_meals=[plan.meals[i] for i in replacements],
+                added_meals=list(replacements.values()),
+            )
+            updated_meals = [replacements.get(i, meal) for i, meal in enumerate(plan.meals)]
+            daily_checklists, daily_totals = meal_generator.daily_summaries(
+                [meal for meal in updated_meals if meal.get("Date") == date]
+            )
+            if await self.replace_meals(
+                plan.user_id, plan.meals, replacements, checklist, daily_checklists, daily_totals, plan.version
+            ):
+                break
+        else:
+            raise DietPlanConflictException()
+
+        return DietPlan(
+            user_id=plan.user_id,
+            created_at=plan.created_at,
+            meals=list(replacements.values()),
+            ingredient_checklist=checklist,
+            daily_checklists=daily_checklists,
+            daily_totals=daily_totals,
+        )
+
+    async def replace_meals(
+        self,
+        user_id: str,
+        current_meals: List[Dict],
+        replacements: Dict[int, Dict],
+        checklist: List[Dict],
+        daily_checklists: Optional[Dict[str, List[Dict]]] = None,
+        daily_totals: Optional[Dict[str, Dict[str, float]]] = None,
+        version: int = 0,
+    ) -> bool:
+        """
+        Targeted $set of the replaced meals array elements, the checklist
+        and the per-day summaries of the affected dates.
+        Only applied if the stored plan is still at `version` and the
+        replaced elements still hold the same meals (date, meal type and
+        Food IDs), so concurrent updates are never lost; False otherwise.
+        """
+        # Plans stored before versioning have no version field
+        query = {"user_id": user_id, "version": version if version else {"$in": [None, 0]}}
+        update = {"ingredient_checklist": checklist}
+        for date_str, records in (daily_checklists or {}).items():
+            update[f"daily_checklists.{date_str}"] = records
+        for date_str, totals in (daily_totals or {}).items():
+            update[f"daily_totals.{date_str}"] = totals
+        for index, meal in replacements.items():
+            query[f"meals.{index}.Date"] = current_meals[index].get("Date")
+            query[f"meals.{index}.Meal Type"] = current_meals[index].get("Meal Type")
+            query[f"meals.{index}.Food IDs"] = current_meals[index].get("Food IDs")
+            update[f"meals.{index}"] = meal
+        result = await self.diet_plans.update_one(query, {"$set": update, "$inc": {"version": 1}})
+        return result.matched_count > 0
 
     # Keep existing CRUD methods (store_diet_plan, get_diet_plan, etc.)
     async def store_diet_plan(self, diet_plan: DietPlan) -> str:
@@ -62,20 +249,142 @@ class DietPlanService:
         result = await self.diet_plans.insert_one(diet_plan.dict())
         return str(result.inserted_id)
 
+    async def store_diet_plans(self, diet_plans: List[DietPlan], replace_existing: bool = False) -> int:
+        """
+        Store many diet plans with a single bulk write.
+        With replace_existing, a user's current plan is replaced (upsert).
+        Returns the number of plans written.
+        """
+        if not diet_plans:
+            return 0
+        if replace_existing:
+            operations = [
+                ReplaceOne({"user_id": plan.user_id}, plan.model_dump(), upsert=True)
+                for plan in diet_plans
+            ]
+        else:
+            operations = [InsertOne(plan.model_dump()) for plan in diet_plans]
+        result = await self.diet_plans.bulk_write(operations, ordered=False)
+        return result.inserted_count + result.upserted_count + result.modified_count
+
+    async def get_user_ids_with_plans(self, user_ids: List[str]) -> set:
+        """Return the subset of user_ids that already have a diet plan."""
+        cursor = self.diet_plans.find({"user_id": {"$in": user_ids}}, {"user_id": 1, "_id": 0})
+        return {doc["user_id"] async for doc in cursor}
+
     async def get_diet_plan(self, user_id: str) -> DietPlan:
         """Retrieve diet plan for a user."""
         plan = await self.diet_plans.find_one({"user_id": user_id})
         return DietPlan(**plan) if plan else None
 
+    async def get_daily_checklist(self, user_id: str, date: str) -> Optional[List[Dict]]:
+        """
+        Ingredient checklist of one day, read with a projection of the
+        precomputed daily_checklists entry. None if the user has no plan.
+        """
+        doc = await self.diet_plans.find_one(
+            {"user_id": user_id}, {"_id": 0, f"daily_checklists.{date}": 1}
+        )
+        if doc is None:
+            return None
+        records = doc.get("daily_checklists", {}).get(date)
+        if records is not None:
+            return records
+        # Plans stored before daily checklists existed
+        doc = await self.diet_plans.find_one({"user_id": user_id}, {"_id": 0, "meals": 1})
+        day_meals = [m for m in doc.get("meals", []) if m.get("Date") == date]
+        return meal_generator.generate_ingredient_checklist(day_meals)
+
+    async def get_day_plan(self, user_id: str, date: str) -> Optional[Dict]:
+        """One day of the user's plan (see get_plan_slice). None if the user has no plan."""
+        return await self.get_plan_slice(user_id, date, date)
+
+    async def get_plan_slice(self, user_id: str, start_date: str, end_date: str, meal_types: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Meals dated start_date..end_date (inclusive, YYYY-MM-DD), optionally
+        only the given meal types, with the stored checklists and nutrient
+        totals of those days. Filtering runs in Mongo ($filter), so only the
+        slice is sent back. Returns a plain dict shaped like DietPlan, with
+        ingredient_checklist covering the whole range, or None if the user
+        has no plan. With meal_types, the checklists and totals cover only
+        the returned meals.
+        """
+        cursor = self.diet_plans.aggregate(self._plan_slice_pipeline(user_id, start_date, end_date, meal_types))
+        docs = await cursor.to_list(length=1)
+        if not docs:
+            return None
+        doc = docs[0]
+
+        meals = doc.get("meals") or []
+        daily_checklists = doc.get("daily_checklists") or {}
+        daily_totals = doc.get("daily_totals") or {}
+        dates = {meal.get("Date") for meal in meals}
+        if meal_types or not dates <= daily_checklists.keys() & daily_totals.keys():
+            # The stored summaries cover whole days (and are missing on plans
+            # stored before they existed): build them from the returned meals
+            daily_checklists, daily_totals = meal_generator.daily_summaries(meals)
+
+        checklist = IngredientChecklist()
+        for records in daily_checklists.values():
+            checklist.merge(IngredientChecklist.from_records(records))
+        return {
+            "user_id": doc.get("user_id"),
+            "created_at": doc.get("created_at"),
+            "meals": meals,
+            "ingredient_checklist": checklist.to_records(),
+            "daily_checklists": daily_checklists,
+            "daily_totals": daily_totals,
+        }
+
+    def _plan_slice_pipeline(self, user_id: str, start_date: str, end_date: str, meal_types: Optional[List[str]]) -> List[Dict]:
+        meal_conditions = [
+            {"$gte": ["$$meal.Date", start_date]},
+            {"$lte": ["$$meal.Date", end_date]},
+        ]
+        if meal_types:
+            meal_conditions.append({"$in": ["$$meal.Meal Type", meal_types]})
+
+        def days_in_range(field: str) -> Dict:
+            return {"$arrayToObject": {"$filter": {
+                "input": {"$objectToArray": {"$ifNull": [f"${field}", {}]}},
+                "as": "day",
+                "cond": {"$and": [{"$gte": ["$$day.k", start_date]}, {"$lte": ["$$day.k", end_date]}]},
+            }}}
+
+        project = {
+            "_id": 0,
+            "user_id": 1,
+            "created_at": 1,
+            "meals": {"$filter": {"input": "$meals", "as": "meal", "cond": {"$and": meal_conditions}}},
+        }
+        if not meal_types:
+            # Whole-day summaries are only used when whole days are returned
+            project["daily_checklists"] = days_in_range("daily_checklists")
+            project["daily_totals"] = days_in_range("daily_totals")
+        return [
+            {"$match": {"user_id": user_id}},
+            {"$limit": 1},
+            {"$project": project},
+        ]
+
     async def update_diet_plan(self, user_id: str, updated_plan: DietPlan) -> bool:
-        """Update existing diet plan."""
+        """
+        Update existing diet plan. Its ingredient checklist, daily checklists
+        and daily totals are recomputed from its meals (set on updated_plan).
+        """
+        checklist = IngredientChecklist.from_meals(updated_plan.meals)
+        updated_plan.ingredient_checklist = checklist.to_records()
+        updated_plan.daily_checklists, updated_plan.daily_totals = meal_generator.daily_summaries(updated_plan.meals, checklist)
         result = await self.diet_plans.update_one(
             {"user_id": user_id},
-            {"$set": updated_plan.model_dump(exclude={"id"})}
+            {"$set": updated_plan.model_dump(exclude={"id", "version"}), "$inc": {"version": 1}}
         )
         return result.modified_count > 0
     
     async def delete_diet_plan(self, user_id: str) -> bool:
         """Delete a diet plan for a user."""
         result = await self.diet_plans.delete_one({"user_id": user_id})
-        return result.deleted_count > 0
\ No newline at end of file
+        return result.deleted_count > 0
+
+# Singleton instance
+diet_plan_service = DietPlanService()
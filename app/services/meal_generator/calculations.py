@@ -1,4 +1,31 @@
-from typing import Optional
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+ACTIVITY_MULTIPLIERS = {
+    'S': 1.2, 'LA': 1.375,
+    'MA': 1.55, 'VA': 1.725, 'SA': 1.9
+}
+DEFAULT_ACTIVITY_MULTIPLIER = 1.2
+
+# (protein, carbs, fat) shares of TDEE by (health_condition, status);
+# anything not listed gets the default split
+DEFAULT_MACRO_SPLIT = (0.2, 0.55, 0.25)
+MACRO_SPLITS = {
+    ('Gym-Friendly', 'weight_loss'): (0.45, 0.35, 0.2),
+    ('Gym-Friendly', 'muscle_gain'): (0.4, 0.4, 0.2),
+    ('Gym-Friendly', 'maintenance'): (0.35, 0.4, 0.25),
+    ('Diabetic-Friendly', 'controlled'): (0.25, 0.45, 0.25),
+    ('Diabetic-Friendly', 'uncontrolled'): (0.3, 0.4, 0.25),
+}
+
+def macro_split_key(health_condition: Optional[str], gym_goal: Optional[str] = None, diabetes_status: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    The (health_condition, status) arguments of calculate_macronutrients for
+    a user: gym plans split macros by gym goal, diabetic plans by diabetes
+    status. Plan generation and the cohort targets both derive them here.
+    """
+    return health_condition, gym_goal if health_condition == 'Gym-Friendly' else diabetes_status
 
 def calculate_bmi(height: float, weight: float) -> float:
     height_m = height / 100
@@ -12,43 +39,72 @@ def calculate_bmr(gender: str, weight: float, height: float, age: int) -> float:
     return 0.0
 
 def calculate_tdee(bmr: float, activity_level: str) -> float:
-    multipliers = {
-        'S': 1.2, 'LA': 1.375,
-        'MA': 1.55, 'VA': 1.725, 'SA': 1.9
-    }
-    return bmr * multipliers.get(activity_level, 1.2)
+    return bmr * ACTIVITY_MULTIPLIERS.get(activity_level, DEFAULT_ACTIVITY_MULTIPLIER)
 
 def calculate_macronutrients(tdee: float, health_condition: Optional[str] = None, diabetes_status: Optional[str] = None):
-    # Initialize with default values to avoid UnboundLocalError
-    protein = (tdee * 0.2) / 4
-    carbs = (tdee * 0.55) / 4
-    fat = (tdee * 0.25) / 9
-    
-    if health_condition == 'Healthy':
-        pass # Using defaults
-    elif health_condition == 'Gym-Friendly': 
-        if diabetes_status == 'weight_loss':
-            protein = (tdee * 0.45) / 4
-            carbs = (tdee * 0.35) / 4
-            fat = (tdee * 0.2) / 9
-        elif diabetes_status == 'muscle_gain':
-            protein = (tdee * 0.4) / 4
-            carbs = (tdee * 0.4) / 4
-            fat = (tdee * 0.2) / 9
-        elif diabetes_status == 'maintenance':
-            protein = (tdee * 0.35) / 4
-            carbs = (tdee * 0.4) / 4
-            fat = (tdee * 0.25) / 9
-    elif health_condition == 'Diabetic-Friendly':
-        if diabetes_status == 'controlled':
-            protein = (tdee * 0.25) / 4
-            carbs = (tdee * 0.45) / 4
-            fat = (tdee * 0.25) / 9
-        elif diabetes_status == 'uncontrolled':
-            protein = (tdee * 0.3) / 4
-            carbs = (tdee * 0.4) / 4
-            fat = (tdee * 0.25) / 9
-    
+    protein_share, carbs_share, fat_share = MACRO_SPLITS.get((health_condition, diabetes_status), DEFAULT_MACRO_SPLIT)
+    protein = (tdee * protein_share) / 4
+    carbs = (tdee * carbs_share) / 4
+    fat = (tdee * fat_share) / 9
     fiber = (tdee * 14) / 1000
-    
-    return protein, carbs, fiber, fat
\ No newline at end of file
+
+    return protein, carbs, fiber, fat
+
+
+# Vectorized counterparts: one call for a whole cohort. They apply the same
+# float64 operations in the same order as the scalar functions above, so
+# every element is bit-identical to the scalar result.
+
+_ACTIVITY_CODES = {level: code for code, level in enumerate(ACTIVITY_MULTIPLIERS)}
+_ACTIVITY_TABLE = np.array([*ACTIVITY_MULTIPLIERS.values(), DEFAULT_ACTIVITY_MULTIPLIER])
+_MACRO_CODES = {key: code for code, key in enumerate(MACRO_SPLITS)}
+_MACRO_TABLE = np.array([*MACRO_SPLITS.values(), DEFAULT_MACRO_SPLIT])
+
+
+def _codes(values: Sequence, codes: Dict, default: int) -> np.ndarray:
+    """Row of each value in a lookup table; unknown values map to the default row."""
+    return np.fromiter((codes.get(value, default) for value in values), dtype=np.intp, count=len(values))
+
+
+def calculate_bmi_batch(height: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    height_m = np.asarray(height, dtype=np.float64) / 100
+    return np.asarray(weight, dtype=np.float64) / (height_m ** 2)
+
+def calculate_bmr_batch(gender: Sequence[str], weight: np.ndarray, height: np.ndarray, age: np.ndarray) -> np.ndarray:
+    weight = np.asarray(weight, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    age = np.asarray(age, dtype=np.float64)
+    gender = np.array([str(g).lower() for g in gender])
+    base = (10 * weight) + (6.25 * height) - (5 * age)
+    return np.where(gender == 'male', base + 5, np.where(gender == 'female', base - 161, 0.0))
+
+def calculate_tdee_batch(bmr: np.ndarray, activity_level: Sequence[str]) -> np.ndarray:
+    multipliers = _ACTIVITY_TABLE[_codes(activity_level, _ACTIVITY_CODES, len(ACTIVITY_MULTIPLIERS))]
+    return np.asarray(bmr, dtype=np.float64) * multipliers
+
+def calculate_macronutrients_batch(tdee: np.ndarray, health_condition: Sequence[Optional[str]], diabetes_status: Sequence[Optional[str]]):
+    """Arrays (protein, carbs, fiber, fat), like calculate_macronutrients."""
+    tdee = np.asarray(tdee, dtype=np.float64)
+    keys = list(zip(health_condition, diabetes_status))
+    shares = _MACRO_TABLE[_codes(keys, _MACRO_CODES, len(MACRO_SPLITS))]
+    protein = (tdee * shares[:, 0]) / 4
+    carbs = (tdee * shares[:, 1]) / 4
+    fat = (tdee * shares[:, 2]) / 9
+    fiber = (tdee * 14) / 1000
+    return protein, carbs, fiber, fat
+
+def calculate_targets_batch(
+    height: Sequence[float],
+    weight: Sequence[float],
+    age: Sequence[int],
+    gender: Sequence[str],
+    activity_level: Sequence[str],
+    health_condition: Sequence[Optional[str]],
+    diabetes_status: Sequence[Optional[str]],
+) -> Dict[str, np.ndarray]:
+    """BMI, BMR, TDEE and daily macro targets for a cohort, one array per target."""
+    bmi = calculate_bmi_batch(height, weight)
+    bmr = calculate_bmr_batch(gender, weight, height, age)
+    tdee = calculate_tdee_batch(bmr, activity_level)
+    protein, carbs, fiber, fat = calculate_macronutrients_batch(tdee, health_condition, diabetes_status)
+    return {"bmi": bmi, "bmr": bmr, "tdee": tdee, "protein": protein, "carbs": carbs, "fiber": fiber, "fat": fat}
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.db_models import FoodItem
+
+logger = logging.getLogger(__name__)
+
+# Column order of CatalogSnapshot.nutrients
+NUTRIENT_COLUMNS = ("cal", "protein", "carbs", "fat", "fiber", "sodium")
+CAL, PROTEIN, CARBS, FAT, FIBER, SODIUM = range(len(NUTRIENT_COLUMNS))
+
+
+class TagBits:
+    """
+    Assigns one bit per distinct tag value so that tag membership
+    (region, meal time, plan type) can be tested with a single AND.
+    """
+    MAX_TAGS = 63  # masks are stored in int64 columns
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+
+    def register(self, tags: Iterable[str]) -> int:
+        mask = 0
+        for tag in tags or []:
+            bit = self._bits.get(tag)
+            if bit is None:
+                if len(self._bits) >= self.MAX_TAGS:
+                    raise ValueError(f"More than {self.MAX_TAGS} distinct tag values: {tag!r}")
+                bit = 1 << len(self._bits)
+                self._bits[tag] = bit
+            mask |= bit
+        return mask
+
+    def bit(self, tag: str) -> int:
+        """Returns the bit for a tag, or 0 if no item carries it."""
+        return self._bits.get(tag, 0)
+
+
+class CatalogItem:
+    """
+    Lightweight, read-only copy of a FoodItem row with numeric columns
+    already converted to float and tag arrays packed into bitsets.
+    """
+    __slots__ = (
+        "id", "recipe_name", "slot_type", "diet_type",
+        "cal_per_serving", "protein_per_serving", "carbs_per_serving",
+        "fat_per_serving", "fiber_per_serving", "sodium_per_serving",
+        "ingredients", "region_bits", "meal_time_bits", "plan_type_bits",
+    )
+
+    def __init__(self, row, region_bits: int, meal_time_bits: int, plan_type_bits: int):
+        self.id = row["id"]
+        self.recipe_name = row["recipe_name"]
+        self.slot_type = row["slot_type"]
+        self.diet_type = row["diet_type"]
+        self.cal_per_serving = float(row["cal_per_serving"] or 0)
+        self.protein_per_serving = float(row["protein_per_serving"] or 0)
+        self.carbs_per_serving = float(row["carbs_per_serving"] or 0)
+        self.fat_per_serving = float(row["fat_per_serving"] or 0)
+        self.fiber_per_serving = float(row["fiber_per_serving"] or 0)
+        self.sodium_per_serving = float(row["sodium_per_serving"] or 0)
+        self.ingredients = [
+            {"name": ing["name"], "amount_g": float(ing["amount_g"])}
+            for ing in (row["ingredients"] or [])
+        ]
+        self.region_bits = region_bits
+        self.meal_time_bits = meal_time_bits
+        self.plan_type_bits = plan_type_bits
+
+
+class CatalogSnapshot:
+    """
+    Immutable in-memory view of the food_items table.
+
+    Besides the CatalogItem objects, nutrients and tag bitsets are kept as
+    columns (one row per item, in id order) so candidate filtering and
+    scoring run as NumPy operations over row indices.
+    """
+    def __init__(self, rows: Iterable, version: Tuple = ()):
+        self.version = version
+        self.loaded_at = time.time()
+        self.regions = TagBits()
+        self.meal_times = TagBits()
+        self.plan_types = TagBits()
+        self.items: Dict[int, CatalogItem] = {}
+        self.ids_by_name: Dict[str, int] = {}
+        self.rows: List[CatalogItem] = []
+        by_key: Dict[Tuple[str, str], List[int]] = {}
+
+        for row in rows:
+            item = CatalogItem(
+                row,
+                region_bits=self.regions.register(row["region_tags"]),
+                meal_time_bits=self.meal_times.register(row["meal_time_tags"]),
+                plan_type_bits=self.plan_types.register(row["plan_type_tags"]),
+            )
+            self.items[item.id] = item
+            self.ids_by_name.setdefault(item.recipe_name, item.id)
+            by_key.setdefault((item.slot_type, item.diet_type), []).append(len(self.rows))
+            self.rows.append(item)
+
+        self.ids = np.array([item.id for item in self.rows], dtype=np.int64)
+        self.nutrients = np.array(
+            [
+                (item.cal_per_serving, item.protein_per_serving, item.carbs_per_serving,
+                 item.fat_per_serving, item.fiber_per_serving, item.sodium_per_serving)
+                for item in self.rows
+            ],
+            dtype=np.float32,
+        ).reshape(len(self.rows), len(NUTRIENT_COLUMNS))
+        self.region_bits = np.array([item.region_bits for item in self.rows], dtype=np.int64)
+        self.meal_time_bits = np.array([item.meal_time_bits for item in self.rows], dtype=np.int64)
+        self.plan_type_bits = np.array([item.plan_type_bits for item in self.rows], dtype=np.int64)
+        self.by_key: Dict[Tuple[str, str], np.ndarray] = {
+            key: np.array(indices, dtype=np.intp) for key, indices in by_key.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def candidate_rows(self, slot_type: str, diet_type: str, region: str, meal_time: str, plan_type: str, used_ids: set) -> np.ndarray:
+        """
+        Row indices of the candidates for a slot. Mirrors the original
+        three-step SQL lookup: preferred region, then any region, then
+        ignore history and tags.
+        """
+        pool = self.by_key.get((slot_type, diet_type))
+        if pool is None:
+            return np.empty(0, dtype=np.intp)
+
+        tagged_mask = (
+            (self.meal_time_bits[pool] & self.meal_times.bit(meal_time)) != 0
+        ) & (
+            (self.plan_type_bits[pool] & self.plan_types.bit(plan_type)) != 0
+        )
+        if used_ids:
+            used = np.fromiter(used_ids, dtype=np.int64, count=len(used_ids))
+            tagged_mask &= ~np.isin(self.ids[pool], used)
+
+        rows = pool[tagged_mask & ((self.region_bits[pool] & self.regions.bit(region)) != 0)]
+
+        if not len(rows):
+            # Fallback 1: Ignore exact region, but exclude used_ids
+            rows = pool[tagged_mask]
+
+        if not len(rows):
+            # Fallback 2: Reset history constraints
+            rows = pool
+
+        return rows
+
+    def candidates(self, slot_type: str, diet_type: str, region: str, meal_time: str, plan_type: str, used_ids: set) -> List[CatalogItem]:
+        rows = self.candidate_rows(slot_type, diet_type, region, meal_time, plan_type, used_ids)
+        return [self.rows[r] for r in rows]
+
+
+class FoodCatalog:
+    """
+    Process-wide holder of the current CatalogSnapshot.
+
+    The snapshot is reloaded only when the food_items watermark
+    (max updated_at, row count, max id) changes, and the watermark itself
+    is checked at most once every CATALOG_REFRESH_SECONDS.
+    """
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at: float = float("-inf")
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def invalidate(self):
+        """Forces a watermark check on the next get_snapshot call."""
+        self._checked_at = float("-inf")
+
+    async def get_snapshot(self, session: AsyncSession) -> CatalogSnapshot:
+        if self._snapshot is not None and not self._is_stale():
+            return self._snapshot
+
+        async with self._lock:
+            if self._snapshot is not None and not self._is_stale():
+                return self._snapshot
+
+            version = await self._fetch_watermark(session)
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = await self._load(session, version)
+                logger.info(f"Food catalog loaded: {len(self._snapshot)} items (version={version})")
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self._checked_at >= settings.CATALOG_REFRESH_SECONDS
+
+    async def _fetch_watermark(self, session: AsyncSession) -> Tuple:
+        stmt = select(
+            func.max(FoodItem.updated_at),
+            func.count(FoodItem.id),
+            func.max(FoodItem.id),
+        )
+        result = await session.execute(stmt)
+        return tuple(result.one())
+
+    async def _load(self, session: AsyncSession, version: Tuple) -> CatalogSnapshot:
+        # Only the columns needed for generation; instructions etc. stay in Postgres
+        stmt = select(
+            FoodItem.id,
+            FoodItem.recipe_name,
+            FoodItem.slot_type,
+            FoodItem.diet_type,
+            FoodItem.cal_per_serving,
+            FoodItem.protein_per_serving,
+            FoodItem.carbs_per_serving,
+            FoodItem.fat_per_serving,
+            FoodItem.fiber_per_serving,
+            FoodItem.sodium_per_serving,
+            FoodItem.region_tags,
+            FoodItem.meal_time_tags,
+            FoodItem.plan_type_tags,
+            FoodItem.ingredients,
+        ).order_by(FoodItem.id)
+        result = await session.execute(stmt)
+        return CatalogSnapshot(result.mappings().all(), version=version)
+
+
+# Singleton instance
+food_catalog = FoodCatalog()
@@ -0,0 +1,76 @@
+from typing import Dict, Iterable, List, Optional
+
+
+class IngredientChecklist:
+    """
+    Running ingredient totals (grams) over a set of meals.
+
+    Meals are folded in one at a time (add_meal/remove_meal), so a plan's
+    checklist can be built while its meals are generated and patched when
+    meals are replaced. Totals are kept per date, so a single day can be
+    sliced out with day() and partial checklists combined with merge().
+    Records loaded with from_records() have no date and only count towards
+    the overall totals.
+    """
+    __slots__ = ("_days",)
+
+    def __init__(self):
+        self._days: Dict[Optional[str], Dict[str, float]] = {}
+
+    @classmethod
+    def from_meals(cls, meals: Iterable[Dict]) -> "IngredientChecklist":
+        checklist = cls()
+        for meal in meals:
+            checklist.add_meal(meal)
+        return checklist
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], date: Optional[str] = None) -> "IngredientChecklist":
+        checklist = cls()
+        day = checklist._days.setdefault(date, {})
+        for row in records:
+            day[row["Ingredient"]] = day.get(row["Ingredient"], 0.0) + float(row["Total Amount (g)"])
+        return checklist
+
+    def add_meal(self, meal: Dict, sign: int = 1):
+        day = self._days.setdefault(meal.get("Date"), {})
+        for ingredient, amount in meal.get("Ingredients Scaling", {}).items():
+            day[ingredient] = day.get(ingredient, 0.0) + sign * float(amount)
+
+    def remove_meal(self, meal: Dict):
+        self.add_meal(meal, sign=-1)
+
+    def merge(self, other: "IngredientChecklist") -> "IngredientChecklist":
+        for date, amounts in other._days.items():
+            day = self._days.setdefault(date, {})
+            for ingredient, amount in amounts.items():
+                day[ingredient] = day.get(ingredient, 0.0) + amount
+        return self
+
+    def dates(self) -> List[str]:
+        return sorted(date for date in self._days if date is not None)
+
+    def day(self, date: str) -> "IngredientChecklist":
+        checklist = IngredientChecklist()
+        if date in self._days:
+            checklist._days[date] = dict(self._days[date])
+        return checklist
+
+    def totals(self) -> Dict[str, float]:
+        if len(self._days) == 1:
+            return dict(next(iter(self._days.values())))
+        totals: Dict[str, float] = {}
+        for amounts in self._days.values():
+            for ingredient, amount in amounts.items():
+                totals[ingredient] = totals.get(ingredient, 0.0) + amount
+        return totals
+
+    def to_records(self) -> List[Dict]:
+        """[{"Ingredient", "Total Amount (g)"}] sorted by amount, largest first."""
+        records = [
+            {"Ingredient": ingredient, "Total Amount (g)": round(amount, 2)}
+            for ingredient, amount in self.totals().items()
+            if round(amount, 2) > 0
+        ]
+        records.sort(key=lambda row: row["Total Amount (g)"], reverse=True)
+        return records
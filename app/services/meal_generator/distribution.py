@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ["Breakfast", "MorningSnacks", "Lunch", "EveningSnacks", "Dinner"]
+NUTRIENTS = ["calories", "protein", "carbs", "fiber", "fat"]
+# Daily total (key of MealGenerator._calculate_targets) each nutrient row distributes
+NUTRIENT_TOTALS = {"calories": "tdee", "protein": "protein", "carbs": "carbs", "fiber": "fiber", "fat": "fat"}
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "meal_distribution.json")
+
+
+class MealDistribution:
+    """
+    Per-plan shares of each daily nutrient target that go to each meal,
+    as one plan x nutrient x meal_type matrix. Splitting a day's targets
+    over the meals is a single multiply of a plan's (nutrient x meal)
+    slice by the nutrient totals.
+    """
+    __slots__ = ("plans", "default_plan", "matrix", "_index")
+
+    def __init__(self, plans: List[str], default_plan: str, matrix: np.ndarray):
+        self.plans = plans
+        self.default_plan = default_plan
+        self.matrix = matrix
+        self._index = {plan: i for i, plan in enumerate(plans)}
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "MealDistribution":
+        """Builds the matrix from a config (see data/meal_distribution.json); ValueError if it is invalid."""
+        if config.get("meal_types") != MEAL_TYPES:
+            raise ValueError(f"meal_types must be {MEAL_TYPES}")
+        if config.get("nutrients") != NUTRIENTS:
+            raise ValueError(f"nutrients must be {NUTRIENTS}")
+        plans_config = config.get("plans")
+        if not isinstance(plans_config, dict) or not plans_config:
+            raise ValueError("plans must map plan types to their distribution")
+        default_plan = config.get("default_plan")
+        if default_plan not in plans_config:
+            raise ValueError(f"default_plan {default_plan!r} is not one of the plans")
+
+        plans = list(plans_config)
+        matrix = np.zeros((len(plans), len(NUTRIENTS), len(MEAL_TYPES)))
+        for p, plan in enumerate(plans):
+            rows = plans_config[plan]
+            if not isinstance(rows, dict) or sorted(rows) != sorted(NUTRIENTS):
+                raise ValueError(f"{plan}: needs one row per nutrient {NUTRIENTS}")
+            for n, nutrient in enumerate(NUTRIENTS):
+                row = rows[nutrient]
+                if not isinstance(row, list) or len(row) != len(MEAL_TYPES) or not all(isinstance(v, (int, float)) for v in row):
+                    raise ValueError(f"{plan}.{nutrient}: needs {len(MEAL_TYPES)} numbers, one per meal type")
+                matrix[p, n] = row
+
+        if (matrix < 0).any() or (matrix > 1).any():
+            raise ValueError("every share must be between 0 and 1")
+        # Shares of a nutrient need not add up to exactly 1 (some plans keep
+        # a margin or allow a little over), but must stay near the daily target
+        sums = matrix.sum(axis=2)
+        low, high = settings.MEAL_DISTRIBUTION_MIN_SUM, settings.MEAL_DISTRIBUTION_MAX_SUM
+        for p, n in zip(*np.nonzero((sums < low - 1e-9) | (sums > high + 1e-9))):
+            raise ValueError(f"{plans[p]}.{NUTRIENTS[n]}: shares sum to {sums[p, n]:.3f}, outside [{low}, {high}]")
+        matrix.setflags(write=False)
+        return cls(plans, default_plan, matrix)
+
+    def to_config(self) -> Dict:
+        return {
+            "meal_types": MEAL_TYPES,
+            "nutrients": NUTRIENTS,
+            "default_plan": self.default_plan,
+            "plans": {
+                plan: {nutrient: self.matrix[p, n].tolist() for n, nutrient in enumerate(NUTRIENTS)}
+                for p, plan in enumerate(self.plans)
+            },
+        }
+
+    def split(self, plan: Optional[str], totals: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+        """
+        Per-meal targets {nutrient: {meal_type: value}} of one day's totals
+        (as returned by MealGenerator._calculate_targets). Unknown plans
+        use default_plan.
+        """
+        shares = self.matrix[self._index.get(plan, self._index[self.default_plan])]
+        daily = np.array([totals[NUTRIENT_TOTALS[nutrient]] for nutrient in NUTRIENTS], dtype=np.float64)
+        per_meal = daily[:, None] * shares
+        return {
+            nutrient: dict(zip(MEAL_TYPES, per_meal[n].tolist()))
+            for n, nutrient in enumerate(NUTRIENTS)
+        }
+
+
+def load_distribution(path: str) -> MealDistribution:
+    with open(path, encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"{path} is not valid JSON: {exc}") from exc
+    return MealDistribution.from_config(config)
+
+
+class MealDistributionStore:
+    """
+    The active MealDistribution, loaded from MEAL_DISTRIBUTION_PATH.
+
+    The file's mtime is checked at most every MEAL_DISTRIBUTION_CHECK_SECONDS
+    and a changed file is loaded again, so edits (by hand or through the
+    admin endpoint, in any worker) take effect without a restart. A file
+    that fails validation is logged and the previous distribution is kept.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._distribution: Optional[MealDistribution] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return self._path or settings.MEAL_DISTRIBUTION_PATH or DEFAULT_PATH
+
+    @property
+    def writable(self) -> bool:
+        """False for the packaged default file, which would be lost (or diverge per worker) on redeploy."""
+        return os.path.realpath(self.path) != os.path.realpath(DEFAULT_PATH)
+
+    def get(self) -> MealDistribution:
+        now = time.monotonic()
+        if self._distribution is None or now - self._checked_at >= settings.MEAL_DISTRIBUTION_CHECK_SECONDS:
+            with self._lock:
+                self._checked_at = now
+                try:
+                    mtime = os.stat(self.path).st_mtime
+                except OSError as exc:
+                    if self._distribution is None:
+                        raise
+                    logger.error(f"Meal distribution file unavailable, keeping the loaded one: {exc}")
+                    return self._distribution
+                if self._distribution is None or mtime != self._mtime:
+                    self._load(mtime)
+        return self._distribution
+
+    def _load(self, mtime: float):
+        try:
+            distribution = load_distribution(self.path)
+        except ValueError as exc:
+            self.last_error = str(exc)
+            if self._distribution is None:
+                raise
+            logger.error(f"Invalid meal distribution in {self.path}, keeping the loaded one: {exc}")
+            self._mtime = mtime  # don't retry until the file changes again
+            return
+        self._distribution = distribution
+        self._mtime = mtime
+        self.reloads += 1
+        self.last_error = None
+        logger.info(f"Meal distribution loaded from {self.path}: {len(distribution.plans)} plans")
+
+    def reload(self) -> MealDistribution:
+        """Loads the file now; ValueError (and the current distribution kept) if it is invalid."""
+        with self._lock:
+            distribution = load_distribution(self.path)
+            self._distribution = distribution
+            self._mtime = os.stat(self.path).st_mtime
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+            self.last_error = None
+            return distribution
+
+    def update(self, config: Dict) -> MealDistribution:
+        """
+        Validates a new config, then atomically replaces the file and
+        activates it. PermissionError for the packaged default file (see
+        writable); OSError if the file cannot be written.
+        """
+        if not self.writable:
+            raise PermissionError(f"{self.path} is the packaged default; set MEAL_DISTRIBUTION_PATH to a file outside the package")
+        distribution = MealDistribution.from_config(config)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(distribution.to_config(), f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.reload()
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "plans": self._distribution.plans if self._distribution is not None else [],
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+# Singleton instance
+meal_distribution = MealDistributionStore()
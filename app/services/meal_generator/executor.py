@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from .catalog import CatalogSnapshot, food_catalog
+from .meal_generator import meal_generator
+
+logger = logging.getLogger(__name__)
+
+# Catalog snapshot held by each pool worker process
+_worker_snapshot: Optional[CatalogSnapshot] = None
+
+
+def _init_worker(snapshot: CatalogSnapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _warm_worker() -> int:
+    return len(_worker_snapshot) if _worker_snapshot is not None else 0
+
+
+def _build_in_worker(version, user_data: Dict, templates: Dict[str, Optional[List[dict]]]) -> Dict:
+    if _worker_snapshot is None or _worker_snapshot.version != version:
+        raise RuntimeError("Worker catalog snapshot is out of date")
+    return meal_generator.build_meal_plan(user_data, _worker_snapshot, templates)
+
+
+class GenerationExecutor:
+    """
+    Runs the CPU-only part of plan generation (MealGenerator.build_meal_plan).
+
+    Modes, selected by GENERATION_EXECUTOR:
+      - "inline":  on the event loop
+      - "thread":  in the default thread pool, keeping the loop responsive
+      - "process": in a ProcessPoolExecutor whose workers hold the catalog
+                   snapshot, so generation scales with cores. The pool is
+                   recreated when the catalog version changes.
+    """
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._version = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def mode(self) -> str:
+        mode = settings.GENERATION_EXECUTOR
+        if mode not in self.MODES:
+            raise ValueError(f"GENERATION_EXECUTOR must be one of {self.MODES}, got {mode!r}")
+        return mode
+
+    @property
+    def workers(self) -> int:
+        return settings.GENERATION_WORKERS or os.cpu_count() or 1
+
+    async def start(self, session: AsyncSession):
+        """Start and warm the process pool with the current catalog (process mode only)."""
+        if self.mode != "process":
+            return
+        snapshot = await food_catalog.get_snapshot(session)
+        async with self._lock:
+            await self._start_pool(snapshot)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            self._version = None
+
+    async def generate_meal_plan(self, user_data: Dict, session: AsyncSession) -> Dict:
+        snapshot = await food_catalog.get_snapshot(session)
+        templates = await meal_generator.resolve_templates(user_data, session)
+        return await self.build_meal_plan(user_data, snapshot, templates)
+
+    async def build_meal_plan(self, user_data: Dict, snapshot: CatalogSnapshot, templates: Dict[str, Optional[List[dict]]]) -> Dict:
+        mode = self.mode
+        if mode == "inline":
+            return meal_generator.build_meal_plan(user_data, snapshot, templates)
+        if mode == "thread":
+            return await asyncio.to_thread(meal_generator.build_meal_plan, user_data, snapshot, templates)
+
+        if self._pool is None or self._version != snapshot.version:
+            async with self._lock:
+                if self._pool is None or self._version != snapshot.version:
+                    await self._start_pool(snapshot)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._pool, _build_in_worker, snapshot.version, user_data, templates
+            )
+        except BrokenProcessPool:
+            logger.error("Generation process pool broke, it will be restarted on the next call")
+            self._pool = None
+            self._version = None
+            raise
+
+    async def _start_pool(self, snapshot: CatalogSnapshot):
+        old_pool = self._pool
+        workers = self.workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(snapshot,),
+        )
+        self._version = snapshot.version
+
+        # One task per worker so every process is spawned and holds the snapshot
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_worker) for _ in range(workers)))
+        logger.info(f"Generation process pool started: {workers} workers, catalog version {snapshot.version}")
+
+        if old_pool is not None:
+            # In-flight plans on the old pool still complete
+            old_pool.shutdown(wait=False)
+
+
+# Singleton instance
+generation_executor = GenerationExecutor()
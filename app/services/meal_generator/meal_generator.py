@@ -2,19 +2,36 @@ import logging
 import random
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-import pandas as pd
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from pydantic import BaseModel
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.db_models import MealTemplate, FoodItem
-from .calculations import calculate_bmi, calculate_bmr, calculate_tdee, calculate_macronutrients
+from app.core.config import settings
+from .calculations import calculate_bmi, calculate_bmr, calculate_tdee, calculate_macronutrients, macro_split_key
+from .catalog import CatalogItem, CatalogSnapshot, food_catalog
+from .templates import meal_template_cache
+from .scoring import MIN_FACTOR, MAX_FACTOR, score_candidates, slot_targets, top_k
+from .optimizer import PlanOptimizer
+from .validation import PlanValidationIssue, PlanValidator
+from .checklist import IngredientChecklist
+from .distribution import MEAL_TYPES, meal_distribution
 
 logger = logging.getLogger(__name__)
 
+# Meal fields summed into the per-day nutrient totals stored with a plan
+DAILY_TOTAL_FIELDS = ["Total Calories", "Total Protein", "Total Carbs", "Total Fiber", "Total Fat"]
+
+# Map morning/evening snacks to Morning_Snack for DB querying
+MEAL_TIME_MAPPING = {
+    "Breakfast": "Breakfast",
+    "Lunch": "Lunch",
+    "Dinner": "Dinner",
+    "MorningSnacks": "Morning_Snack",
+    "EveningSnacks": "Morning_Snack",
+}
+
 class MealPlanTargets(BaseModel):
     """
     Container for all nutritional targets of a meal plan.
@@ -73,13 +90,14 @@ class MealGenerator:
         age = user_data["age"]
         gender = user_data["gender"]
         activity_level = user_data["activity_level"]
-        meal_plan_purchased = user_data.get("health_condition", "Healthy")
-        health_condition = user_data.get("health_condition")
+        health_condition, status = macro_split_key(
+            user_data.get("health_condition", "Healthy"), user_data.get("gym_goal"), user_data.get("diabetes_status")
+        )
 
         bmi = calculate_bmi(height, weight)
         bmr = calculate_bmr(gender, weight, height, age)
         tdee = calculate_tdee(bmr, activity_level)
-        protein, carbs, fiber, fat = calculate_macronutrients(tdee, meal_plan_purchased, health_condition)
+        protein, carbs, fiber, fat = calculate_macronutrients(tdee, health_condition, status)
 
         return {
             "bmi": bmi,
@@ -91,284 +109,294 @@ class MealGenerator:
             "fat": fat
         }
 
-    def _calculate_meal_targets(self, user_data: Dict, targets: Dict) -> Dict:
-        tdee = targets["tdee"]
-        plan = user_data.get("health_condition", "Healthy")
-        if plan == "Healthy":
-            return {
-                "Breakfast": tdee * 0.25,
-                "MorningSnacks": tdee * 0.05,
-                "Lunch": tdee * 0.30,
-                "EveningSnacks": tdee * 0.05,
-                "Dinner": tdee * 0.25,
-            }
-        elif plan == "Gym-Friendly":
-            return {
-                "Breakfast": tdee * 0.25,
-                "MorningSnacks": tdee * 0.05,
-                "Lunch": tdee * 0.35,
-                "EveningSnacks": tdee * 0.05,   
-                "Dinner": tdee * 0.30,
-            }
-        else:  # Diabetic-Friendly
-            return {
-                    "Breakfast": tdee * 0.25,
-                    "MorningSnacks": tdee * 0.05,
-                    "Lunch": tdee * 0.35,
-                    "EveningSnacks": tdee * 0.05,
-                    "Dinner": tdee * 0.30,
-            }
-
-    def _calculate_protein_targets(self, user_data: Dict, targets: Dict) -> Dict:
-        protein = targets["protein"]
-        plan = user_data.get("health_condition", "Healthy")
-        if plan == "Healthy":
-            return {
-                "Breakfast": protein * 0.25,
-                "MorningSnacks": protein * 0.10,
-                "Lunch": protein * 0.30,
-                "EveningSnacks": protein * 0.10,
-                "Dinner": protein * 0.25,
-            }
-        elif plan == "Gym-Friendly":
-            return {
-                "Breakfast": protein * 0.30,
-                "MorningSnacks": protein * 0.10,
-                "Lunch": protein * 0.25,
-                "EveningSnacks": protein * 0.10,
-                "Dinner": protein * 0.25,
-            }
-        else:  # Diabetic-Friendly
-            return {
-                "Breakfast": protein * 0.30,
-                "MorningSnacks": protein * 0.10,
-                "Lunch": protein * 0.25,
-                "EveningSnacks": protein * 0.10,
-                "Dinner": protein * 0.25,
-            }
-
-    def _calculate_carb_targets(self, user_data: Dict, targets: Dict) -> Dict:
-        carbs = targets["carbs"]
-        plan = user_data.get("health_condition", "Healthy")
-        if plan == "Healthy":
-            return {
-                "Breakfast": carbs * 0.25,
-                "MorningSnacks": carbs * 0.10,
-                "Lunch": carbs * 0.30,
-                "EveningSnacks": carbs * 0.10,
-                "Dinner": carbs * 0.25,
-            }
-        elif plan == "Gym-Friendly":
-            return {
-                    "Breakfast": carbs * 0.30,
-                "MorningSnacks": carbs * 0.10,
-                "Lunch": carbs * 0.25,
-                "EveningSnacks": carbs * 0.10,
-                "Dinner": carbs * 0.30,
-            }
-        else:  # Diabetic-Friendly
-            return {
-                "Breakfast": carbs * 0.30,
-                "MorningSnacks": carbs * 0.10,
-                "Lunch": carbs * 0.25,
-                "EveningSnacks": carbs * 0.10,
-                "Dinner": carbs * 0.30,
-            }
-
-    def _calculate_fiber_targets(self, user_data: Dict, targets: Dict) -> Dict:
-        fiber = targets["fiber"]
-        plan = user_data.get("health_condition", "Healthy")
-        if plan == "Healthy":
-            return {
-                "Breakfast": fiber * 0.25,
-                "MorningSnacks": fiber * 0.10,
-                "Lunch": fiber * 0.30,
-                "EveningSnacks": fiber * 0.10,
-                "Dinner": fiber * 0.25,
-            }
-        elif plan == "Gym-Friendly":
-            return {
-                "Breakfast": fiber * 0.30,
-                "MorningSnacks": fiber * 0.10,
-                "Lunch": fiber * 0.35,
-                "EveningSnacks": fiber * 0.10, 
-                "Dinner": fiber * 0.30,
-            }
-        else:  # Diabetic-Friendly
-            return {
-                "Breakfast": fiber * 0.30,
-                "MorningSnacks": fiber * 0.10,
-                "Lunch": fiber * 0.35,
-                "EveningSnacks": fiber * 0.10,
-                "Dinner": fiber * 0.30,
-            }
-
-    def _calculate_fat_targets(self, user_data: Dict, targets: Dict) -> Dict:
-        fat = targets["fat"]
-        plan = user_data.get("health_condition", "Healthy")
-        if plan == "Healthy":
-            return {
-                "Breakfast": fat * 0.25,
-                "MorningSnacks": fat * 0.10,
-                "Lunch": fat * 0.30,
-                "EveningSnacks": fat * 0.10,
-                "Dinner": fat * 0.25,
-            }
-        elif plan == "Gym-Friendly":
-            return {
-                "Breakfast": fat * 0.30,
-                "MorningSnacks": fat * 0.10,
-                "Lunch": fat * 0.35,
-                "EveningSnacks": fat * 0.10,
-                "Dinner": fat * 0.30, 
-            }
-        else:  # Diabetic-Friendly
-            return {
-                "Breakfast": fat * 0.25,
-                "MorningSnacks": fat * 0.10,
-                "Lunch": fat * 0.30,
-                "EveningSnacks": fat * 0.10,
-                "Dinner": fat * 0.25,
-            }
+    def _plan_keys(self, user_data: Dict):
+        """Returns the (region, diet_type, plan_type) a plan is generated for."""
+        region = user_data.get("region", "North")
+        raw_diet = user_data.get("diet", "Vegetarian")
+        diet_type = self._normalize_diet_label(raw_diet)
+        plan_type = user_data.get("health_condition", "Healthy")
+        return region, diet_type, plan_type
 
     async def generate_meal_plan(self, user_data: Dict, session: AsyncSession) -> Dict:
-        if "start_date" not in user_data:
-            user_data["start_date"] = datetime.now().strftime("%Y-%m-%d")
-            
+        snapshot = await food_catalog.get_snapshot(session)
+        templates = await self.resolve_templates(user_data, session)
+        return self.build_meal_plan(user_data, snapshot, templates)
+
+    async def resolve_templates(self, user_data: Dict, session: AsyncSession) -> Dict[str, Optional[List[dict]]]:
+        """Resolves the template slots for each meal type of the user's plan."""
+        region, diet_type, plan_type = self._plan_keys(user_data)
+
+        # Templates depend only on meal time, not on the day: resolve once per plan
+        templates = {}
+        for meal_type in MEAL_TYPES:
+            db_meal_time = MEAL_TIME_MAPPING.get(meal_type)
+            if not db_meal_time:
+                continue
+            templates[meal_type] = await meal_template_cache.resolve(
+                session, db_meal_time, region, diet_type, plan_type
+            )
+            if not templates[meal_type]:
+                logger.warning(f"No template found for {db_meal_time}, {diet_type}, {plan_type}")
+        return templates
+
+    def _build_context(self, user_data: Dict) -> MealPlanTargets:
         targets = self._calculate_targets(user_data)
-        ctx = MealPlanTargets(
+        per_meal = meal_distribution.get().split(user_data.get("health_condition", "Healthy"), targets)
+        return MealPlanTargets(
             targets=targets,
-            meal_targets=self._calculate_meal_targets(user_data, targets),
-            protein_targets=self._calculate_protein_targets(user_data, targets),
-            carb_targets=self._calculate_carb_targets(user_data, targets),
-            fiber_targets=self._calculate_fiber_targets(user_data, targets),
-            fat_targets=self._calculate_fat_targets(user_data, targets),
+            meal_targets=per_meal["calories"],
+            protein_targets=per_meal["protein"],
+            carb_targets=per_meal["carbs"],
+            fiber_targets=per_meal["fiber"],
+            fat_targets=per_meal["fat"],
             user_data=user_data
         )
 
-        meal_types = ["Breakfast", "MorningSnacks", "Lunch", "EveningSnacks", "Dinner"]
-        organized_meals = []
-        
-        start_date = datetime.strptime(user_data["start_date"], "%Y-%m-%d")
-        
-        region = user_data.get("region", "North")
-        raw_diet = user_data.get("diet", "Vegetarian")
-        diet_type = self._normalize_diet_label(raw_diet)
-        plan_type = user_data.get("health_condition", "Healthy")
+    def _slot_targets(self, ctx: MealPlanTargets, meal_type: str, cal_pct: float) -> np.ndarray:
+        """Target vector (calories, protein, carbs, fiber, fat) for one template slot."""
+        return slot_targets(
+            ctx.meal_targets[meal_type] * cal_pct,
+            ctx.protein_targets[meal_type] * cal_pct,
+            ctx.carb_targets[meal_type] * cal_pct,
+            ctx.fiber_targets[meal_type] * cal_pct,
+            ctx.fat_targets[meal_type] * cal_pct,
+        )
 
-        # Map morning/evening snacks to Morning_Snack for DB querying
-        meal_time_mapping = {
-            "Breakfast": "Breakfast",
-            "Lunch": "Lunch",
-            "Dinner": "Dinner",
-            "MorningSnacks": "Morning_Snack",
-            "EveningSnacks": "Morning_Snack",
+    def _serving_factor(self, food_item: CatalogItem, target_cal: float) -> float:
+        if food_item.cal_per_serving > 0:
+            factor = target_cal / food_item.cal_per_serving
+        else:
+            factor = 1.0
+        return max(MIN_FACTOR, min(MAX_FACTOR, factor))
+
+    def _make_meal_option(self, date_str: str, meal_type: str, diet_type: str, region: str, picks: List) -> Dict:
+        """Builds the stored meal dict from (food_item, factor) picks."""
+        meal_option = {
+            "Date": date_str,
+            "Meal Type": meal_type,
+            "Diet Type": diet_type,
+            "Region": region,
+            "Total Calories": 0.0,
+            "Total Protein": 0.0,
+            "Total Carbs": 0.0,
+            "Total Fiber": 0.0,
+            "Total Fat": 0.0,
+            "Menu Names": [],
+            "Food IDs": [],
+            "Ingredients Scaling": {},
         }
+        for food_item, factor in picks:
+            meal_option["Menu Names"].append(food_item.recipe_name)
+            meal_option["Food IDs"].append(food_item.id)
+            meal_option["Total Calories"] += food_item.cal_per_serving * factor
+            meal_option["Total Protein"] += food_item.protein_per_serving * factor
+            meal_option["Total Carbs"] += food_item.carbs_per_serving * factor
+            meal_option["Total Fiber"] += food_item.fiber_per_serving * factor
+            meal_option["Total Fat"] += food_item.fat_per_serving * factor
+
+            for ing in food_item.ingredients:
+                name = ing["name"]
+                amt = ing["amount_g"] * factor
+                meal_option["Ingredients Scaling"][name] = round(meal_option["Ingredients Scaling"].get(name, 0) + amt, 2)
+
+        meal_option["Menu Names"] = " + ".join(meal_option["Menu Names"])
+        meal_option["Total Calories"] = round(meal_option["Total Calories"], 2)
+        meal_option["Total Protein"] = round(meal_option["Total Protein"], 2)
+        meal_option["Total Carbs"] = round(meal_option["Total Carbs"], 2)
+        meal_option["Total Fiber"] = round(meal_option["Total Fiber"], 2)
+        meal_option["Total Fat"] = round(meal_option["Total Fat"], 2)
+        return meal_option
+
+    def _fill_meal(self, snapshot: CatalogSnapshot, ctx: MealPlanTargets, date_str: str, meal_type: str, slots: List[dict], used_food_ids: set) -> Optional[Dict]:
+        """
+        Fills one meal slot by slot (random mode). Returns None if a required
+        slot has no candidate. Chosen food ids are added to used_food_ids.
+        """
+        region, diet_type, plan_type = self._plan_keys(ctx.user_data)
+        db_meal_time = MEAL_TIME_MAPPING[meal_type]
+
+        picks = []
+        for slot in slots:
+            slot_type = slot["slot_type"]
+            required = slot.get("required", True)
+            cal_pct = slot["calorie_pct"]
+
+            targets_vec = self._slot_targets(ctx, meal_type, cal_pct)
+            food_item = self._find_food_item(
+                snapshot, slot_type, diet_type, region, db_meal_time, plan_type, used_food_ids, targets_vec
+            )
+            if not food_item:
+                if required:
+                    logger.warning(f"Required slot {slot_type} not found for {meal_type}")
+                    return None
+                continue
+
+            used_food_ids.add(food_item.id)
+            picks.append((food_item, self._serving_factor(food_item, ctx.meal_targets[meal_type] * cal_pct)))
+
+        if not picks:
+            return None
+        return self._make_meal_option(date_str, meal_type, diet_type, region, picks)
+
+    def build_meal_plan(self, user_data: Dict, snapshot: CatalogSnapshot, templates: Dict[str, Optional[List[dict]]], mode: Optional[str] = None) -> Dict:
+        """
+        CPU-only part of plan generation: fills every slot from the catalog
+        snapshot. Makes no database calls.
+
+        mode is "random" (top-k sampling per slot) or "optimized" (whole-week
+        search, see optimizer.py); defaults to MEAL_GENERATOR_MODE.
+        """
+        if "start_date" not in user_data:
+            user_data["start_date"] = datetime.now().strftime("%Y-%m-%d")
 
-        used_food_ids = set()
+        ctx = self._build_context(user_data)
+        start_date = datetime.strptime(user_data["start_date"], "%Y-%m-%d")
+        region, diet_type, plan_type = self._plan_keys(user_data)
+        dates = [(start_date + timedelta(days=day_offset)).strftime("%Y-%m-%d") for day_offset in range(7)]
 
-        for day_offset in range(7):
-            current_date = start_date + timedelta(days=day_offset)
-            date_str = current_date.strftime("%Y-%m-%d")
-
-            for meal_type in meal_types:
-                if meal_type not in ctx.meal_targets:
-                    continue
-                
-                db_meal_time = meal_time_mapping.get(meal_type)
-                if not db_meal_time:
-                    continue
-                
-                # Fetch Template
-                stmt = select(MealTemplate).where(
-                    MealTemplate.meal_time == db_meal_time,
-                    MealTemplate.region == region,
-                    MealTemplate.diet_type == diet_type,
-                    MealTemplate.plan_type == plan_type
-                )
-                result = await session.execute(stmt)
-                template = result.scalars().first()
-
-                if not template:
-                    stmt_fallback = select(MealTemplate).where(
-                        MealTemplate.meal_time == db_meal_time,
-                        MealTemplate.diet_type == diet_type,
-                        MealTemplate.plan_type == plan_type
-                    )
-                    result = await session.execute(stmt_fallback)
-                    template = result.scalars().first()
-
-                if not template:
-                    logger.warning(f"No template found for {db_meal_time}, {diet_type}, {plan_type}")
-                    continue
-
-                if True:  # single meal per day per meal_type
-                    meal_option = {
-                        "Date": date_str,
-                        "Meal Type": meal_type,
-                        "Diet Type": diet_type,
-                        "Region": region,
-                        "Total Calories": 0.0,
-                        "Total Protein": 0.0,
-                        "Total Carbs": 0.0,
-                        "Total Fiber": 0.0,
-                        "Total Fat": 0.0,
-                        "Menu Names": [],
-                        "Ingredients Scaling": {},
-                    }
-                    
-                    slot_failed = False
-                    for slot in template.slots:
-                        slot_type = slot["slot_type"]
-                        required = slot.get("required", True)
-                        cal_pct = slot["calorie_pct"]
-
-                        target_cal = ctx.meal_targets[meal_type] * cal_pct
-
-                        food_item = await self._find_food_item(
-                            session, slot_type, diet_type, region, db_meal_time, plan_type, used_food_ids
-                        )
-                        if not food_item:
-                            if required:
-                                logger.warning(f"Required slot {slot_type} not found for {meal_type}")
-                                slot_failed = True
-                                break
-                            else:
-                                continue
-                        
-                        used_food_ids.add(food_item.id)
-
-                        if float(food_item.cal_per_serving) > 0:
-                            factor = target_cal / float(food_item.cal_per_serving)
-                        else:
-                            factor = 1.0
-                        
-                        factor = max(0.5, min(3.0, factor))
-
-                        meal_option["Menu Names"].append(food_item.recipe_name)
-                        meal_option["Total Calories"] += float(food_item.cal_per_serving) * factor
-                        meal_option["Total Protein"] += float(food_item.protein_per_serving) * factor
-                        meal_option["Total Carbs"] += float(food_item.carbs_per_serving) * factor
-                        meal_option["Total Fiber"] += float(food_item.fiber_per_serving) * factor
-                        meal_option["Total Fat"] += float(food_item.fat_per_serving) * factor
-
-                        for ing in food_item.ingredients:
-                            name = ing["name"]
-                            amt = float(ing["amount_g"]) * factor
-                            meal_option["Ingredients Scaling"][name] = round(meal_option["Ingredients Scaling"].get(name, 0) + amt, 2)
-                    
-                    if not slot_failed and meal_option["Menu Names"]:
-                        meal_option["Menu Names"] = " + ".join(meal_option["Menu Names"])
-                        meal_option["Total Calories"] = round(meal_option["Total Calories"], 2)
-                        meal_option["Total Protein"] = round(meal_option["Total Protein"], 2)
-                        meal_option["Total Carbs"] = round(meal_option["Total Carbs"], 2)
-                        meal_option["Total Fiber"] = round(meal_option["Total Fiber"], 2)
-                        meal_option["Total Fat"] = round(meal_option["Total Fat"], 2)
-                        organized_meals.append(meal_option)
+        meal_slots = {
+            meal_type: templates.get(meal_type)
+            for meal_type in MEAL_TYPES
+            if meal_type in ctx.meal_targets and MEAL_TIME_MAPPING.get(meal_type) and templates.get(meal_type)
+        }
 
-        used_food_ids.clear()
+        mode = mode or settings.MEAL_GENERATOR_MODE
+        organized_meals = []
+        checklist = IngredientChecklist()
 
-        ingredient_checklist = self.generate_ingredient_checklist(organized_meals)
+        if mode == "optimized":
+            optimizer = PlanOptimizer(
+                snapshot,
+                time_budget_ms=settings.OPTIMIZER_TIME_BUDGET_MS,
+                repeat_window_days=settings.OPTIMIZER_REPEAT_WINDOW_DAYS,
+            )
+            assignment = optimizer.optimize(
+                ctx, meal_slots, MEAL_TIME_MAPPING, len(dates), region, diet_type, plan_type,
+                slot_targets=self._slot_targets,
+            )
+            for day_index, date_str in enumerate(dates):
+                for meal_type in MEAL_TYPES:
+                    picks = assignment.get((day_index, meal_type))
+                    if picks:
+                        meal_option = self._make_meal_option(date_str, meal_type, diet_type, region, picks)
+                        organized_meals.append(meal_option)
+                        checklist.add_meal(meal_option)
+                        ctx.meal_history[meal_type].update(food_item.id for food_item, _ in picks)
+        elif mode == "random":
+            used_food_ids = set()
+            for date_str in dates:
+                for meal_type, slots in meal_slots.items():
+                    meal_option = self._fill_meal(snapshot, ctx, date_str, meal_type, slots, used_food_ids)
+                    if meal_option:
+                        organized_meals.append(meal_option)
+                        checklist.add_meal(meal_option)
+        else:
+            raise ValueError(f"Unknown meal generator mode: {mode!r}")
+
+        return self._finalize_plan(organized_meals, checklist)
+
+    def _meal_food_ids(self, meal: Dict, snapshot: CatalogSnapshot) -> List[int]:
+        """Food ids of a stored meal; older plans only have Menu Names."""
+        if "Food IDs" in meal:
+            return list(meal["Food IDs"])
+        names = (meal.get("Menu Names") or "").split(" + ")
+        return [snapshot.ids_by_name[name] for name in names if name in snapshot.ids_by_name]
+
+    def regenerate_meals(self, user_data: Dict, meals: List[Dict], snapshot: CatalogSnapshot, templates: Dict[str, Optional[List[dict]]], date_str: str, meal_type: Optional[str] = None) -> Dict[int, Dict]:
+        """
+        Replaces the meals of one day (or a single meal of that day) in an
+        existing plan. Foods used anywhere in the plan, including the meals
+        being replaced, are avoided. Returns {index in meals: new meal}.
+        """
+        ctx = self._build_context(user_data)
+        used_food_ids = set()
+        for meal in meals:
+            used_food_ids.update(self._meal_food_ids(meal, snapshot))
+
+        replacements = {}
+        for index, meal in enumerate(meals):
+            if meal.get("Date") != date_str:
+                continue
+            if meal_type is not None and meal.get("Meal Type") != meal_type:
+                continue
+            slots = templates.get(meal.get("Meal Type"))
+            if not slots:
+                continue
+            new_meal = self._fill_meal(snapshot, ctx, date_str, meal["Meal Type"], slots, used_food_ids)
+            if new_meal:
+                replacements[index] = new_meal
+        return replacements
+
+    def refill_slots(self, user_data: Dict, meals: List[Dict], snapshot: CatalogSnapshot, templates: Dict[str, Optional[List[dict]]], slots: set):
+        """
+        Regenerates only the given (date, meal_type) slots of a plan,
+        dropping whatever meals currently occupy them.
+        Returns (meals in date/meal-type order, removed meals, added meals).
+        """
+        ctx = self._build_context(user_data)
+        used_food_ids = set()
+        for meal in meals:
+            used_food_ids.update(self._meal_food_ids(meal, snapshot))
+
+        kept = [m for m in meals if (m.get("Date"), m.get("Meal Type")) not in slots]
+        removed = [m for m in meals if (m.get("Date"), m.get("Meal Type")) in slots]
+        added = []
+        for date_str, meal_type in sorted(slots):
+            meal_slots = templates.get(meal_type)
+            if not meal_slots or meal_type not in ctx.meal_targets:
+                continue
+            new_meal = self._fill_meal(snapshot, ctx, date_str, meal_type, meal_slots, used_food_ids)
+            if new_meal:
+                added.append(new_meal)
+
+        order = {meal_type: i for i, meal_type in enumerate(MEAL_TYPES)}
+        merged = sorted(
+            kept + added,
+            key=lambda m: (m.get("Date") or "", order.get(m.get("Meal Type"), len(order))),
+        )
+        return merged, removed, added
+
+    def validate_plan(self, meals: List[Dict], checklist: List[Dict], user_data: Dict, snapshot: CatalogSnapshot) -> List[PlanValidationIssue]:
+        """Structured validation of a generated plan for this user (see validation.py)."""
+        ctx = self._build_context(user_data)
+        _, diet_type, _ = self._plan_keys(user_data)
+        validator = PlanValidator(
+            [meal_type for meal_type in MEAL_TYPES if meal_type in ctx.meal_targets],
+            calorie_band=(settings.PLAN_CALORIE_BAND_LOW, settings.PLAN_CALORIE_BAND_HIGH),
+        )
+        return validator.validate(meals, checklist, diet_type, user_data["start_date"], snapshot.items, ctx.meal_targets)
+
+    def patch_ingredient_checklist(self, checklist: List[Dict], removed_meals: List[Dict], added_meals: List[Dict]) -> List[Dict]:
+        """Applies the ingredient delta of replaced meals to an existing checklist."""
+        patched = IngredientChecklist.from_records(checklist)
+        for meal in removed_meals:
+            patched.remove_meal(meal)
+        for meal in added_meals:
+            patched.add_meal(meal)
+        return patched.to_records()
+
+    def daily_summaries(self, meals: List[Dict], checklist: Optional[IngredientChecklist] = None) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict[str, float]]]:
+        """
+        Per-date ingredient checklists and nutrient totals for the given
+        meals, as stored with a plan: ({date: records}, {date: totals}).
+        """
+        if checklist is None:
+            checklist = IngredientChecklist.from_meals(meals)
+        daily_totals: Dict[str, Dict[str, float]] = {}
+        for meal in meals:
+            date_str = meal.get("Date")
+            if not date_str:
+                continue
+            totals = daily_totals.setdefault(date_str, dict.fromkeys(DAILY_TOTAL_FIELDS, 0.0))
+            for field in DAILY_TOTAL_FIELDS:
+                totals[field] += float(meal.get(field) or 0.0)
+        for totals in daily_totals.values():
+            for field in DAILY_TOTAL_FIELDS:
+                totals[field] = round(totals[field], 2)
+        daily_checklists = {date_str: checklist.day(date_str).to_records() for date_str in daily_totals}
+        return daily_checklists, daily_totals
+
+    def _finalize_plan(self, organized_meals: List[Dict], checklist: IngredientChecklist) -> Dict:
 
         def convert_numpy(obj):
             if isinstance(obj, dict):
@@ -379,77 +407,25 @@ class MealGenerator:
                 return obj.item()
             return obj
 
-        checklist_records = (
-            ingredient_checklist.to_dict('records')
-            if hasattr(ingredient_checklist, 'to_dict')
-            else (ingredient_checklist if isinstance(ingredient_checklist, list) else [])
-        )
-
+        daily_checklists, daily_totals = self.daily_summaries(organized_meals, checklist)
         return convert_numpy({
             "meals": organized_meals,
-            "ingredient_checklist": checklist_records
+            "ingredient_checklist": checklist.to_records(),
+            "daily_checklists": daily_checklists,
+            "daily_totals": daily_totals,
         })
 
-    async def _find_food_item(self, session: AsyncSession, slot_type: str, diet_type: str, region: str, meal_time: str, plan_type: str, used_ids: set) -> Optional[FoodItem]:
-        # Try finding non-used items in preferred region
-        stmt = select(FoodItem).where(
-            FoodItem.slot_type == slot_type,
-            FoodItem.diet_type == diet_type,
-            FoodItem.region_tags.any(region),
-            FoodItem.meal_time_tags.any(meal_time),
-            FoodItem.plan_type_tags.any(plan_type)
-        )
-        if used_ids:
-            stmt = stmt.where(FoodItem.id.notin_(used_ids))
-        
-        result = await session.execute(stmt)
-        items = result.scalars().all()
-
-        if not items:
-            # Fallback 1: Ignore exact region, but exclude used_ids
-            stmt = select(FoodItem).where(
-                FoodItem.slot_type == slot_type,
-                FoodItem.diet_type == diet_type,
-                FoodItem.meal_time_tags.any(meal_time),
-                FoodItem.plan_type_tags.any(plan_type)
-            )
-            if used_ids:
-                stmt = stmt.where(FoodItem.id.notin_(used_ids))
-            result = await session.execute(stmt)
-            items = result.scalars().all()
-        
-        if not items:
-            # Fallback 2: Reset history constraints
-            stmt = select(FoodItem).where(
-                FoodItem.slot_type == slot_type,
-                FoodItem.diet_type == diet_type,
-            )
-            result = await session.execute(stmt)
-            items = result.scalars().all()
-
-        if items:
-            return random.choice(items)
-        return None
-
-    def generate_ingredient_checklist(self, meals):
-        all_ingredients = {}
-        for meal in meals:
-            ingredients_scaled = meal.get("Ingredients Scaling", {})
-            for ingredient, amount in ingredients_scaled.items():
-                if ingredient in all_ingredients:
-                    all_ingredients[ingredient] += amount
-                else:
-                    all_ingredients[ingredient] = amount
-
-        ingredients_df = pd.DataFrame([
-            {"Ingredient": k, "Total Amount (g)": round(v, 2)}
-            for k, v in all_ingredients.items()
-        ])
-
-        if ingredients_df.empty:
-            return pd.DataFrame()
-
-        return ingredients_df.sort_values("Total Amount (g)", ascending=False)
+    def _find_food_item(self, snapshot: CatalogSnapshot, slot_type: str, diet_type: str, region: str, meal_time: str, plan_type: str, used_ids: set, targets: np.ndarray) -> Optional[CatalogItem]:
+        rows = snapshot.candidate_rows(slot_type, diet_type, region, meal_time, plan_type, used_ids)
+        if not len(rows):
+            return None
+        # Score every candidate against the slot's macro targets, then pick among the best
+        scores = score_candidates(snapshot.nutrients, rows, targets)
+        best = top_k(rows, scores, settings.MEAL_SELECTION_TOP_K)
+        return snapshot.rows[random.choice(best)]
+
+    def generate_ingredient_checklist(self, meals: List[Dict]) -> List[Dict]:
+        return IngredientChecklist.from_meals(meals).to_records()
 
 # Singleton instance
 meal_generator = MealGenerator()
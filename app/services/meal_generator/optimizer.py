@@ -0,0 +1,214 @@
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .catalog import CAL, CatalogSnapshot
+from .scoring import SCORED_COLUMNS, scaling_factors, score_candidates
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of (calories, protein, carbs, fiber, fat) in the daily deviation
+DAILY_WEIGHTS = np.array([4.0, 1.0, 1.0, 0.5, 1.0])
+# Weight of the per-slot macro score relative to the daily deviation
+SLOT_WEIGHT = 0.1
+# Penalty for eating the same item twice inside the no-repeat window
+WINDOW_REPEAT_PENALTY = 1.0
+# Smaller penalty for any repeat within the week, to encourage variety
+WEEK_REPEAT_PENALTY = 0.05
+# Random noise added to greedy costs so equal profiles do not get identical plans
+GREEDY_NOISE = 0.02
+# Candidates kept per slot (best by slot score) for the search
+MAX_CANDIDATES = 25
+# Hard cap on local search moves, independent of the time budget
+MAX_MOVES = 20000
+# Stop early after this many consecutive rejected moves
+STALL_MOVES = 2000
+
+
+class _Slot:
+    __slots__ = ("meal_type", "rows", "scaled", "scores", "factors")
+
+    def __init__(self, meal_type, rows, scaled, scores, factors):
+        self.meal_type = meal_type
+        self.rows = rows
+        self.scaled = scaled
+        self.scores = scores
+        self.factors = factors
+
+
+class PlanOptimizer:
+    """
+    Assigns catalog items to every slot of a 7-day plan by minimizing
+
+        sum over days of the weighted squared relative deviation of daily
+        (calories, protein, carbs, fiber, fat) from the sum of meal targets
+      + SLOT_WEIGHT * per-slot macro scores
+      + repeat penalties (same item inside repeat_window_days, and any
+        repeat within the week; items in ctx.meal_history count as eaten
+        the day before the plan starts)
+
+    A greedy pass fills the plan, then random single-slot swaps are kept
+    when they lower the objective until the time budget runs out.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, time_budget_ms: int = 50, repeat_window_days: int = 3, rng: Optional[random.Random] = None):
+        self.snapshot = snapshot
+        self.time_budget = time_budget_ms / 1000.0
+        self.window = repeat_window_days
+        self.rng = rng or random.Random()
+
+    def optimize(
+        self,
+        ctx,
+        meal_slots: Dict[str, List[dict]],
+        meal_times: Dict[str, str],
+        days: int,
+        region: str,
+        diet_type: str,
+        plan_type: str,
+        slot_targets: Callable,
+    ) -> Dict[Tuple[int, str], List]:
+        """
+        Returns {(day_index, meal_type): [(food_item, factor), ...]} for every
+        meal that could be filled.
+        """
+        deadline = time.perf_counter() + self.time_budget
+        meal_plan_slots = self._prepare_slots(ctx, meal_slots, meal_times, region, diet_type, plan_type, slot_targets)
+
+        daily_target = np.zeros(len(SCORED_COLUMNS))
+        for meal_type in meal_plan_slots:
+            daily_target += slot_targets(ctx, meal_type, 1.0)
+        daily_target = np.maximum(daily_target, 1.0)
+
+        # positions[i] = (day, slot); choice[i] = index into slot.rows
+        positions: List[Tuple[int, _Slot]] = [
+            (day, slot) for day in range(days) for slot_list in meal_plan_slots.values() for slot in slot_list
+        ]
+        if not positions:
+            return {}
+
+        history = set()
+        for meal_type in meal_plan_slots:
+            history.update(ctx.meal_history.get(meal_type, set()))
+        uses: Dict[int, List[int]] = defaultdict(list)
+        for food_id in history:
+            uses[food_id].append(-1)
+
+        totals = np.zeros((days, len(SCORED_COLUMNS)))
+        choice = [0] * len(positions)
+
+        # Greedy: best slot score plus repeat cost given what is already chosen
+        for i, (day, slot) in enumerate(positions):
+            ids = self.snapshot.ids[slot.rows]
+            costs = SLOT_WEIGHT * slot.scores + np.fromiter(
+                (self._repeat_cost(uses, int(food_id), day) + GREEDY_NOISE * self.rng.random() for food_id in ids),
+                dtype=np.float64, count=len(ids),
+            )
+            best = int(np.argmin(costs))
+            choice[i] = best
+            uses[int(ids[best])].append(day)
+            totals[day] += slot.scaled[best]
+
+        initial = self._objective(totals, daily_target, positions, choice, uses)
+
+        # Local search: single-slot swaps that lower the objective
+        moves = 0
+        rejected = 0
+        while moves < MAX_MOVES and rejected < STALL_MOVES:
+            if moves % 32 == 0 and time.perf_counter() >= deadline:
+                break
+            moves += 1
+
+            i = self.rng.randrange(len(positions))
+            day, slot = positions[i]
+            if len(slot.rows) < 2:
+                rejected += 1
+                continue
+            new = self.rng.randrange(len(slot.rows) - 1)
+            old = choice[i]
+            if new >= old:
+                new += 1
+
+            old_id = int(self.snapshot.ids[slot.rows[old]])
+            new_id = int(self.snapshot.ids[slot.rows[new]])
+
+            new_day_total = totals[day] - slot.scaled[old] + slot.scaled[new]
+            delta = self._deviation(new_day_total, daily_target) - self._deviation(totals[day], daily_target)
+            delta += SLOT_WEIGHT * (slot.scores[new] - slot.scores[old])
+
+            uses[old_id].remove(day)
+            delta -= self._repeat_cost(uses, old_id, day)
+            delta += self._repeat_cost(uses, new_id, day)
+
+            if delta < -1e-9:
+                choice[i] = new
+                totals[day] = new_day_total
+                uses[new_id].append(day)
+                rejected = 0
+            else:
+                uses[old_id].append(day)
+                rejected += 1
+
+        final = self._objective(totals, daily_target, positions, choice, uses)
+        logger.debug(f"Plan optimizer: objective {initial:.4f} -> {final:.4f} in {moves} moves")
+
+        assignment: Dict[Tuple[int, str], List] = {}
+        for (day, slot), c in zip(positions, choice):
+            food_item = self.snapshot.rows[slot.rows[c]]
+            assignment.setdefault((day, slot.meal_type), []).append((food_item, float(slot.factors[c])))
+        return assignment
+
+    def _prepare_slots(self, ctx, meal_slots, meal_times, region, diet_type, plan_type, slot_targets) -> Dict[str, List[_Slot]]:
+        """Candidate rows, scaled nutrients and slot scores per template slot."""
+        prepared = {}
+        for meal_type, slots in meal_slots.items():
+            meal_time = meal_times[meal_type]
+            slot_list = []
+            feasible = True
+            for slot in slots:
+                rows = self.snapshot.candidate_rows(slot["slot_type"], diet_type, region, meal_time, plan_type, set())
+                if not len(rows):
+                    if slot.get("required", True):
+                        feasible = False
+                        break
+                    continue
+                targets = slot_targets(ctx, meal_type, slot["calorie_pct"])
+                scores = score_candidates(self.snapshot.nutrients, rows, targets).astype(np.float64)
+                if len(rows) > MAX_CANDIDATES:
+                    keep = np.argpartition(scores, MAX_CANDIDATES - 1)[:MAX_CANDIDATES]
+                    rows, scores = rows[keep], scores[keep]
+                factors = scaling_factors(self.snapshot.nutrients[rows, CAL], targets[0]).astype(np.float64)
+                scaled = self.snapshot.nutrients[rows][:, SCORED_COLUMNS].astype(np.float64) * factors[:, None]
+                slot_list.append(_Slot(meal_type, rows, scaled, scores, factors))
+            if feasible and slot_list:
+                prepared[meal_type] = slot_list
+            elif not feasible:
+                logger.warning(f"Required slot not found for {meal_type}, meal skipped")
+        return prepared
+
+    def _deviation(self, day_total: np.ndarray, daily_target: np.ndarray) -> float:
+        relative = (day_total - daily_target) / daily_target
+        return float(np.dot(relative * relative, DAILY_WEIGHTS))
+
+    def _repeat_cost(self, uses: Dict[int, List[int]], food_id: int, day: int) -> float:
+        """Cost of adding food_id on day, given its other uses."""
+        other_days = uses.get(food_id)
+        if not other_days:
+            return 0.0
+        in_window = sum(1 for d in other_days if abs(d - day) < self.window)
+        return WINDOW_REPEAT_PENALTY * in_window + WEEK_REPEAT_PENALTY * len(other_days)
+
+    def _objective(self, totals, daily_target, positions, choice, uses) -> float:
+        value = sum(self._deviation(day_total, daily_target) for day_total in totals)
+        value += SLOT_WEIGHT * sum(slot.scores[c] for (_, slot), c in zip(positions, choice))
+        for food_id, days in uses.items():
+            for j, day in enumerate(days):
+                value += sum(
+                    WINDOW_REPEAT_PENALTY * (abs(d - day) < self.window) + WEEK_REPEAT_PENALTY
+                    for d in days[:j]
+                )
+        return value
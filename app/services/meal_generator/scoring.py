@@ -0,0 +1,44 @@
+import numpy as np
+
+from .catalog import CAL, PROTEIN, CARBS, FIBER, FAT
+
+# Bounds on how far a serving may be scaled to hit its calorie share
+MIN_FACTOR = 0.5
+MAX_FACTOR = 3.0
+
+# Catalog columns compared against a slot target vector, in target order:
+# (calories, protein, carbs, fiber, fat)
+SCORED_COLUMNS = [CAL, PROTEIN, CARBS, FIBER, FAT]
+SCORE_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+
+
+def slot_targets(calories: float, protein: float, carbs: float, fiber: float, fat: float) -> np.ndarray:
+    return np.array([calories, protein, carbs, fiber, fat], dtype=np.float32)
+
+
+def scaling_factors(cal: np.ndarray, target_cal: float) -> np.ndarray:
+    """Serving multipliers that bring each candidate to target_cal, clamped."""
+    positive = cal > 0
+    factors = np.where(positive, target_cal / np.where(positive, cal, 1.0), 1.0)
+    return np.clip(factors, MIN_FACTOR, MAX_FACTOR)
+
+
+def score_candidates(nutrients: np.ndarray, rows: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Scores candidate rows against a slot target vector in one pass.
+
+    Each candidate is scaled to the calorie target first; the score is the
+    weighted sum of squared relative deviations of the scaled nutrients.
+    Lower is better.
+    """
+    block = nutrients[rows][:, SCORED_COLUMNS]
+    scaled = block * scaling_factors(block[:, 0], targets[0])[:, None]
+    deviation = (scaled - targets) / np.maximum(targets, 1.0)
+    return (deviation * deviation) @ SCORE_WEIGHTS
+
+
+def top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """The k best-scoring rows (unordered)."""
+    if k <= 0 or len(rows) <= k:
+        return rows
+    return rows[np.argpartition(scores, k - 1)[:k]]
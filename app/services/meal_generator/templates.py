@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.db_models import MealTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class MealTemplateCache:
+    """
+    Caches resolved meal templates keyed by (meal_time, region, diet_type, plan_type).
+
+    The whole meal_templates table (~144 rows) is loaded in one query and the
+    region fallback chain is resolved at load time, so a lookup is a single
+    dict access. The cache is dropped whenever a MealTemplate is written
+    through the ORM in this process, or explicitly via reload(), and the
+    table is read again once the cache is older than TEMPLATE_REFRESH_SECONDS,
+    so edits from other processes or raw SQL are picked up too.
+    """
+    def __init__(self):
+        self._exact: Optional[Dict[Tuple[str, str, str, str], List[dict]]] = None
+        self._fallback: Dict[Tuple[str, str, str], List[dict]] = {}
+        self._loaded_at: float = float("-inf")
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._exact is not None
+
+    def invalidate(self):
+        self._exact = None
+        self._fallback = {}
+
+    async def reload(self, session: AsyncSession) -> int:
+        """Drops the cache and loads it again. Returns the number of templates."""
+        async with self._lock:
+            self.invalidate()
+            await self._load(session)
+            return len(self._exact)
+
+    async def resolve(self, session: AsyncSession, meal_time: str, region: str, diet_type: str, plan_type: str) -> Optional[List[dict]]:
+        """
+        Returns the slot list of the template for the given key, falling back
+        to any region for the same meal time, diet and plan. None if no
+        template matches.
+        """
+        if self._exact is None or self._is_stale():
+            async with self._lock:
+                if self._exact is None or self._is_stale():
+                    await self._load(session)
+
+        slots = self._exact.get((meal_time, region, diet_type, plan_type))
+        if slots is None:
+            slots = self._fallback.get((meal_time, diet_type, plan_type))
+        return slots
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= settings.TEMPLATE_REFRESH_SECONDS
+
+    async def _load(self, session: AsyncSession):
+        stmt = select(
+            MealTemplate.meal_time,
+            MealTemplate.region,
+            MealTemplate.diet_type,
+            MealTemplate.plan_type,
+            MealTemplate.slots,
+        ).order_by(MealTemplate.id)
+        result = await session.execute(stmt)
+
+        exact = {}
+        fallback = {}
+        for meal_time, region, diet_type, plan_type, slots in result.all():
+            exact[(meal_time, region, diet_type, plan_type)] = slots
+            # First template (by id) of any region is the fallback for the group
+            fallback.setdefault((meal_time, diet_type, plan_type), slots)
+
+        self._fallback = fallback
+        self._exact = exact
+        self._loaded_at = time.monotonic()
+        logger.info(f"Meal template cache loaded: {len(exact)} templates")
+
+
+# Singleton instance
+meal_template_cache = MealTemplateCache()
+
+
+@event.listens_for(MealTemplate, "after_insert")
+@event.listens_for(MealTemplate, "after_update")
+@event.listens_for(MealTemplate, "after_delete")
+def _invalidate_template_cache(mapper, connection, target):
+    meal_template_cache.invalidate()
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .catalog import CatalogItem
+
+
+class ValidationCode(str, Enum):
+    MISSING_DATE = "missing_date"
+    DATE_OUT_OF_RANGE = "date_out_of_range"
+    MISSING_MEAL = "missing_meal"
+    DUPLICATE_MEAL = "duplicate_meal"
+    DIET_MISMATCH = "diet_mismatch"
+    CALORIES_OUT_OF_BAND = "calories_out_of_band"
+    EMPTY_CHECKLIST = "empty_checklist"
+
+
+class Severity(str, Enum):
+    ERROR = "error"        # plan must not be stored
+    WARNING = "warning"    # worth retrying, acceptable if retries run out
+
+
+SEVERITY = {
+    ValidationCode.MISSING_DATE: Severity.ERROR,
+    ValidationCode.DATE_OUT_OF_RANGE: Severity.ERROR,
+    ValidationCode.MISSING_MEAL: Severity.ERROR,
+    ValidationCode.DUPLICATE_MEAL: Severity.ERROR,
+    ValidationCode.DIET_MISMATCH: Severity.ERROR,
+    ValidationCode.CALORIES_OUT_OF_BAND: Severity.WARNING,
+    ValidationCode.EMPTY_CHECKLIST: Severity.ERROR,
+}
+
+
+class PlanValidationIssue(BaseModel):
+    """One validation failure. date/meal_type are set when it concerns a single slot."""
+    code: ValidationCode
+    message: str
+    date: Optional[str] = None
+    meal_type: Optional[str] = None
+
+    @property
+    def severity(self) -> Severity:
+        return SEVERITY[self.code]
+
+    @property
+    def slot(self) -> Optional[Tuple[str, str]]:
+        if self.date and self.meal_type:
+            return self.date, self.meal_type
+        return None
+
+
+class PlanValidator:
+    """
+    Validates a generated plan: meal grid (one meal per date and meal
+    type), dates, the diet type of each meal's foods (looked up by Food ID
+    in the catalog), and calories per meal against a tolerance band
+    around the meal target.
+    """
+    def __init__(self, meal_types: List[str], days: int = 7, calorie_band: Tuple[float, float] = (0.5, 1.5)):
+        self.meal_types = meal_types
+        self.days = days
+        self.calorie_band = calorie_band
+
+    def validate(
+        self,
+        meals: List[Dict],
+        checklist: List[Dict],
+        diet_type: str,
+        start_date: str,
+        foods: Mapping[int, CatalogItem],
+        meal_targets: Optional[Dict[str, float]] = None,
+    ) -> List[PlanValidationIssue]:
+        issues: List[PlanValidationIssue] = []
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(self.days)]
+        valid_dates = set(dates)
+        low, high = self.calorie_band
+
+        seen = set()
+        for index, meal in enumerate(meals):
+            date = meal.get("Date")
+            meal_type = meal.get("Meal Type")
+            if not date:
+                issues.append(PlanValidationIssue(
+                    code=ValidationCode.MISSING_DATE,
+                    message=f"Meal at index {index} is missing the 'Date' field",
+                ))
+                continue
+            if date not in valid_dates:
+                issues.append(PlanValidationIssue(
+                    code=ValidationCode.DATE_OUT_OF_RANGE,
+                    message=f"Meal at index {index} has date {date} outside the plan",
+                    date=date, meal_type=meal_type,
+                ))
+                continue
+            if (date, meal_type) in seen:
+                issues.append(PlanValidationIssue(
+                    code=ValidationCode.DUPLICATE_MEAL,
+                    message=f"More than one {meal_type} on {date}",
+                    date=date, meal_type=meal_type,
+                ))
+                continue
+            seen.add((date, meal_type))
+
+            # The meal's own "Diet Type" is stamped with the requested diet, so check the foods
+            wrong = sorted({
+                foods[food_id].recipe_name
+                for food_id in meal.get("Food IDs") or []
+                if food_id in foods and foods[food_id].diet_type != diet_type
+            })
+            if wrong:
+                issues.append(PlanValidationIssue(
+                    code=ValidationCode.DIET_MISMATCH,
+                    message=f"{meal_type} on {date} has foods that are not {diet_type!r}: {', '.join(wrong)}",
+                    date=date, meal_type=meal_type,
+                ))
+
+            target = (meal_targets or {}).get(meal_type)
+            calories = meal.get("Total Calories")
+            if target and calories is not None and not (low * target <= calories <= high * target):
+                issues.append(PlanValidationIssue(
+                    code=ValidationCode.CALORIES_OUT_OF_BAND,
+                    message=f"{meal_type} on {date} has {calories} kcal, target {round(target, 2)}",
+                    date=date, meal_type=meal_type,
+                ))
+
+        for date in dates:
+            for meal_type in self.meal_types:
+                if (date, meal_type) not in seen:
+                    issues.append(PlanValidationIssue(
+                        code=ValidationCode.MISSING_MEAL,
+                        message=f"No {meal_type} on {date}",
+                        date=date, meal_type=meal_type,
+                    ))
+
+        if not checklist:
+            issues.append(PlanValidationIssue(
+                code=ValidationCode.EMPTY_CHECKLIST,
+                message="ingredient_checklist is empty",
+            ))
+
+        return issues
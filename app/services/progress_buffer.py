@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class ProgressWriteBuffer:
+    """
+    Optional in-process write-behind buffer for high-frequency progress
+    events (steps, water), enabled with PROGRESS_WRITE_BUFFER.
+
+    Events of one user and type inside the same PROGRESS_BUFFER_INTERVAL_SECONDS
+    window are coalesced into a single event (amounts summed, latest
+    timestamp kept, coalesced_events counting the originals). Buffered
+    events are written in bulk every PROGRESS_BUFFER_FLUSH_SECONDS, as soon
+    as PROGRESS_BUFFER_MAX_EVENTS are buffered, and on shutdown.
+
+    Each coalesced event gets its _id when it is created, and a failed
+    flush keeps its events unchanged (not merged with newer ones) for the
+    next attempt. The writer stores events idempotently by _id, so a retry
+    after a partial write neither duplicates events nor recounts rollups.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, str, int], Dict] = {}
+        self._retry: List[Dict] = []  # events of failed flushes, resent as they are
+        self._buffered_events = 0
+        self._retry_events = 0
+        self._writer: Optional[Callable[[List[Dict]], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+        self.flush_failures = 0
+        self.flushed_events = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PROGRESS_WRITE_BUFFER and self._writer is not None
+
+    async def start(self, writer: Callable[[List[Dict]], Awaitable[None]]):
+        """Start periodic flushing through writer(events)."""
+        if not settings.PROGRESS_WRITE_BUFFER:
+            return
+        self._writer = writer
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic flushing and write everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._early_flush is not None:
+            await asyncio.gather(self._early_flush, return_exceptions=True)
+            self._early_flush = None
+        if self._writer is not None:
+            await self.flush()
+            if self._pending or self._retry:
+                logger.error(f"{self._buffered_events + self._retry_events} buffered progress events could not be written at shutdown")
+        self._writer = None
+
+    async def add(self, user_id: str, log_type: str, field: str, amount: float, timestamp: datetime):
+        interval = int((timestamp - _EPOCH).total_seconds() // settings.PROGRESS_BUFFER_INTERVAL_SECONDS)
+        key = (user_id, log_type, interval)
+        event = self._pending.get(key)
+        if event is None:
+            self._pending[key] = {
+                "_id": ObjectId(),
+                "user_id": user_id,
+                "type": log_type,
+                "data": {field: amount},
+                "timestamp": timestamp,
+                "coalesced_events": 1,
+            }
+        else:
+            event["data"][field] += amount
+            event["timestamp"] = max(event["timestamp"], timestamp)
+            event["coalesced_events"] += 1
+        self._buffered_events += 1
+        if self._buffered_events >= settings.PROGRESS_BUFFER_MAX_EVENTS and (self._early_flush is None or self._early_flush.done()):
+            # Referenced until done, so the task cannot be garbage-collected mid-flush
+            self._early_flush = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Write buffered events; returns how many coalesced events were written."""
+        async with self._flush_lock:
+            if not (self._pending or self._retry) or self._writer is None:
+                return 0
+            events = self._retry + list(self._pending.values())
+            buffered = self._retry_events + self._buffered_events
+            self._pending, self._buffered_events = {}, 0
+            self._retry, self._retry_events = [], 0
+            started = time.perf_counter()
+            try:
+                await self._writer(events)
+            except Exception as exc:
+                self.flush_failures += 1
+                logger.error(f"Progress buffer flush of {len(events)} events failed: {exc}")
+                self._retry, self._retry_events = events, buffered
+                return 0
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.flushed_events += len(events)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+            return len(events)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.PROGRESS_BUFFER_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.error(f"Progress buffer flush loop error: {exc}")
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "buffered_events": self._buffered_events + self._retry_events,
+            "pending_writes": len(self._pending) + len(self._retry),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "flushed_events": self.flushed_events,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
+
+
+# Singleton instance
+progress_buffer = ProgressWriteBuffer()
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ..core.config import settings
+from ..core.exceptions import InvalidCursorException
+from ..schemas.progress import ActivityLogCreate, MealLogCreate, StepsLogCreate, WaterLogCreate, WeightLogCreate
+from .progress_service import decode_cursor, encode_cursor, progress_service
+
+# CSV columns: event fields, then the union of the data fields of every log type
+DATA_FIELDS = list(dict.fromkeys(
+    field
+    for schema in (MealLogCreate, WaterLogCreate, StepsLogCreate, WeightLogCreate, ActivityLogCreate)
+    for field in schema.model_fields
+))
+CSV_COLUMNS = ["timestamp", "type", *DATA_FIELDS, "id", "cursor"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_row(event: Dict) -> Dict:
+    """Flat, JSON-safe form of an event; cursor resumes the export after it."""
+    return {
+        "timestamp": event["timestamp"].isoformat(),
+        "type": event["type"],
+        "data": event.get("data", {}),
+        "id": str(event["_id"]),
+        "cursor": encode_cursor(event),
+    }
+
+
+async def _chunks(events: AsyncIterator[Dict]) -> AsyncIterator[List[Dict]]:
+    """Rows grouped by cursor batch, so each write carries one batch instead of one event."""
+    chunk = []
+    async for event in events:
+        chunk.append(export_row(event))
+        if len(chunk) >= settings.PROGRESS_EXPORT_BATCH_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def ndjson_stream(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    async for chunk in _chunks(events):
+        yield "".join(json.dumps(row, default=str) + "\n" for row in chunk)
+
+
+async def csv_stream(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    async for chunk in _chunks(events):
+        for row in chunk:
+            writer.writerow({**row.pop("data"), **row})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_progress(
+    user_id: str,
+    db: AsyncIOMotorDatabase,
+    export_format: str = "ndjson",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    types: Optional[List[str]] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Streams a user's raw progress events from start to end (inclusive
+    dates), oldest first, as NDJSON or CSV. Every row carries a cursor;
+    passing the last one received as after resumes an interrupted export.
+    """
+    if after is not None:
+        try:
+            decode_cursor(after)
+        except ValueError:
+            raise InvalidCursorException()
+    events = progress_service.iter_events(
+        user_id,
+        db,
+        start=datetime.combine(start, datetime.min.time()) if start else None,
+        end=datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None,
+        types=types,
+        after=after,
+        limit=limit,
+    )
+    stream = csv_stream(events) if export_format == "csv" else ndjson_stream(events)
+    filename = f"progress-{user_id}.{export_format}"
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
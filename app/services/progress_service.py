@@ -1,79 +1,550 @@
-from datetime import datetime
-from typing import List, Optional
+import base64
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from fastapi import Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pydantic import TypeAdapter, ValidationError
+from pymongo import UpdateOne
+
+from ..core.config import settings
+from ..schemas.progress import ProgressBatchEntry, ProgressBatchItemResult, ProgressBatchResponse
+from .progress_buffer import progress_buffer
+from ..core.database import get_database
+from ..models.user import UserProfile
+from .user_service import get_current_user, user_service
+
+_batch_entry_adapter = TypeAdapter(ProgressBatchEntry)
+# Client timestamps further ahead than this are rejected
+MAX_CLOCK_SKEW = timedelta(days=1)
+
+# Counters kept in each per-user-per-day rollup document
+ROLLUP_COUNTERS = [
+    "calories", "protein", "carbs", "fat", "meals_logged",
+    "water_glasses", "steps", "calories_burned",
+]
+
+
+# Rollup fields returned to readers (event_ids only guards against double counting)
+ROLLUP_PROJECTION = {"_id": 0, "event_ids": 0}
+
+
+def day_key(timestamp: datetime) -> str:
+    """Rollup day of an event (UTC date, as the events are stored)."""
+    return timestamp.strftime("%Y-%m-%d")
+
+
+def empty_rollup(user_id: str, date: str) -> Dict:
+    return {"user_id": user_id, "date": date, **dict.fromkeys(ROLLUP_COUNTERS, 0), "last_weight": None, "last_weight_at": None}
+
+
+def to_timeseries(event: Dict) -> Dict:
+    """Event as stored in the time-series collection: user_id and type move into the metaField."""
+    doc = {key: value for key, value in event.items() if key not in ("user_id", "type")}
+    doc["meta"] = {"user_id": event["user_id"], "type": event["type"]}
+    return doc
+
+
+def from_timeseries(doc: Dict) -> Dict:
+    event = {key: value for key, value in doc.items() if key != "meta"}
+    event.update(doc.get("meta", {}))
+    return event
+
+
+def ingest_event_id(user_id: str, idempotency_key: str) -> ObjectId:
+    """_id of a batch-ingested event: the same entry always maps to the same document."""
+    return ObjectId(hashlib.sha256(f"{user_id}\x00{idempotency_key}".encode()).digest()[:12])
+
+
+def encode_cursor(event: Dict) -> str:
+    """Continuation token pointing just after an event (timestamp, then _id order)."""
+    raw = f"{event['timestamp'].isoformat()}|{event['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_cursor; ValueError if the token is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        timestamp, _id = raw.split("|")
+        return datetime.fromisoformat(timestamp), ObjectId(_id)
+    except Exception as exc:
+        raise ValueError(f"invalid cursor {token!r}") from exc
+
 
 class ProgressService:
+    """
+    Progress events are stored raw in "progress" (kept for audit) and folded
+    into one summary document per user and day in "progress_daily", which
+    the today/weekly views read instead of the events.
+
+    With PROGRESS_TIMESERIES the raw events go to a MongoDB time-series
+    collection instead, with {user_id, type} as metaField; callers still
+    see flat events, the storage shape is handled here.
+    """
     def __init__(self):
         self.collection_name = "progress"
+        self.timeseries_collection_name = settings.PROGRESS_TIMESERIES_COLLECTION
+        self.rollup_collection_name = "progress_daily"
+
+    @property
+    def timeseries(self) -> bool:
+        return settings.PROGRESS_TIMESERIES
+
+    @property
+    def events_collection_name(self) -> str:
+        return self.timeseries_collection_name if self.timeseries else self.collection_name
 
     def get_collection(self, db: AsyncIOMotorDatabase):
-        return db[self.collection_name]
+        return db[self.events_collection_name]
 
-    async def log_meal(self, user_id: str, meal_data: dict, db: AsyncIOMotorDatabase):
-        collection = self.get_collection(db)
-        log_entry = {
-            "user_id": user_id,
-            "type": "meal",
-            "data": meal_data,
-            "timestamp": datetime.utcnow()
-        }
-        await collection.insert_one(log_entry)
+    def timeseries_options(self) -> Dict:
+        # Each (user, type) series gets a few events per day, so "hours"
+        # buckets (up to 30 days each) keep buckets full instead of creating
+        # one mostly empty bucket per event
+        options = {"timeField": "timestamp", "metaField": "meta"}
+        if settings.PROGRESS_TIMESERIES_BUCKET_SECONDS:
+            options["bucketMaxSpanSeconds"] = settings.PROGRESS_TIMESERIES_BUCKET_SECONDS
+            options["bucketRoundingSeconds"] = settings.PROGRESS_TIMESERIES_BUCKET_SECONDS
+        else:
+            options["granularity"] = settings.PROGRESS_TIMESERIES_GRANULARITY
+        return options
+
+    async def ensure_timeseries_collection(self, db: AsyncIOMotorDatabase) -> bool:
+        """
+        Create the time-series collection if it does not exist yet; must run
+        before its indexes are ensured, which would otherwise create a
+        regular collection. Returns True if it was created.
+        """
+        name = self.timeseries_collection_name
+        if await db.list_collection_names(filter={"name": name}):
+            if not await db.list_collection_names(filter={"name": name, "type": "timeseries"}):
+                raise RuntimeError(f"Collection {name} exists but is not a time-series collection")
+            return False
+        await db.create_collection(name, timeseries=self.timeseries_options())
         return True
 
-    async def log_water(self, user_id: str, glasses: int, db: AsyncIOMotorDatabase):
-        collection = self.get_collection(db)
+    def event_filter(self, user_id: str, log_type: Optional[Union[str, List[str]]] = None) -> Dict:
+        prefix = "meta." if self.timeseries else ""
+        query = {f"{prefix}user_id": user_id}
+        if isinstance(log_type, list):
+            query[f"{prefix}type"] = {"$in": log_type}
+        elif log_type is not None:
+            query[f"{prefix}type"] = log_type
+        return query
+
+    def _to_storage(self, event: Dict) -> Dict:
+        return to_timeseries(event) if self.timeseries else event
+
+    def _from_storage(self, doc: Optional[Dict]) -> Optional[Dict]:
+        return from_timeseries(doc) if doc is not None and self.timeseries else doc
+
+    async def find_events(self, user_id: str, start: datetime, end: datetime, db: AsyncIOMotorDatabase, log_type: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Raw events in [start, end], oldest first."""
+        cursor = self.get_collection(db).find(
+            {**self.event_filter(user_id, log_type), "timestamp": {"$gte": start, "$lte": end}},
+            sort=[("timestamp", 1)],
+        )
+        return [self._from_storage(doc) for doc in await cursor.to_list(length=limit)]
+
+    async def iter_events(
+        self,
+        user_id: str,
+        db: AsyncIOMotorDatabase,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        types: Optional[List[str]] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Raw events in [start, end) in (timestamp, _id) order, fetched from
+        the cursor PROGRESS_EXPORT_BATCH_SIZE at a time so a long history
+        is never held in memory. after is a continuation token
+        (encode_cursor of the last event received).
+        """
+        query = self.event_filter(user_id, types or None)
+        time_range = {}
+        if start is not None:
+            time_range["$gte"] = start
+        if end is not None:
+            time_range["$lt"] = end
+        if time_range:
+            query["timestamp"] = time_range
+        if after is not None:
+            at, last_id = decode_cursor(after)
+            query["$or"] = [{"timestamp": {"$gt": at}}, {"timestamp": at, "_id": {"$gt": last_id}}]
+        cursor = self.get_collection(db).find(
+            query, sort=[("timestamp", 1), ("_id", 1)], batch_size=settings.PROGRESS_EXPORT_BATCH_SIZE
+        )
+        if limit:
+            cursor = cursor.limit(limit)
+        async for doc in cursor:
+            yield self._from_storage(doc)
+
+    async def seed_current_weight(self, user: UserProfile, db: AsyncIOMotorDatabase) -> UserProfile:
+        """
+        current_weight for a user who has none yet (weights logged before it
+        was kept on the user): the latest logged weight, else the profile
+        weight, is stored once and returned on a copy of the user.
+        """
+        if user.weight_updated_at is not None:
+            return user
+        event = await self.latest_event(str(user.id), "weight", db)
+        if event is not None and event["data"].get("weight") is not None:
+            weight, at = event["data"]["weight"], event["timestamp"]
+        else:
+            weight, at = user.weight, user.updated_at
+        if not await user_service.set_current_weight(str(user.id), weight, at, db):
+            # Set concurrently (a weight logged meanwhile): read what was stored
+            stored = await user_service.get_user_by_id(str(user.id), db)
+            return stored.profile() if stored is not None else user
+        return user.model_copy(update={"current_weight": weight, "weight_updated_at": at})
+
+    async def latest_event(self, user_id: str, log_type: str, db: AsyncIOMotorDatabase) -> Optional[Dict]:
+        doc = await self.get_collection(db).find_one(self.event_filter(user_id, log_type), sort=[("timestamp", -1)])
+        return self._from_storage(doc)
+
+    def get_rollup_collection(self, db: AsyncIOMotorDatabase):
+        return db[self.rollup_collection_name]
+
+    def rollup_update(self, log_type: str, data: dict, timestamp: datetime, event_id: Optional[ObjectId] = None) -> Optional[List[Dict]]:
+        """
+        Update (pipeline form) that folds one event into its day's rollup.
+        Weight only replaces last_weight when the event is the newest seen.
+        With event_id, the update is applied at most once: the id is recorded
+        in the day's event_ids and a repeated update leaves the day as is.
+        """
+        inc = {}
+        if log_type == "meal":
+            inc = {
+                "calories": data.get("calories") or 0,
+                "protein": data.get("protein") or 0,
+                "carbs": data.get("carbs") or 0,
+                "fat": data.get("fat") or 0,
+                "meals_logged": 1,
+            }
+        elif log_type == "water":
+            inc = {"water_glasses": data.get("glasses") or 0}
+        elif log_type == "steps":
+            inc = {"steps": data.get("steps") or 0}
+        elif log_type == "activity":
+            inc = {"steps": data.get("steps") or 0, "calories_burned": data.get("calories_burned") or 0}
+
+        fields = {field: {"$add": [{"$ifNull": [f"${field}", 0]}, amount]} for field, amount in inc.items()}
+        if log_type == "weight":
+            newer = {"$gte": [timestamp, {"$ifNull": ["$last_weight_at", datetime.min]}]}
+            fields["last_weight"] = {"$cond": [newer, data.get("weight"), "$last_weight"]}
+            fields["last_weight_at"] = {"$cond": [newer, timestamp, "$last_weight_at"]}
+        if not fields:
+            return None
+        if event_id is not None:
+            applied = {"$in": [event_id, {"$ifNull": ["$event_ids", []]}]}
+            fields = {field: {"$cond": [applied, f"${field}", value]} for field, value in fields.items()}
+            fields["event_ids"] = {"$cond": [applied, "$event_ids", {"$concatArrays": [{"$ifNull": ["$event_ids", []]}, [event_id]]}]}
+        fields["updated_at"] = "$$NOW"
+        return [{"$set": fields}]
+
+    async def _log(self, user_id: str, log_type: str, data: dict, db: AsyncIOMotorDatabase, timestamp: Optional[datetime] = None):
+        timestamp = timestamp or datetime.utcnow()
         log_entry = {
             "user_id": user_id,
-            "type": "water",
-            "data": {"glasses": glasses},
-            "timestamp": datetime.utcnow()
+            "type": log_type,
+            "data": data,
+            "timestamp": timestamp
         }
-        await collection.insert_one(log_entry)
+        await self.get_collection(db).insert_one(self._to_storage(log_entry))
+        update = self.rollup_update(log_type, data, timestamp)
+        if update:
+            await self.get_rollup_collection(db).update_one(
+                {"user_id": user_id, "date": day_key(timestamp)}, update, upsert=True
+            )
+        if log_type == "weight":
+            await user_service.set_current_weight(user_id, data["weight"], timestamp, db)
         return True
 
+    async def log_meal(self, user_id: str, meal_data: dict, db: AsyncIOMotorDatabase):
+        return await self._log(user_id, "meal", meal_data, db)
+
+    async def log_water(self, user_id: str, glasses: int, db: AsyncIOMotorDatabase):
+        if progress_buffer.enabled:
+            await progress_buffer.add(user_id, "water", "glasses", glasses, datetime.utcnow())
+            return True
+        return await self._log(user_id, "water", {"glasses": glasses}, db)
+
     async def log_steps(self, user_id: str, steps: int, db: AsyncIOMotorDatabase):
-        collection = self.get_collection(db)
-        log_entry = {
-            "user_id": user_id,
-            "type": "steps",
-            "data": {"steps": steps},
-            "timestamp": datetime.utcnow()
-        }
-        await collection.insert_one(log_entry)
-        return True
+        if progress_buffer.enabled:
+            await progress_buffer.add(user_id, "steps", "steps", steps, datetime.utcnow())
+            return True
+        return await self._log(user_id, "steps", {"steps": steps}, db)
 
     async def log_activity(self, user_id: str, activity_data: dict, db: AsyncIOMotorDatabase):
-        collection = self.get_collection(db)
-        log_entry = {
-            "user_id": user_id,
-            "type": "activity",
-            "data": activity_data,
-            "timestamp": datetime.utcnow()
-        }
-        await collection.insert_one(log_entry)
-        return True
+        return await self._log(user_id, "activity", activity_data, db)
 
     async def log_weight(self, user_id: str, weight: float, db: AsyncIOMotorDatabase):
+        """Logs the event and updates the day's last_weight and the user's current_weight."""
+        return await self._log(user_id, "weight", {"weight": weight}, db)
+
+    async def write_events(self, events: List[Dict], db: AsyncIOMotorDatabase) -> Set[ObjectId]:
+        """
+        Stores raw events and folds them into the daily rollups, in bulk.
+
+        Safe to retry after a partial failure: events are written by _id
+        (events without one get a fresh ObjectId), so one that is already
+        stored is not inserted again, and every rollup update is skipped
+        for event ids its day has already counted. Returns the _ids of the
+        events that were new.
+        """
+        if not events:
+            return set()
+        for event in events:
+            event.setdefault("_id", ObjectId())
+        inserted = await self._insert_new_events(events, db)
+        rollups = []
+        for event in events:
+            update = self.rollup_update(event["type"], event["data"], event["timestamp"], event_id=event["_id"])
+            if update:
+                rollups.append(UpdateOne({"user_id": event["user_id"], "date": day_key(event["timestamp"])}, update, upsert=True))
+        if rollups:
+            await self.get_rollup_collection(db).bulk_write(rollups, ordered=False)
+        latest_weights = {}
+        for event in events:
+            if event["type"] == "weight":
+                latest = latest_weights.get(event["user_id"])
+                if latest is None or event["timestamp"] >= latest["timestamp"]:
+                    latest_weights[event["user_id"]] = event
+        for user_id, event in latest_weights.items():
+            await user_service.set_current_weight(user_id, event["data"]["weight"], event["timestamp"], db)
+        return inserted
+
+    async def _insert_new_events(self, events: List[Dict], db: AsyncIOMotorDatabase) -> Set[ObjectId]:
         collection = self.get_collection(db)
-        log_entry = {
-            "user_id": user_id,
-            "type": "weight",
-            "data": {"weight": weight},
-            "timestamp": datetime.utcnow()
-        }
-        await collection.insert_one(log_entry)
-        return True
+        if not self.timeseries:
+            operations = [
+                UpdateOne({"_id": event["_id"]}, {"$setOnInsert": {k: v for k, v in event.items() if k != "_id"}}, upsert=True)
+                for event in events
+            ]
+            result = await collection.bulk_write(operations, ordered=False)
+            return {events[position]["_id"] for position in result.upserted_ids}
+
+        # Time-series collections support neither upserts nor a unique _id:
+        # look the ids up (per user, within the batch's time range, so the
+        # meta/timestamp index is used) and insert the others
+        by_user: Dict[str, List[Dict]] = {}
+        for event in events:
+            by_user.setdefault(event["user_id"], []).append(event)
+        query = {"$or": [
+            {
+                **self.event_filter(user_id),
+                "timestamp": {"$gte": min(e["timestamp"] for e in group), "$lte": max(e["timestamp"] for e in group)},
+                "_id": {"$in": [e["_id"] for e in group]},
+            }
+            for user_id, group in by_user.items()
+        ]}
+        existing = {doc["_id"] async for doc in collection.find(query, {"_id": 1})}
+        new_events = {}
+        for event in events:
+            if event["_id"] not in existing:
+                new_events.setdefault(event["_id"], event)
+        if new_events:
+            await collection.insert_many([self._to_storage(event) for event in new_events.values()], ordered=False)
+        return set(new_events)
+
+    async def ingest_batch(self, user_id: str, entries: List[dict], db: AsyncIOMotorDatabase) -> ProgressBatchResponse:
+        """
+        Stores a batch of offline-logged events of mixed types.
+
+        Every entry is validated first. A valid entry is stored under an _id
+        derived from (user_id, idempotency_key), through write_events: one
+        bulk write for the raw events and one for the daily rollups. An entry
+        whose event already exists reports "duplicate", so replaying a batch,
+        including one that failed halfway, stores and counts each entry once.
+        """
+        results: List[Optional[ProgressBatchItemResult]] = [None] * len(entries)
+        valid = []
+        now = datetime.utcnow()
+        for index, raw in enumerate(entries):
+            try:
+                entry = _batch_entry_adapter.validate_python(raw)
+            except ValidationError as exc:
+                key = raw.get("idempotency_key") if isinstance(raw, dict) else None
+                results[index] = ProgressBatchItemResult(index=index, idempotency_key=key if isinstance(key, str) else None, status="invalid", error=str(exc.errors()[0]["msg"]))
+                continue
+            timestamp = entry.timestamp
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            if timestamp > now + MAX_CLOCK_SKEW:
+                results[index] = ProgressBatchItemResult(index=index, idempotency_key=entry.idempotency_key, status="invalid", error="timestamp is in the future")
+                continue
+            valid.append((index, entry, timestamp))
+
+        if valid:
+            events = [
+                {
+                    "_id": ingest_event_id(user_id, entry.idempotency_key),
+                    "user_id": user_id,
+                    "type": entry.type,
+                    "data": entry.data.model_dump(),
+                    "timestamp": timestamp,
+                    "idempotency_key": entry.idempotency_key,
+                }
+                for _, entry, timestamp in valid
+            ]
+            try:
+                inserted = await self.write_events(events, db)
+            except Exception as exc:
+                # Nothing to undo: retrying the same entries completes the write without duplicates
+                for index, entry, _ in valid:
+                    results[index] = ProgressBatchItemResult(index=index, idempotency_key=entry.idempotency_key, status="failed", error=str(exc))
+            else:
+                for (index, entry, _), event in zip(valid, events):
+                    status = "created" if event["_id"] in inserted else "duplicate"
+                    inserted.discard(event["_id"])  # a key repeated in the batch is created once
+                    results[index] = ProgressBatchItemResult(index=index, idempotency_key=entry.idempotency_key, status=status)
+
+        return ProgressBatchResponse(
+            created=sum(1 for r in results if r.status == "created"),
+            duplicates=sum(1 for r in results if r.status == "duplicate"),
+            rejected=sum(1 for r in results if r.status in ("invalid", "failed")),
+            results=results,
+        )
+
+    async def get_daily_summary(self, user_id: str, date: datetime, db: AsyncIOMotorDatabase) -> Dict:
+        """Rollup of one day; zeros if nothing was logged."""
+        key = day_key(date)
+        doc = await self.get_rollup_collection(db).find_one({"user_id": user_id, "date": key}, ROLLUP_PROJECTION)
+        return {**empty_rollup(user_id, key), **(doc or {})}
+
+    async def get_daily_summaries(self, user_id: str, start: datetime, days: int, db: AsyncIOMotorDatabase) -> List[Dict]:
+        """
+        Rollups of `days` consecutive days from start, oldest first, zeros
+        for empty days. Only days before PROGRESS_ROLLUPS_SINCE that have no
+        rollup document (events logged before rollups existed, and not
+        backfilled) are aggregated from the raw events; a later day without
+        a rollup had nothing logged.
+        """
+        keys = [day_key(start + timedelta(days=i)) for i in range(days)]
+        cursor = self.get_rollup_collection(db).find(
+            {"user_id": user_id, "date": {"$gte": keys[0], "$lte": keys[-1]}}, ROLLUP_PROJECTION
+        )
+        found = {doc["date"]: doc async for doc in cursor}
+        since = settings.PROGRESS_ROLLUPS_SINCE
+        missing = [key for key in keys if key not in found and since is not None and key < since]
+        if missing:
+            first = datetime.strptime(missing[0], "%Y-%m-%d")
+            last = datetime.strptime(missing[-1], "%Y-%m-%d") + timedelta(days=1)
+            for doc in await self.aggregate_daily_from_events(user_id, first, last, db):
+                if doc["date"] in missing:
+                    found[doc["date"]] = doc
+        return [{**empty_rollup(user_id, key), **found.get(key, {})} for key in keys]
+
+    def daily_breakdown_pipeline(self, user_id: str, start: datetime, end: datetime) -> List[Dict]:
+        """
+        Aggregation over raw events in [start, end): grouped by day and type,
+        then folded into one rollup-shaped document per day. Uses the
+        (user_id, timestamp) index and returns at most one document per day.
+        """
+        def of_type(types, field):
+            types = [types] if isinstance(types, str) else types
+            return {"$sum": {"$cond": [{"$in": ["$_id.type", types]}, f"${field}", 0]}}
+
+        def weight(field):
+            return {"$max": {"$cond": [{"$eq": ["$_id.type", "weight"]}, f"${field}", None]}}
+
+        stages = [{"$match": {**self.event_filter(user_id), "timestamp": {"$gte": start, "$lt": end}}}]
+        if self.timeseries:
+            stages.append({"$set": {"type": "$meta.type"}})
+        return stages + [
+            {"$sort": {"timestamp": 1}},
+            {"$group": {
+                "_id": {"date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}, "type": "$type"},
+                "events": {"$sum": 1},
+                "calories": {"$sum": {"$ifNull": ["$data.calories", 0]}},
+                "protein": {"$sum": {"$ifNull": ["$data.protein", 0]}},
+                "carbs": {"$sum": {"$ifNull": ["$data.carbs", 0]}},
+                "fat": {"$sum": {"$ifNull": ["$data.fat", 0]}},
+                "glasses": {"$sum": {"$ifNull": ["$data.glasses", 0]}},
+                "steps": {"$sum": {"$ifNull": ["$data.steps", 0]}},
+                "calories_burned": {"$sum": {"$ifNull": ["$data.calories_burned", 0]}},
+                "last_weight": {"$last": "$data.weight"},
+                "last_weight_at": {"$last": "$timestamp"},
+            }},
+            {"$group": {
+                "_id": "$_id.date",
+                "calories": of_type("meal", "calories"),
+                "protein": of_type("meal", "protein"),
+                "carbs": of_type("meal", "carbs"),
+                "fat": of_type("meal", "fat"),
+                "meals_logged": of_type("meal", "events"),
+                "water_glasses": of_type("water", "glasses"),
+                "steps": of_type(["steps", "activity"], "steps"),
+                "calories_burned": of_type("activity", "calories_burned"),
+                "last_weight": weight("last_weight"),
+                "last_weight_at": weight("last_weight_at"),
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "user_id": user_id, "date": "$_id", **{field: 1 for field in ROLLUP_COUNTERS}, "last_weight": 1, "last_weight_at": 1}},
+        ]
+
+    async def aggregate_daily_from_events(self, user_id: str, start: datetime, end: datetime, db: AsyncIOMotorDatabase) -> List[Dict]:
+        cursor = self.get_collection(db).aggregate(self.daily_breakdown_pipeline(user_id, start, end))
+        return [doc async for doc in cursor]
+
+    def weight_history_pipeline(self, user_id: str, start: datetime, end: datetime, bucket: str) -> List[Dict]:
+        """
+        Weight series over [start, end] from the rollups' last_weight (one
+        value per day at most), downsampled into day/week/month buckets.
+        Days before PROGRESS_ROLLUPS_SINCE come from the raw weight events.
+        """
+        since = settings.PROGRESS_ROLLUPS_SINCE
+        first = max(day_key(start), since) if since else day_key(start)
+        stages = [
+            {"$match": {"user_id": user_id, "date": {"$gte": first, "$lte": day_key(end)}, "last_weight": {"$ne": None}}},
+        ]
+        if since and day_key(start) < since:
+            first_day = datetime.strptime(day_key(start), "%Y-%m-%d")
+            before = min(datetime.strptime(day_key(end), "%Y-%m-%d") + timedelta(days=1), datetime.strptime(since, "%Y-%m-%d"))
+            stages.append({"$unionWith": {"coll": self.events_collection_name, "pipeline": [
+                {"$match": {**self.event_filter(user_id, "weight"), "timestamp": {"$gte": first_day, "$lt": before}}},
+                {"$sort": {"timestamp": 1}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "last_weight": {"$last": "$data.weight"},
+                }},
+                {"$project": {"_id": 0, "date": "$_id", "last_weight": 1}},
+            ]}})
+        return stages + [
+            {"$sort": {"date": 1}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": {"$dateFromString": {"dateString": "$date"}}, "unit": bucket, "startOfWeek": "monday"}},
+                "weight": {"$last": "$last_weight"},
+                "min": {"$min": "$last_weight"},
+                "max": {"$max": "$last_weight"},
+                "samples": {"$sum": 1},
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$_id"}}, "weight": 1, "min": 1, "max": 1, "samples": 1}},
+        ]
+
+    async def get_weight_history(self, user_id: str, start: datetime, end: datetime, bucket: str, db: AsyncIOMotorDatabase) -> List[Dict]:
+        cursor = self.get_rollup_collection(db).aggregate(self.weight_history_pipeline(user_id, start, end, bucket))
+        return [doc async for doc in cursor]
 
     async def get_daily_logs(self, user_id: str, date: datetime, db: AsyncIOMotorDatabase):
-        collection = self.get_collection(db)
         start_of_day = datetime(date.year, date.month, date.day)
         end_of_day = datetime(date.year, date.month, date.day, 23, 59, 59)
-        
-        cursor = collection.find({
-            "user_id": user_id,
-            "timestamp": {"$gte": start_of_day, "$lte": end_of_day}
-        })
-        return await cursor.to_list(length=100)
+        return await self.find_events(user_id, start_of_day, end_of_day, db)
 
+# Singleton instance
 progress_service = ProgressService()
+
+
+async def get_current_user_with_weight(
+    current_user: UserProfile = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> UserProfile:
+    """get_current_user, with current_weight seeded from the progress log if it was never set."""
+    if isinstance(current_user, UserProfile) and current_user.weight_updated_at is None:
+        return await progress_service.seed_current_weight(current_user, db)
+    return current_user
@@ -0,0 +1,123 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..models.user import UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Short-TTL cache of authenticated users, keyed by token subject (email).
+    Entries are UserProfiles: password hashes are never cached.
+
+    With USER_CACHE_REDIS_URL set, entries live in Redis so every worker
+    sees the same data and invalidations; otherwise they live in a
+    per-process LRU bounded by USER_CACHE_MAX_ENTRIES. A TTL of 0 disables
+    the cache. Entries are invalidated by UserService.update_user; the TTL
+    bounds staleness for writes made outside this process' code paths.
+    """
+    KEY_PREFIX = "user:"
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis = None
+        self._redis_checked = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.USER_CACHE_TTL_SECONDS > 0
+
+    def _shared(self):
+        """Redis client if a shared backend is configured and available, else None."""
+        if not self._redis_checked:
+            self._redis_checked = True
+            if settings.USER_CACHE_REDIS_URL:
+                try:
+                    import redis.asyncio as redis
+                    self._redis = redis.from_url(settings.USER_CACHE_REDIS_URL)
+                except ImportError:
+                    logger.warning("USER_CACHE_REDIS_URL is set but the redis package is not installed; using a local cache")
+        return self._redis
+
+    async def get(self, email: str) -> Optional[UserProfile]:
+        if not self.enabled:
+            return None
+        user = None
+        shared = self._shared()
+        if shared is not None:
+            try:
+                raw = await shared.get(self.KEY_PREFIX + email)
+                user = UserProfile.model_validate_json(raw) if raw else None
+            except Exception as exc:
+                logger.warning(f"User cache read failed: {exc}")
+        else:
+            entry = self._entries.get(email)
+            if entry is not None:
+                expires_at, cached = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(email)
+                    user = cached.model_copy()
+                else:
+                    del self._entries[email]
+
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    async def set(self, user: UserProfile):
+        if not self.enabled:
+            return
+        user = UserProfile(**user.model_dump(exclude={"hashed_password"}))
+        shared = self._shared()
+        if shared is not None:
+            try:
+                await shared.set(self.KEY_PREFIX + user.email, user.model_dump_json(), ex=settings.USER_CACHE_TTL_SECONDS)
+            except Exception as exc:
+                logger.warning(f"User cache write failed: {exc}")
+            return
+        self._entries[user.email] = (time.monotonic() + settings.USER_CACHE_TTL_SECONDS, user)
+        self._entries.move_to_end(user.email)
+        while len(self._entries) > settings.USER_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, *emails: str):
+        emails = [email for email in emails if email]
+        if not emails:
+            return
+        self.invalidations += len(emails)
+        for email in emails:
+            self._entries.pop(email, None)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                await shared.delete(*(self.KEY_PREFIX + email for email in emails))
+            except Exception as exc:
+                logger.warning(f"User cache invalidation failed: {exc}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis" if self._shared() is not None else "local",
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+user_cache = UserCache()
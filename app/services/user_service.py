@@ -1,15 +1,17 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from ..core.config import settings
-from ..core.security import verify_password, get_password_hash
-from ..core.exceptions import UserNotFoundException, EmailAlreadyExistsException, InvalidCredentialsException
-from ..models.user import User, UserInDB
+from ..core.security import password_hasher
+from ..core.exceptions import UserNotFoundException, EmailAlreadyExistsException, InvalidCredentialsException, AdminRequiredException
+from ..models.user import User, UserInDB, UserProfile
 from ..core.database import get_database
+from .user_cache import user_cache
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
@@ -30,7 +32,7 @@ class UserService:
             raise EmailAlreadyExistsException()
 
         user_dict = user.model_dump()
-        user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
+        user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
         user_dict["created_at"] = datetime.utcnow()
         user_dict["updated_at"] = datetime.utcnow()
 
@@ -61,28 +63,77 @@ class UserService:
             return None
         return None
 
+    async def get_users(self, user_ids: Optional[List[str]], db: AsyncIOMotorDatabase) -> List[UserProfile]:
+        """Retrieve users by ID, or every user if user_ids is None (password hashes are not read)."""
+        collection = self.get_collection(db)
+        query = {}
+        if user_ids is not None:
+            query = {"_id": {"$in": [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]}}
+        users = []
+        async for user_dict in collection.find(query, {"hashed_password": 0}):
+            user_dict["id"] = str(user_dict.pop("_id"))
+            users.append(UserProfile(**user_dict))
+        return users
+
     async def authenticate_user(self, email: str, password: str, db: AsyncIOMotorDatabase) -> Optional[UserInDB]:
         """Authenticate user with email and password."""
         user = await self.get_user_by_email(email, db)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # Stored hash uses an old bcrypt cost (BCRYPT_ROUNDS changed)
+            await self.get_collection(db).update_one(
+                {"_id": ObjectId(user.id), "hashed_password": user.hashed_password},
+                {"$set": {"hashed_password": new_hash}},
+            )
+            await user_cache.invalidate(user.email)
+            user.hashed_password = new_hash
         return user
 
     async def update_user(self, user_id: str, update_data: dict, db: AsyncIOMotorDatabase) -> bool:
-        """Update user information."""
+        """Update user information and drop the user from the user cache."""
         collection = self.get_collection(db)
         update_data["updated_at"] = datetime.utcnow()
+        if update_data.get("weight") is not None:
+            # A weight entered in the profile is the latest weight too
+            update_data["current_weight"] = update_data["weight"]
+            update_data["weight_updated_at"] = update_data["updated_at"]
         
         try:
-            result = await collection.update_one(
+            previous = await collection.find_one_and_update(
                 {"_id": ObjectId(user_id)},
-                {"$set": update_data}
+                {"$set": update_data},
+                projection={"email": 1},
+                return_document=ReturnDocument.BEFORE,
             )
-            return result.matched_count > 0
         except:
             return False
+        if previous is None:
+            return False
+        # Cached under the old email, and the new one if it changed
+        await user_cache.invalidate(previous.get("email"), update_data.get("email"))
+        return True
+
+    async def set_current_weight(self, user_id: str, weight: float, at: datetime, db: AsyncIOMotorDatabase) -> bool:
+        """
+        Record a logged weight as the user's current weight, unless a weight
+        logged at a later time is already stored (late batch uploads).
+        Returns True if the user was updated.
+        """
+        if not ObjectId.is_valid(user_id):
+            return False
+        previous = await self.get_collection(db).find_one_and_update(
+            {"_id": ObjectId(user_id), "$or": [{"weight_updated_at": None}, {"weight_updated_at": {"$lte": at}}]},
+            {"$set": {"current_weight": weight, "weight_updated_at": at}},
+            projection={"email": 1},
+        )
+        if previous is None:
+            return False
+        await user_cache.invalidate(previous.get("email"))
+        return True
 
 # Singleton instance
 user_service = UserService()
@@ -91,8 +142,8 @@ user_service = UserService()
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncIOMotorDatabase = Depends(get_database)
-) -> UserInDB:
-    """Get current user from JWT token."""
+) -> UserProfile:
+    """Get current user from JWT token (without the password hash, which is only read by authenticate_user)."""
     try:
         payload = jwt.decode(
             token, 
@@ -106,7 +157,18 @@ async def get_current_user(
     except JWTError:
         raise InvalidCredentialsException()
 
+    user = await user_cache.get(email)
+    if user is not None:
+        return user
     user = await user_service.get_user_by_email(email, db)
     if user is None:
         raise UserNotFoundException()
-    return user
\ No newline at end of file
+    user = user.profile()
+    await user_cache.set(user)
+    return user
+
+async def get_current_admin(current_user: UserProfile = Depends(get_current_user)) -> UserProfile:
+    """Get current user, requiring their email to be listed in ADMIN_EMAILS."""
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise AdminRequiredException()
+    return current_user
@@ -0,0 +1,47 @@
+"""
+backfill_current_weight.py
+--------------------------
+Sets current_weight / weight_updated_at on users that do not have them yet
+(accounts whose weights were logged before the latest weight was kept on
+the user), from their latest logged weight, else their profile weight.
+
+Users are otherwise seeded on their first request that needs the weight;
+running this once makes the admin/cohort endpoints see the same values.
+Safe to re-run: users that already have weight_updated_at are skipped.
+
+Usage:
+    venv\\Scripts\\python scripts\\backfill_current_weight.py
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import connect_to_mongodb, close_mongodb_connection, get_database
+from app.services.progress_service import progress_service
+from app.services.user_service import user_service
+
+
+async def backfill(db):
+    seeded = 0
+    async for doc in db[user_service.collection_name].find({"weight_updated_at": None}, {"_id": 1}):
+        user = await user_service.get_user_by_id(str(doc["_id"]), db)
+        if user is None or user.weight_updated_at is not None:
+            continue
+        await progress_service.seed_current_weight(user, db)
+        seeded += 1
+    print(f"Done: current weight set for {seeded} users")
+
+
+async def main():
+    await connect_to_mongodb()
+    try:
+        await backfill(get_database())
+    finally:
+        await close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
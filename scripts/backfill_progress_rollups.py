@@ -0,0 +1,67 @@
+"""
+backfill_progress_rollups.py
+----------------------------
+Builds the daily rollups ("progress_daily") for days logged before rollups
+were written, from the raw progress events.
+
+Every user's events before --before (default: PROGRESS_ROLLUPS_SINCE) are
+aggregated per day and inserted as rollup documents; days that already have
+a rollup are left untouched, so the script can be re-run safely. Once it
+has run, unset PROGRESS_ROLLUPS_SINCE: summaries and weight history then
+read the rollups only.
+
+Usage:
+    venv\\Scripts\\python scripts\\backfill_progress_rollups.py
+    venv\\Scripts\\python scripts\\backfill_progress_rollups.py --before 2026-03-03
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import connect_to_mongodb, close_mongodb_connection, get_database
+from app.services.progress_service import progress_service
+
+
+async def backfill(db, before):
+    rollups = progress_service.get_rollup_collection(db)
+    users = created = 0
+    async for user in db["users"].find({}, {"_id": 1}):
+        user_id = str(user["_id"])
+        days = await progress_service.aggregate_daily_from_events(user_id, datetime(1970, 1, 1), before, db)
+        users += 1
+        if not days:
+            continue
+        result = await rollups.bulk_write([
+            UpdateOne({"user_id": user_id, "date": day["date"]}, {"$setOnInsert": day}, upsert=True)
+            for day in days
+        ], ordered=False)
+        created += result.upserted_count
+        if result.upserted_count:
+            print(f"  {user_id}: {result.upserted_count} days")
+    print(f"Done: {created} rollups created for {users} users")
+
+
+async def main(before):
+    await connect_to_mongodb()
+    try:
+        await backfill(get_database(), before)
+    finally:
+        await close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build daily progress rollups from events logged before rollups existed")
+    parser.add_argument("--before", default=settings.PROGRESS_ROLLUPS_SINCE, help="First day (YYYY-MM-DD) that already has rollups")
+    args = parser.parse_args()
+    if not args.before:
+        parser.error("--before is required when PROGRESS_ROLLUPS_SINCE is not set")
+
+    asyncio.run(main(datetime.strptime(args.before, "%Y-%m-%d")))
@@ -0,0 +1,49 @@
+"""
+batch_generate_plans.py
+-----------------------
+Generates 7-day diet plans for many users in one run, e.g. after bulk
+onboarding or when the food database changes.
+
+Uses the same BatchPlanGenerationService as
+POST /api/v1/admin/diet-plans/batch-generate: one catalog load, concurrent
+generation and a single Mongo bulk write. Prints the throughput report.
+
+Usage:
+    venv\\Scripts\\python scripts\\batch_generate_plans.py --all --replace-existing
+    venv\\Scripts\\python scripts\\batch_generate_plans.py --user-ids <id1> <id2>
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import AsyncSessionLocal, connect_to_mongodb, close_mongodb_connection, get_database
+from app.services.batch_generation_service import batch_generation_service
+
+
+async def main(user_ids, replace_existing):
+    await connect_to_mongodb()
+    try:
+        async with AsyncSessionLocal() as session:
+            report = await batch_generation_service.generate_for_users(
+                user_ids, session, get_database(), replace_existing=replace_existing
+            )
+    finally:
+        await close_mongodb_connection()
+
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate diet plans for many users")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-ids", nargs="+", help="IDs of the users to generate plans for")
+    target.add_argument("--all", action="store_true", help="Generate plans for every registered user")
+    parser.add_argument("--replace-existing", action="store_true", help="Replace plans that already exist")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(None if args.all else args.user_ids, args.replace_existing)))
@@ -0,0 +1,161 @@
+"""
+migrate_progress_timeseries.py
+------------------------------
+Copies raw progress events from the "progress" collection into the
+time-series collection used when PROGRESS_TIMESERIES is enabled.
+
+Events are copied in _id order in batches, keeping their _id. The last copied
+_id is checkpointed in the "migrations" collection after every batch, so an
+interrupted run resumes where it stopped. Time-series collections cannot
+have a unique index to reject duplicates, so the first batch of every run
+(the only one that can have been inserted without being checkpointed, if a
+run died between the insert and the checkpoint) skips the _ids the target
+already has.
+
+_id order only covers events with generated ObjectIds, which increase over
+time. Batch-ingested events get an _id derived from their idempotency key,
+which can sort below the checkpoint even if the event was written after it.
+So every run ends with a pass over all batch-ingested source events (those
+with an idempotency_key) that copies the ones the target does not have yet.
+The source collection is left untouched; drop it once --verify passes and
+the app runs with PROGRESS_TIMESERIES=true.
+
+Usage:
+    venv\\Scripts\\python scripts\\migrate_progress_timeseries.py
+    venv\\Scripts\\python scripts\\migrate_progress_timeseries.py --batch-size 5000
+    venv\\Scripts\\python scripts\\migrate_progress_timeseries.py --verify
+    venv\\Scripts\\python scripts\\migrate_progress_timeseries.py --restart
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import connect_to_mongodb, close_mongodb_connection, get_database
+from app.services.progress_service import progress_service, to_timeseries
+
+CHECKPOINT_ID = "progress_timeseries"
+
+
+async def migrate(db, batch_size, restart):
+    source = db[progress_service.collection_name]
+    target = db[progress_service.timeseries_collection_name]
+    checkpoints = db["migrations"]
+
+    if await progress_service.ensure_timeseries_collection(db):
+        print(f"Created time-series collection {target.name} with {progress_service.timeseries_options()}")
+    if restart:
+        await checkpoints.delete_one({"_id": CHECKPOINT_ID})
+    checkpoint = await checkpoints.find_one({"_id": CHECKPOINT_ID}) or {}
+    last_id = checkpoint.get("last_id")
+    copied = checkpoint.get("copied", 0)
+    if last_id is not None:
+        print(f"Resuming after _id {last_id} ({copied} events copied before)")
+
+    started = time.perf_counter()
+    first_batch = True
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await source.find(query, sort=[("_id", 1)]).to_list(length=batch_size)
+        if not batch:
+            break
+        # Events without user_id/type/timestamp cannot be stored in the time-series collection
+        docs = [to_timeseries(doc) for doc in batch if doc.get("user_id") and doc.get("type") and doc.get("timestamp")]
+        skipped = len(batch) - len(docs)
+        if skipped:
+            print(f"Skipped {skipped} malformed events before _id {batch[-1]['_id']}")
+        if first_batch and docs:
+            existing = {
+                doc["_id"]
+                async for doc in target.find({"_id": {"$gte": batch[0]["_id"], "$lte": batch[-1]["_id"]}}, {"_id": 1})
+            }
+            if existing:
+                print(f"Skipping {len(existing)} events already copied by an interrupted run")
+                docs = [doc for doc in docs if doc["_id"] not in existing]
+        first_batch = False
+        if docs:
+            await target.insert_many(docs, ordered=False)
+        last_id = batch[-1]["_id"]
+        copied += len(docs)
+        await checkpoints.update_one(
+            {"_id": CHECKPOINT_ID}, {"$set": {"last_id": last_id, "copied": copied}}, upsert=True
+        )
+        rate = copied / max(time.perf_counter() - started, 1e-9)
+        print(f"  {copied} events copied ({rate:,.0f}/s)")
+    print(f"Done: {copied} events in {target.name}")
+    await copy_missing_ingested(db, batch_size)
+
+
+async def copy_missing_ingested(db, batch_size):
+    """
+    Copies batch-ingested events (deterministic, unordered _ids) the target
+    lacks, whatever their position relative to the checkpoint. Existing
+    _ids are looked up per batch through the target's meta.user_id index.
+    """
+    source = db[progress_service.collection_name]
+    target = db[progress_service.timeseries_collection_name]
+    query = {"idempotency_key": {"$exists": True}}
+    last_id = None
+    added = 0
+    while True:
+        page = {**query, "_id": {"$gt": last_id}} if last_id is not None else query
+        batch = await source.find(page, sort=[("_id", 1)]).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        batch = [doc for doc in batch if doc.get("user_id") and doc.get("type") and doc.get("timestamp")]
+        existing = {
+            doc["_id"]
+            async for doc in target.find(
+                {"meta.user_id": {"$in": list({doc["user_id"] for doc in batch})}, "_id": {"$in": [doc["_id"] for doc in batch]}},
+                {"_id": 1},
+            )
+        }
+        docs = [to_timeseries(doc) for doc in batch if doc["_id"] not in existing]
+        if docs:
+            await target.insert_many(docs, ordered=False)
+            added += len(docs)
+    print(f"Batch-ingested events copied outside _id order: {added}")
+
+
+async def verify(db):
+    source = db[progress_service.collection_name]
+    target = db[progress_service.timeseries_collection_name]
+    pipeline = [{"$group": {"_id": "$type", "count": {"$sum": 1}}}]
+    source_counts = {doc["_id"]: doc["count"] async for doc in source.aggregate(pipeline)}
+    target_counts = {
+        doc["_id"]: doc["count"]
+        async for doc in target.aggregate([{"$group": {"_id": "$meta.type", "count": {"$sum": 1}}}])
+    }
+    ok = True
+    for log_type in sorted(set(source_counts) | set(target_counts), key=str):
+        match = source_counts.get(log_type, 0) == target_counts.get(log_type, 0)
+        ok = ok and match
+        print(f"  {str(log_type):<10} {source_counts.get(log_type, 0):>10} {target_counts.get(log_type, 0):>10}  {'ok' if match else 'MISMATCH'}")
+    return ok
+
+
+async def main(batch_size, check_only, restart):
+    await connect_to_mongodb()
+    try:
+        db = get_database()
+        if not check_only:
+            await migrate(db, batch_size, restart)
+        print("Events per type (source, time-series):")
+        return 0 if await verify(db) else 1
+    finally:
+        await close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy progress events into the time-series collection")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--verify", action="store_true", help="Only compare event counts per type")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and copy from the beginning (empty the target first)")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args.batch_size, args.verify, args.restart)))
@@ -0,0 +1,55 @@
+"""
+mongo_indexes.py
+----------------
+Applies and inspects the Mongo indexes declared in app/core/mongo_indexes.py.
+
+    status   list missing, changed, undeclared and unused indexes
+    ensure   create missing indexes (what the app does at startup)
+
+Usage:
+    venv\\Scripts\\python scripts\\mongo_indexes.py status
+    venv\\Scripts\\python scripts\\mongo_indexes.py ensure --sequential
+    venv\\Scripts\\python scripts\\mongo_indexes.py ensure --rebuild-changed
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import connect_to_mongodb, close_mongodb_connection, get_database
+from app.core.config import settings
+from app.core.mongo_indexes import MongoIndexManager
+from app.services.progress_service import progress_service
+
+
+async def main(command, sequential, rebuild_changed):
+    await connect_to_mongodb()
+    try:
+        manager = MongoIndexManager(get_database())
+        if command == "ensure":
+            if settings.PROGRESS_TIMESERIES:
+                await progress_service.ensure_timeseries_collection(get_database())
+            reports = await manager.ensure(sequential=sequential, rebuild_changed=rebuild_changed)
+        else:
+            reports = await manager.status()
+    finally:
+        await close_mongodb_connection()
+
+    for report in reports:
+        print(report.model_dump_json(indent=2))
+    if command == "ensure":
+        return 1 if any(report.failed for report in reports) else 0
+    return 1 if any(report.missing or report.changed for report in reports) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage declared MongoDB indexes")
+    parser.add_argument("command", choices=["status", "ensure"])
+    parser.add_argument("--sequential", action="store_true", help="Build each collection's indexes one at a time instead of together")
+    parser.add_argument("--rebuild-changed", action="store_true", help="Drop and recreate indexes whose definition changed")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args.command, args.sequential, args.rebuild_changed)))
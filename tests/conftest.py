@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import pytest
+
+from app.services.meal_generator.catalog import CatalogSnapshot
+from tests.fake_mongo import FakeDb
+
+SNACK_SLOTS = [{"slot_type": "snack_item", "calorie_pct": 1.0, "required": True}]
+
+
+def _make_row(id, slot_type="grain", diet_type="Vegetarian", region_tags=("North",), meal_time_tags=("Lunch",), plan_type_tags=("Healthy",)):
+    return {
+        "id": id,
+        "recipe_name": f"Recipe {id}",
+        "slot_type": slot_type,
+        "diet_type": diet_type,
+        "cal_per_serving": Decimal("200.00"),
+        "protein_per_serving": Decimal("8.50"),
+        "carbs_per_serving": Decimal("30.00"),
+        "fat_per_serving": Decimal("5.00"),
+        "fiber_per_serving": Decimal("4.00"),
+        "sodium_per_serving": None,
+        "region_tags": list(region_tags),
+        "meal_time_tags": list(meal_time_tags),
+        "plan_type_tags": list(plan_type_tags),
+        "ingredients": [{"name": "Rice", "amount_g": "50"}],
+    }
+
+
+@pytest.fixture
+def make_row():
+    """Factory of food_items rows as the catalog reads them."""
+    return _make_row
+
+
+@pytest.fixture
+def make_snapshot():
+    """Factory of a catalog of 40 snack items usable at every meal, plus any extra rows."""
+    def make(*extra_rows):
+        rows = [
+            _make_row(i, slot_type="snack_item", meal_time_tags=("Breakfast", "Lunch", "Dinner", "Morning_Snack"))
+            for i in range(1, 41)
+        ]
+        return CatalogSnapshot([*rows, *extra_rows], version=("v1",))
+    return make
+
+
+@pytest.fixture
+def user():
+    return {
+        "id": "user-1", "height": 175, "weight": 70, "age": 25, "gender": "male",
+        "activity_level": "MA", "diet": "Vegetarian", "health_condition": "Healthy",
+        "region": "North", "start_date": "2026-02-21",
+    }
+
+
+@pytest.fixture
+def templates():
+    """One snack slot for every meal type."""
+    return {meal_type: SNACK_SLOTS for meal_type in ["Breakfast", "MorningSnacks", "Lunch", "EveningSnacks", "Dinner"]}
+
+
+@pytest.fixture
+def db():
+    """Empty in-memory Mongo database (see tests/fake_mongo.py)."""
+    return FakeDb()
@@ -0,0 +1,304 @@
+"""
+In-memory stand-in for the Motor collections the progress code uses.
+
+Covers the subset of MongoDB it relies on: equality/comparison/$in/$or
+filters on dotted paths, $set/$setOnInsert and pipeline-form updates with
+upserts, bulk UpdateOne writes, sorted find cursors, and aggregations made
+of $match, $set, $sort, $group, $project and $unionWith stages. Updates and
+pipelines are evaluated, not inspected, so tests assert on the stored
+documents and the values read back.
+"""
+
+import copy
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+
+def get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return None
+        doc = doc[part]
+    return doc
+
+
+def set_path(doc, path, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _compare(op, value, operand):
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$exists":
+        return (value is not None) == operand
+    if value is None or operand is None:
+        return False
+    return {"$gt": value > operand, "$gte": value >= operand, "$lt": value < operand, "$lte": value <= operand}[op]
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            value = get_path(doc, key)
+            if not all(_compare(op, value, operand) for op, operand in condition.items()):
+                return False
+        elif get_path(doc, key) != condition:
+            return False
+    return True
+
+
+def _sort_key(value):
+    return (0,) if value is None else (1, value)
+
+
+def sort_docs(docs, spec):
+    spec = list(spec.items()) if isinstance(spec, dict) else list(spec)
+    for field, direction in reversed(spec):
+        docs = sorted(docs, key=lambda doc: _sort_key(get_path(doc, field)), reverse=direction < 0)
+    return docs
+
+
+def evaluate(expr, doc):
+    if isinstance(expr, str):
+        if expr == "$$NOW":
+            return datetime.utcnow()
+        return get_path(doc, expr[1:]) if expr.startswith("$") else expr
+    if isinstance(expr, list):
+        return [evaluate(item, doc) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {key: evaluate(value, doc) for key, value in expr.items()}
+
+    op, args = next(iter(expr.items()))
+    if op == "$cond":
+        if isinstance(args, dict):
+            args = [args["if"], args["then"], args["else"]]
+        return evaluate(args[1] if evaluate(args[0], doc) else args[2], doc)
+    if op == "$ifNull":
+        value = evaluate(args[0], doc)
+        return evaluate(args[1], doc) if value is None else value
+    if op == "$dateToString":
+        return evaluate(args["date"], doc).strftime(args["format"])
+    if op == "$dateFromString":
+        return datetime.fromisoformat(evaluate(args["dateString"], doc))
+    if op == "$dateTrunc":
+        date = evaluate(args["date"], doc)
+        day = datetime(date.year, date.month, date.day)
+        if args["unit"] == "week":
+            return day - timedelta(days=day.weekday())
+        return day.replace(day=1) if args["unit"] == "month" else day
+
+    values = evaluate(args, doc)
+    if op == "$add":
+        return sum(values)
+    if op == "$concatArrays":
+        return [item for array in values for item in array]
+    if op in ("$eq", "$ne", "$in", "$gt", "$gte", "$lt", "$lte"):
+        return _compare(op, values[0], values[1])
+    raise NotImplementedError(f"expression {op}")
+
+
+def project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    if any(value for key, value in projection.items() if key != "_id"):
+        result = {key: copy.deepcopy(doc[key]) for key, value in projection.items() if value and key in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {key: copy.deepcopy(value) for key, value in doc.items() if projection.get(key, 1)}
+
+
+def apply_update(doc, update, inserting=False):
+    if isinstance(update, list):
+        for stage in update:
+            (op, fields), = stage.items()
+            assert op in ("$set", "$addFields"), op
+            values = {field: evaluate(expr, doc) for field, expr in fields.items()}
+            for field, value in values.items():
+                set_path(doc, field, value)
+        return
+    for op, fields in update.items():
+        for field, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                set_path(doc, field, copy.deepcopy(value))
+            elif op == "$inc":
+                set_path(doc, field, (get_path(doc, field) or 0) + value)
+            elif op != "$setOnInsert":
+                raise NotImplementedError(f"update {op}")
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def limit(self, n):
+        return FakeCursor(self.docs[:n])
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+    async def to_list(self, length=None):
+        return self.docs[:length] if length else list(self.docs)
+
+
+class FakeUpdateResult:
+    def __init__(self, matched_count=0, upserted_id=None):
+        self.matched_count = matched_count
+        self.upserted_id = upserted_id
+
+
+class FakeBulkResult:
+    def __init__(self, upserted_ids):
+        self.upserted_ids = upserted_ids
+        self.upserted_count = len(upserted_ids)
+
+
+class FakeCollection:
+    def __init__(self, db=None):
+        self.db = db
+        self.docs = []
+
+    def _find(self, query, sort=None):
+        docs = [doc for doc in self.docs if matches(doc, query or {})]
+        return sort_docs(docs, sort) if sort else docs
+
+    def find(self, query=None, projection=None, sort=None, batch_size=None):
+        return FakeCursor([project(doc, projection) for doc in self._find(query, sort)])
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        docs = self._find(query, sort)
+        return project(docs[0], projection) if docs else None
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        if any(stored["_id"] == doc["_id"] for stored in self.docs):
+            raise DuplicateKeyError(f"duplicate _id {doc['_id']}")
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        docs = self._find(query)
+        if docs:
+            apply_update(docs[0], update)
+            return FakeUpdateResult(matched_count=1)
+        if not upsert:
+            return FakeUpdateResult()
+        doc = {key: copy.deepcopy(value) for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        apply_update(doc, update, inserting=True)
+        await self.insert_one(doc)
+        return FakeUpdateResult(upserted_id=doc["_id"])
+
+    async def find_one_and_update(self, query, update, projection=None):
+        docs = self._find(query)
+        if not docs:
+            return None
+        before = project(docs[0], projection)
+        apply_update(docs[0], update)
+        return before
+
+    async def bulk_write(self, operations, ordered=True):
+        upserted = {}
+        for position, operation in enumerate(operations):
+            result = await self.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+            if result.upserted_id is not None:
+                upserted[position] = result.upserted_id
+        return FakeBulkResult(upserted)
+
+    def aggregate(self, pipeline):
+        return FakeCursor(self._run(copy.deepcopy(self.docs), pipeline))
+
+    def _run(self, docs, pipeline):
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif op in ("$set", "$addFields"):
+                for doc in docs:
+                    apply_update(doc, [stage])
+            elif op == "$sort":
+                docs = sort_docs(docs, spec)
+            elif op == "$group":
+                docs = self._group(docs, spec)
+            elif op == "$project":
+                docs = [self._project_stage(doc, spec) for doc in docs]
+            elif op == "$unionWith":
+                other = self.db[spec["coll"]]
+                docs = docs + other._run(copy.deepcopy(other.docs), spec.get("pipeline", []))
+            else:
+                raise NotImplementedError(f"stage {op}")
+        return docs
+
+    @staticmethod
+    def _group(docs, spec):
+        groups = {}
+        for doc in docs:
+            key = evaluate(spec["_id"], doc)
+            groups.setdefault(repr(key), (key, []))[1].append(doc)
+        results = []
+        for key, members in groups.values():
+            result = {"_id": key}
+            for field, accumulator in spec.items():
+                if field == "_id":
+                    continue
+                (op, expr), = accumulator.items()
+                values = [evaluate(expr, doc) for doc in members]
+                present = [value for value in values if value is not None]
+                if op == "$sum":
+                    result[field] = sum(value for value in values if isinstance(value, (int, float)))
+                elif op == "$last":
+                    result[field] = values[-1]
+                elif op == "$first":
+                    result[field] = values[0]
+                elif op == "$max":
+                    result[field] = max(present) if present else None
+                elif op == "$min":
+                    result[field] = min(present) if present else None
+                else:
+                    raise NotImplementedError(f"accumulator {op}")
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _project_stage(doc, spec):
+        result = {"_id": doc["_id"]} if spec.get("_id", 1) and "_id" in doc else {}
+        for field, value in spec.items():
+            if field == "_id":
+                continue
+            if value is True or value == 1:
+                if field in doc:
+                    result[field] = doc[field]
+            else:
+                result[field] = evaluate(value, doc)
+        return result
+
+
+class FakeDb(dict):
+    """Database whose collections are created on first access."""
+    def __getitem__(self, name):
+        if name not in self:
+            self[name] = FakeCollection(self)
+        return dict.__getitem__(self, name)
@@ -0,0 +1,89 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.models.diet_plan import DietPlan
+from app.services import batch_generation_service as module
+from app.schemas.diet_plan import BatchGenerationReport
+from app.services.batch_generation_service import BatchPlanGenerationService
+from app.services.meal_generator.validation import PlanValidationIssue, ValidationCode
+
+
+def test_batch_generation_reports_failures_and_throughput(monkeypatch):
+    stored_batches = []
+
+    async def get_snapshot(session):
+        return "snapshot"
+
+    async def resolve_templates(user_data, session):
+        return {}
+
+    async def build_validated_diet_plan(user_data, snapshot, templates):
+        if user_data["id"] == "bad":
+            raise RuntimeError("no food items")
+        if user_data["id"] == "invalid":
+            return None, [PlanValidationIssue(code=ValidationCode.DIET_MISMATCH, message="Lunch on 2026-01-01 has foods that are not 'Vegetarian': Chicken")]
+        return DietPlan(user_id=user_data["id"], meals=[{"Date": "2026-01-01"}]), []
+
+    async def get_user_ids_with_plans(user_ids):
+        return {"existing"}
+
+    async def store_diet_plans(plans, replace_existing=False):
+        stored_batches.append(plans)
+        return len(plans)
+
+    monkeypatch.setattr(module.food_catalog, "get_snapshot", get_snapshot)
+    monkeypatch.setattr(module.meal_generator, "resolve_templates", resolve_templates)
+    monkeypatch.setattr(module.diet_plan_service, "build_validated_diet_plan", build_validated_diet_plan)
+    monkeypatch.setattr(module.diet_plan_service, "get_user_ids_with_plans", get_user_ids_with_plans)
+    monkeypatch.setattr(module.diet_plan_service, "store_diet_plans", store_diet_plans)
+
+    profiles = [{"id": "ok"}, {"id": "bad"}, {"id": "existing"}, {"id": "invalid"}]
+    report = asyncio.run(BatchPlanGenerationService().generate_for_profiles(profiles, session=None))
+
+    assert report.requested == 4
+    assert report.generated == 1
+    assert report.stored == 1
+    assert {f.user_id for f in report.failures} == {"bad", "existing", "invalid"}
+    invalid = next(f for f in report.failures if f.user_id == "invalid")
+    assert invalid.error.startswith("Plan failed validation: Lunch on 2026-01-01")
+    assert len(stored_batches) == 1  # one bulk write for the whole batch
+    assert report.plans_per_second > 0
+
+
+def test_batch_profiles_carry_no_password_hash(monkeypatch):
+    from datetime import datetime
+
+    from app.services.user_service import UserService
+
+    projections = []
+    now = datetime(2026, 1, 1)
+
+    class Users:
+        def find(self, query, projection):
+            projections.append(projection)
+            return self._iterate(projection)
+
+        async def _iterate(self, projection):
+            doc = {
+                "_id": ObjectId("65f000000000000000000001"), "email": "a@example.com", "name": "A",
+                "hashed_password": "$2b$12$secret", "age": 30, "gender": "male", "height": 175, "weight": 70,
+                "activity_level": "MA", "diet": "Vegetarian", "meal_plan_purchased": False,
+                "created_at": now, "updated_at": now,
+            }
+            yield {key: value for key, value in doc.items() if projection.get(key, 1)}
+
+    captured = []
+
+    async def generate_for_profiles(profiles, session, replace_existing=False):
+        captured.extend(profiles)
+        return BatchGenerationReport(requested=len(profiles), generated=0, stored=0, elapsed_seconds=0, plans_per_second=0)
+
+    monkeypatch.setattr(module, "user_service", UserService())
+    monkeypatch.setattr(UserService, "get_collection", lambda self, db: Users())
+    service = BatchPlanGenerationService()
+    monkeypatch.setattr(service, "generate_for_profiles", generate_for_profiles)
+
+    asyncio.run(service.generate_for_users(None, session=None, db=None))
+    assert projections == [{"hashed_password": 0}]
+    assert captured and "hashed_password" not in captured[0]
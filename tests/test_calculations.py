@@ -1,4 +1,8 @@
-from app.services.meal_generator.calculations import calculate_bmi, calculate_bmr, calculate_tdee, calculate_macronutrients
+import random
+
+from app.services.meal_generator.calculations import (
+    calculate_bmi, calculate_bmr, calculate_tdee, calculate_macronutrients, calculate_targets_batch,
+)
 
 def test_calculate_bmi():
     # height 175cm, weight 70kg
@@ -22,3 +26,40 @@ def test_calculate_macronutrients_healthy():
     assert carbs == (2000 * 0.55) / 4
     assert fat == (2000 * 0.25) / 9
     assert fiber == (2000 * 14) / 1000
+
+def test_batch_targets_are_bit_identical_to_scalar():
+    rng = random.Random(3)
+    plans = [('Healthy', None), ('Gym-Friendly', 'weight_loss'), ('Gym-Friendly', 'muscle_gain'),
+             ('Gym-Friendly', 'maintenance'), ('Gym-Friendly', None), ('Diabetic-Friendly', 'controlled'),
+             ('Diabetic-Friendly', 'uncontrolled'), (None, None)]
+    people = [
+        (rng.uniform(140, 200), rng.choice([rng.uniform(40, 130), rng.randint(40, 130)]), rng.randint(18, 80),
+         rng.choice(['male', 'Female', 'other']), rng.choice(['S', 'LA', 'MA', 'VA', 'SA', 'unknown']), *rng.choice(plans))
+        for _ in range(500)
+    ]
+    batch = calculate_targets_batch(*(list(column) for column in zip(*people)))
+    for i, (height, weight, age, gender, activity, condition, status) in enumerate(people):
+        bmr = calculate_bmr(gender, weight, height, age)
+        tdee = calculate_tdee(bmr, activity)
+        protein, carbs, fiber, fat = calculate_macronutrients(tdee, condition, status)
+        expected = {"bmi": calculate_bmi(height, weight), "bmr": bmr, "tdee": tdee,
+                    "protein": protein, "carbs": carbs, "fiber": fiber, "fat": fat}
+        assert {name: float(values[i]) for name, values in batch.items()} == expected
+
+def test_cohort_targets_match_plan_generation_targets():
+    import asyncio
+    from app.routers.calculations import get_cohort_targets
+    from app.schemas.calculations import CohortTargetsRequest, TargetsProfile
+    from app.services.meal_generator.meal_generator import meal_generator
+
+    profiles = [
+        {"height": 180, "weight": 82, "age": 29, "gender": "male", "activity_level": "VA", "health_condition": "Gym-Friendly", "gym_goal": "muscle_gain"},
+        {"height": 160, "weight": 68, "age": 52, "gender": "female", "activity_level": "LA", "health_condition": "Diabetic-Friendly", "diabetes_status": "controlled"},
+        {"height": 170, "weight": 65, "age": 35, "gender": "female", "activity_level": "MA", "health_condition": "Healthy"},
+    ]
+    request = CohortTargetsRequest(profiles=[TargetsProfile(**profile) for profile in profiles])
+    cohort = asyncio.run(get_cohort_targets(request, current_user=None, db=None))
+
+    for profile, targets in zip(profiles, cohort):
+        expected = meal_generator._calculate_targets(profile)
+        assert targets.model_dump(exclude={"user_id"}) == expected
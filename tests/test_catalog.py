@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import numpy as np
+
+from app.services.meal_generator.catalog import CatalogSnapshot
+from app.services.meal_generator.scoring import scaling_factors, score_candidates, slot_targets, top_k
+
+
+def test_snapshot_converts_numeric_columns(make_row):
+    snapshot = CatalogSnapshot([make_row(1)])
+    item = snapshot.items[1]
+    assert item.cal_per_serving == 200.0
+    assert item.sodium_per_serving == 0.0
+    assert item.ingredients == [{"name": "Rice", "amount_g": 50.0}]
+
+
+def test_candidates_prefers_region_and_excludes_used(make_row):
+    snapshot = CatalogSnapshot([
+        make_row(1, region_tags=("North",)),
+        make_row(2, region_tags=("South",)),
+        make_row(3, region_tags=("North", "South")),
+    ])
+    ids = {i.id for i in snapshot.candidates("grain", "Vegetarian", "North", "Lunch", "Healthy", set())}
+    assert ids == {1, 3}
+    ids = {i.id for i in snapshot.candidates("grain", "Vegetarian", "North", "Lunch", "Healthy", {1})}
+    assert ids == {3}
+
+
+def test_candidates_fallbacks(make_row):
+    snapshot = CatalogSnapshot([
+        make_row(1, region_tags=("South",)),
+        make_row(2, meal_time_tags=("Dinner",)),
+    ])
+    # Fallback 1: no North item for Lunch, so any region is accepted
+    ids = {i.id for i in snapshot.candidates("grain", "Vegetarian", "North", "Lunch", "Healthy", set())}
+    assert ids == {1}
+    # Fallback 2: everything tagged is used, so history and tags are ignored
+    ids = {i.id for i in snapshot.candidates("grain", "Vegetarian", "North", "Lunch", "Healthy", {1})}
+    assert ids == {1, 2}
+    assert snapshot.candidates("sabzi", "Vegetarian", "North", "Lunch", "Healthy", set()) == []
+
+
+def test_scoring_prefers_items_matching_macro_targets(make_row):
+    high_protein = make_row(1)
+    high_protein["protein_per_serving"] = Decimal("30.00")
+    low_protein = make_row(2)
+    low_protein["protein_per_serving"] = Decimal("1.00")
+    snapshot = CatalogSnapshot([high_protein, low_protein])
+
+    rows = snapshot.candidate_rows("grain", "Vegetarian", "North", "Lunch", "Healthy", set())
+    targets = slot_targets(400, 60, 60, 8, 10)
+    scores = score_candidates(snapshot.nutrients, rows, targets)
+    best = top_k(rows, scores, 1)
+    assert [snapshot.rows[r].id for r in best] == [1]
+
+
+def test_scaling_factors_are_clamped():
+    factors = scaling_factors(np.array([100, 1000, 0], dtype=np.float32), 400)
+    assert factors.tolist() == [3.0, 0.5, 1.0]
@@ -0,0 +1,28 @@
+from app.services.meal_generator.checklist import IngredientChecklist
+
+
+MEALS = [
+    {"Date": "2026-02-21", "Ingredients Scaling": {"rice": 100.0, "dal": 50.0}},
+    {"Date": "2026-02-21", "Ingredients Scaling": {"rice": 80.0}},
+    {"Date": "2026-02-22", "Ingredients Scaling": {"dal": 60.0, "ghee": 5.004}},
+]
+
+
+def test_checklist_totals_and_day_slices():
+    checklist = IngredientChecklist.from_meals(MEALS)
+    assert checklist.to_records() == [
+        {"Ingredient": "rice", "Total Amount (g)": 180.0},
+        {"Ingredient": "dal", "Total Amount (g)": 110.0},
+        {"Ingredient": "ghee", "Total Amount (g)": 5.0},
+    ]
+    assert checklist.dates() == ["2026-02-21", "2026-02-22"]
+    assert checklist.day("2026-02-22").to_records()[0] == {"Ingredient": "dal", "Total Amount (g)": 60.0}
+
+    merged = IngredientChecklist.from_meals(MEALS[:1]).merge(IngredientChecklist.from_meals(MEALS[1:]))
+    assert merged.to_records() == checklist.to_records()
+
+
+def test_checklist_remove_meal_drops_emptied_ingredients():
+    checklist = IngredientChecklist.from_records(IngredientChecklist.from_meals(MEALS).to_records())
+    checklist.remove_meal(MEALS[2])
+    assert {r["Ingredient"] for r in checklist.to_records()} == {"rice", "dal"}
@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+from app.core.database import MongoPoolStats
+
+
+def test_mongo_pool_stats_track_checkouts_and_waiters():
+    stats = MongoPoolStats()
+    stats.connection_created(None)
+    stats.connection_check_out_started(None)
+    stats.connection_check_out_started(None)
+    assert stats.snapshot()["waiters"] == 2
+
+    stats.connection_checked_out(SimpleNamespace(duration=0.004))
+    stats.connection_check_out_failed(None)
+    snapshot = stats.snapshot()
+    assert snapshot["waiters"] == 0
+    assert snapshot["checked_out"] == 1 and snapshot["checkout_failures"] == 1
+    assert snapshot["avg_wait_ms"] == 4.0
+
+    stats.connection_checked_in(None)
+    assert stats.snapshot()["checked_out"] == 0
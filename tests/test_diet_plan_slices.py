@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import PlanGenerationFailedException
+from app.models.diet_plan import DietPlan
+from app.services import diet_plan_service as module
+from app.services.diet_plan_service import DietPlanService
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.docs)
+
+
+def make_service(monkeypatch, docs):
+    collection = FakeCollection(docs)
+    monkeypatch.setattr(DietPlanService, "diet_plans", property(lambda self: collection))
+    return DietPlanService(), collection
+
+
+def test_plan_slice_filters_in_mongo_and_merges_day_checklists(monkeypatch):
+    doc = {
+        "user_id": "u1",
+        "meals": [{"Date": "2026-02-21", "Meal Type": "Lunch", "Ingredients Scaling": {"rice": 100.0}}],
+        "daily_checklists": {
+            "2026-02-21": [{"Ingredient": "rice", "Total Amount (g)": 100.0}],
+            "2026-02-22": [{"Ingredient": "rice", "Total Amount (g)": 50.0}],
+        },
+        "daily_totals": {"2026-02-21": {"Total Calories": 400.0}, "2026-02-22": {"Total Calories": 300.0}},
+    }
+    service, collection = make_service(monkeypatch, [doc])
+
+    plan = asyncio.run(service.get_plan_slice("u1", "2026-02-21", "2026-02-22"))
+    assert plan["ingredient_checklist"] == [{"Ingredient": "rice", "Total Amount (g)": 150.0}]
+
+
+def test_plan_slice_by_meal_type_summarizes_only_returned_meals(monkeypatch):
+    lunch = {"Date": "2026-02-21", "Meal Type": "Lunch", "Total Calories": 400.0, "Ingredients Scaling": {"rice": 100.0}}
+    doc = {
+        "user_id": "u1",
+        "meals": [lunch],  # Dinner was filtered out in Mongo
+        "daily_checklists": {"2026-02-21": [{"Ingredient": "rice", "Total Amount (g)": 100.0}, {"Ingredient": "paneer", "Total Amount (g)": 80.0}]},
+        "daily_totals": {"2026-02-21": {"Total Calories": 950.0}},
+    }
+    service, collection = make_service(monkeypatch, [doc])
+
+    plan = asyncio.run(service.get_plan_slice("u1", "2026-02-21", "2026-02-21", ["Lunch"]))
+    assert plan["ingredient_checklist"] == [{"Ingredient": "rice", "Total Amount (g)": 100.0}]
+    assert plan["daily_checklists"]["2026-02-21"] == [{"Ingredient": "rice", "Total Amount (g)": 100.0}]
+    assert plan["daily_totals"]["2026-02-21"]["Total Calories"] == 400.0
+    conditions = collection.pipelines[0][-1]["$project"]["meals"]["$filter"]["cond"]["$and"]
+    assert {"$in": ["$$meal.Meal Type", ["Lunch"]]} in conditions
+
+    del doc["daily_checklists"], doc["daily_totals"]  # plan stored before daily summaries
+    plan = asyncio.run(service.get_plan_slice("u1", "2026-02-21", "2026-02-21", ["Lunch"]))
+    assert plan["ingredient_checklist"] == [{"Ingredient": "rice", "Total Amount (g)": 100.0}]
+
+
+def test_day_plan_falls_back_for_plans_without_daily_summaries(monkeypatch):
+    doc = {
+        "user_id": "u1",
+        "meals": [{"Date": "2026-02-21", "Meal Type": "Lunch", "Total Calories": 450.0, "Ingredients Scaling": {"dal": 60.0}}],
+    }
+    service, _ = make_service(monkeypatch, [doc])
+
+    plan = asyncio.run(service.get_day_plan("u1", "2026-02-21"))
+    assert plan["daily_checklists"]["2026-02-21"] == [{"Ingredient": "dal", "Total Amount (g)": 60.0}]
+    assert plan["daily_totals"]["2026-02-21"]["Total Calories"] == 450.0
+    assert asyncio.run(make_service(monkeypatch, [])[0].get_day_plan("u1", "2026-02-21")) is None
+
+
+def test_replace_meals_requires_unchanged_version_and_meals(monkeypatch):
+    class Result:
+        matched_count = 0
+
+    class Plans:
+        def __init__(self):
+            self.updates = []
+
+        async def update_one(self, query, update):
+            self.updates.append((query, update))
+            return Result()
+
+    plans = Plans()
+    monkeypatch.setattr(DietPlanService, "diet_plans", property(lambda self: plans))
+    current = [{"Date": "2026-02-21", "Meal Type": "Lunch", "Food IDs": [3, 7]}]
+    new_meal = {"Date": "2026-02-21", "Meal Type": "Lunch", "Food IDs": [4]}
+
+    updated = asyncio.run(DietPlanService().replace_meals("u1", current, {0: new_meal}, [], version=5))
+
+    assert updated is False
+    query, update = plans.updates[0]
+    assert query["version"] == 5 and query["meals.0.Food IDs"] == [3, 7]
+    assert update["$inc"] == {"version": 1} and update["$set"]["meals.0"] == new_meal
+
+
+def test_update_diet_plan_recomputes_checklists_and_totals(monkeypatch):
+    class Result:
+        modified_count = 1
+
+    class Plans:
+        async def update_one(self, query, update):
+            self.update = update
+            return Result()
+
+    plans = Plans()
+    monkeypatch.setattr(DietPlanService, "diet_plans", property(lambda self: plans))
+    meals = [{"Date": "2026-02-21", "Meal Type": "Lunch", "Ingredients Scaling": {"rice": 100.0}, "Total Calories": 400.0}]
+    stale = DietPlan(user_id="u1", meals=meals, daily_checklists={"2026-02-20": []}, daily_totals={"2026-02-20": {"Total Calories": 1.0}})
+
+    assert asyncio.run(DietPlanService().update_diet_plan("u1", stale))
+
+    stored = plans.update["$set"]
+    assert list(stored["daily_checklists"]) == ["2026-02-21"] and list(stored["daily_totals"]) == ["2026-02-21"]
+    assert stored["ingredient_checklist"] == [{"Ingredient": "rice", "Total Amount (g)": 100.0}]
+
+
+def test_catalog_failure_is_reported_as_failed_generation(monkeypatch):
+    async def get_snapshot(session):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(module.food_catalog, "get_snapshot", get_snapshot)
+    service = DietPlanService()
+
+    plan, issues = asyncio.run(service.generate_validated_diet_plan({"id": "u1"}, session=None))
+    assert plan is None and issues == []
+
+    with pytest.raises(PlanGenerationFailedException) as exc_info:
+        asyncio.run(service.regenerate_meals({"id": "u1"}, None, "2026-02-21"))
+    assert exc_info.value.status_code == 503
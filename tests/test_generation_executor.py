@@ -0,0 +1,26 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.meal_generator.executor import GenerationExecutor
+
+
+def run_executor(mode, monkeypatch, user, snapshot, templates):
+    monkeypatch.setattr(settings, "GENERATION_EXECUTOR", mode)
+    monkeypatch.setattr(settings, "GENERATION_WORKERS", 1)
+    executor = GenerationExecutor()
+
+    async def run():
+        try:
+            return await executor.build_meal_plan(user, snapshot, templates)
+        finally:
+            executor.shutdown()
+
+    return asyncio.run(run())
+
+
+def test_inline_and_process_modes_build_full_plan(monkeypatch, user, templates, make_snapshot):
+    for mode in ("inline", "process"):
+        plan = run_executor(mode, monkeypatch, dict(user), make_snapshot(), templates)
+        assert len(plan["meals"]) == 35
+        assert plan["meals"][0]["Date"] == "2026-02-21"
+        assert plan["ingredient_checklist"]
@@ -0,0 +1,37 @@
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from starlette.requests import Request
+
+from app.core.limiter import user_or_ip_key
+from app.core.limiter_storage import SQLiteStorage
+from app.core.security import create_access_token
+
+
+def make_request(headers=None):
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+def test_sqlite_storage_sliding_window_is_shared_between_instances(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'limits.db'}"
+    first, second = storage_from_string(uri), storage_from_string(uri)
+    assert isinstance(first, SQLiteStorage)
+
+    limit = parse("3/minute")
+    a, b = SlidingWindowCounterRateLimiter(first), SlidingWindowCounterRateLimiter(second)
+    assert a.hit(limit, "login", "10.0.0.1")
+    assert b.hit(limit, "login", "10.0.0.1")
+    assert a.hit(limit, "login", "10.0.0.1")
+    assert not b.hit(limit, "login", "10.0.0.1")  # the other "worker" sees all three hits
+    assert b.hit(limit, "login", "10.0.0.2")
+
+
+def test_user_or_ip_key_prefers_token_subject():
+    token = create_access_token({"sub": "a@example.com"})
+    assert user_or_ip_key(make_request({"Authorization": f"Bearer {token}"})) == "user:a@example.com"
+    assert user_or_ip_key(make_request({"Authorization": "Bearer not-a-token"})) == "10.0.0.1"
+    assert user_or_ip_key(make_request()) == "10.0.0.1"
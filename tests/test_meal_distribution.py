@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.meal_generator.distribution import DEFAULT_PATH, MealDistributionStore, load_distribution
+
+
+def test_split_is_one_multiply_of_the_plan_matrix():
+    distribution = load_distribution(DEFAULT_PATH)
+    totals = {"tdee": 2000.0, "protein": 100.0, "carbs": 275.0, "fiber": 28.0, "fat": 55.0}
+
+    gym = distribution.split("Gym-Friendly", totals)
+    assert gym["calories"]["Lunch"] == 2000.0 * 0.35
+    assert gym["fat"]["Dinner"] == 55.0 * 0.30
+    # Unknown plans fall back to the default plan
+    assert distribution.split("Keto", totals) == distribution.split("Diabetic-Friendly", totals)
+
+
+def test_store_hot_reloads_and_keeps_last_good_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEAL_DISTRIBUTION_CHECK_SECONDS", 0)
+    path = tmp_path / "distribution.json"
+    config = json.loads(open(DEFAULT_PATH).read())
+    path.write_text(json.dumps(config))
+    store = MealDistributionStore(str(path))
+    assert store.get().matrix[0, 0, 0] == 0.25
+
+    config["plans"]["Healthy"]["calories"] = [0.2, 0.1, 0.3, 0.1, 0.3]
+    store.update(config)
+    assert store.get().matrix[0, 0, 0] == 0.2
+
+    config["plans"]["Healthy"]["calories"] = [0.5, 0.5, 0.5, 0.5, 0.5]
+    with pytest.raises(ValueError, match="sum"):
+        store.update(config)
+    path.write_text("{broken")
+    os.utime(path, (1, 1))
+    assert store.get().matrix[0, 0, 0] == 0.2
+    assert "not valid JSON" in store.stats()["last_error"]
+
+
+def test_store_refuses_to_overwrite_the_packaged_default():
+    store = MealDistributionStore(DEFAULT_PATH)
+    assert not store.writable
+    with pytest.raises(PermissionError, match="MEAL_DISTRIBUTION_PATH"):
+        store.update(json.loads(open(DEFAULT_PATH).read()))
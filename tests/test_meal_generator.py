@@ -24,3 +24,87 @@ def test_meal_plan_targets_initialization():
     
     assert ctx.meal_history["Breakfast"] == set()
     assert ctx.user_data["gender"] == "male"
+
+def test_optimized_mode_fills_plan_without_repeats_in_window(user, templates, make_snapshot):
+    plan = meal_generator.build_meal_plan(user, make_snapshot(), templates, mode="optimized")
+    assert len(plan["meals"]) == 35
+
+    days_by_name = {}
+    dates = sorted({m["Date"] for m in plan["meals"]})
+    for meal in plan["meals"]:
+        days_by_name.setdefault(meal["Menu Names"], []).append(dates.index(meal["Date"]))
+    # 40 snack items for 35 snack slots: nothing should repeat on the same or adjacent days
+    for days in days_by_name.values():
+        assert all(abs(a - b) >= 3 for i, a in enumerate(days) for b in days[:i])
+
+
+def test_regenerate_single_meal_avoids_used_foods_and_patches_checklist(user, templates, make_snapshot):
+    snapshot = make_snapshot()
+    plan = meal_generator.build_meal_plan(user, snapshot, templates, mode="random")
+    meals = plan["meals"]
+
+    replacements = meal_generator.regenerate_meals(
+        user, meals, snapshot, templates, "2026-02-22", "Lunch"
+    )
+    assert len(replacements) == 1
+    (index, new_meal), = replacements.items()
+    assert meals[index]["Date"] == "2026-02-22" and meals[index]["Meal Type"] == "Lunch"
+    used = {food_id for meal in meals for food_id in meal["Food IDs"]}
+    assert not used & set(new_meal["Food IDs"])
+
+    patched = meal_generator.patch_ingredient_checklist(
+        plan["ingredient_checklist"], [meals[index]], [new_meal]
+    )
+    updated_meals = list(meals)
+    updated_meals[index] = new_meal
+    expected = meal_generator.generate_ingredient_checklist(updated_meals)
+    assert {r["Ingredient"]: r["Total Amount (g)"] for r in patched} == pytest.approx(
+        {r["Ingredient"]: r["Total Amount (g)"] for r in expected}
+    )
+
+
+def test_regenerate_whole_day(user, templates, make_snapshot):
+    snapshot = make_snapshot()
+    meals = meal_generator.build_meal_plan(user, snapshot, templates)["meals"]
+    replacements = meal_generator.regenerate_meals(user, meals, snapshot, templates, "2026-02-23")
+    assert sorted(meals[i]["Meal Type"] for i in replacements) == sorted(templates)
+
+
+def test_validate_plan_reports_slot_issues(user, templates, make_snapshot, make_row):
+    from app.services.meal_generator.validation import Severity, ValidationCode
+
+    snapshot = make_snapshot()
+    plan = meal_generator.build_meal_plan(user, snapshot, templates)
+    meals, checklist = plan["meals"], plan["ingredient_checklist"]
+    issues = meal_generator.validate_plan(meals, checklist, user, snapshot)
+    assert all(issue.severity == Severity.WARNING for issue in issues)
+
+    broken = [dict(m) for m in meals]
+    dropped = broken.pop(0)
+    broken[0]["Food IDs"] = [99]  # the meal's "Diet Type" still says Vegetarian
+    snapshot = make_snapshot(make_row(99, slot_type="snack_item", diet_type="Non-Vegetarian"))
+    issues = meal_generator.validate_plan(broken, [], user, snapshot)
+    errors = {(i.code, i.slot) for i in issues if i.severity == Severity.ERROR}
+    assert (ValidationCode.MISSING_MEAL, (dropped["Date"], dropped["Meal Type"])) in errors
+    assert (ValidationCode.DIET_MISMATCH, (broken[0]["Date"], broken[0]["Meal Type"])) in errors
+    assert (ValidationCode.EMPTY_CHECKLIST, None) in errors
+
+    merged, removed, added = meal_generator.refill_slots(
+        user, broken, snapshot, templates,
+        {(dropped["Date"], dropped["Meal Type"]), (broken[0]["Date"], broken[0]["Meal Type"])},
+    )
+    assert len(merged) == len(meals) and len(removed) == 1 and len(added) == 2
+    assert not [i for i in meal_generator.validate_plan(merged, checklist, user, snapshot) if i.severity == Severity.ERROR]
+
+
+def test_plan_stores_daily_checklists_and_totals(user, templates, make_snapshot):
+    plan = meal_generator.build_meal_plan(user, make_snapshot(), templates)
+    dates = sorted({m["Date"] for m in plan["meals"]})
+    assert sorted(plan["daily_checklists"]) == dates == sorted(plan["daily_totals"])
+
+    day = dates[0]
+    day_meals = [m for m in plan["meals"] if m["Date"] == day]
+    assert plan["daily_checklists"][day] == meal_generator.generate_ingredient_checklist(day_meals)
+    assert plan["daily_totals"][day]["Total Calories"] == pytest.approx(
+        sum(m["Total Calories"] for m in day_meals), abs=0.01
+    )
@@ -0,0 +1,43 @@
+import asyncio
+
+from app.core.mongo_indexes import MongoIndex, MongoIndexManager
+
+
+class FakeCollection:
+    def __init__(self, existing):
+        self.existing = existing
+        self.created = []
+
+    async def index_information(self):
+        return dict(self.existing)
+
+    async def create_indexes(self, models):
+        self.created.append([model.document["name"] for model in models])
+
+
+class FakeDb(dict):
+    def __getitem__(self, name):
+        return self.setdefault(name, FakeCollection({"_id_": {"key": [("_id", 1)]}}))
+
+
+def test_index_manager_reports_and_creates_missing_indexes():
+    indexes = [
+        MongoIndex(collection="users", name="email_unique", keys=[("email", 1)], unique=True),
+        MongoIndex(collection="progress", name="user_id_timestamp", keys=[("user_id", 1), ("timestamp", -1)]),
+        MongoIndex(collection="progress", name="user_id_type", keys=[("user_id", 1), ("type", 1)]),
+    ]
+    db = FakeDb()
+    dict.__setitem__(db, "users", FakeCollection({
+        "_id_": {"key": [("_id", 1)]},
+        "email_unique": {"key": [("email", 1)]},  # not unique yet
+        "name_1": {"key": [("name", 1)]},
+    }))
+    manager = MongoIndexManager(db, indexes)
+
+    users, progress = asyncio.run(manager.status(with_usage=False))
+    assert users.changed == ["email_unique"] and users.extra == ["name_1"] and not users.missing
+    assert progress.missing == ["user_id_timestamp", "user_id_type"]
+
+    asyncio.run(manager.ensure(sequential=True))
+    assert db["progress"].created == [["user_id_timestamp"], ["user_id_type"]]
+    assert db["users"].created == []
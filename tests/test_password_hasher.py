@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.exceptions import ServiceBusyException
+from app.core.security import PasswordHasher
+
+
+def test_password_hasher_rejects_when_queue_is_full():
+    hasher = PasswordHasher(workers=1, queue_limit=0)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.create_task(hasher._run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceBusyException):
+            await hasher._run(lambda: None)
+        release.set()
+        await blocked
+
+    asyncio.run(scenario())
+    hasher.shutdown()
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_verify_rehashes_outdated_cost():
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    hasher = PasswordHasher(workers=1)
+
+    valid, new_hash = asyncio.run(hasher.verify_and_update("secret", old_hash))
+    assert valid and new_hash and new_hash != old_hash
+    assert asyncio.run(hasher.verify_and_update("wrong", new_hash)) == (False, None)
+    hasher.shutdown()
+    assert hasher.stats()["rehashed"] == 1
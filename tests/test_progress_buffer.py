@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+from app.core.config import settings
+from app.services.progress_buffer import ProgressWriteBuffer
+
+
+def test_buffer_coalesces_and_retries_failed_flush(monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BUFFER", True)
+    monkeypatch.setattr(settings, "PROGRESS_BUFFER_INTERVAL_SECONDS", 300)
+    monkeypatch.setattr(settings, "PROGRESS_BUFFER_FLUSH_SECONDS", 3600)
+    written = []
+    attempts = []
+    fail = {"next": True}
+
+    async def writer(events):
+        attempts.append([dict(event, data=dict(event["data"])) for event in events])
+        if fail["next"]:
+            fail["next"] = False
+            raise RuntimeError("mongo down")
+        written.extend(events)
+
+    async def scenario():
+        buffer = ProgressWriteBuffer()
+        await buffer.start(writer)
+        await buffer.add("u1", "steps", "steps", 100, datetime(2026, 3, 1, 9, 0, 10))
+        await buffer.add("u1", "steps", "steps", 250, datetime(2026, 3, 1, 9, 3, 0))
+        await buffer.add("u1", "steps", "steps", 50, datetime(2026, 3, 1, 9, 6, 0))  # next interval
+        await buffer.add("u1", "water", "glasses", 1, datetime(2026, 3, 1, 9, 1, 0))
+        assert await buffer.flush() == 0
+        await buffer.add("u1", "steps", "steps", 10, datetime(2026, 3, 1, 9, 4, 0))
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = asyncio.run(scenario())
+    # The failed batch is resent unchanged (same _ids and amounts), later events separately
+    assert attempts[1][:3] == attempts[0]
+    first = next(e for e in written if e["type"] == "steps" and e["timestamp"].minute == 3)
+    assert first["data"] == {"steps": 350} and first["coalesced_events"] == 2
+    late = next(e for e in written if e["timestamp"].minute == 4)
+    assert late["data"] == {"steps": 10} and late["_id"] != first["_id"]
+    assert len(written) == 4
+    assert stats["flush_failures"] == 1 and stats["buffered_events"] == 0
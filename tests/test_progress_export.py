@@ -0,0 +1,54 @@
+import asyncio
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.services.progress_export import csv_stream, ndjson_stream
+from app.services.progress_service import ProgressService, decode_cursor
+
+
+async def fake_events():
+    yield {"_id": ObjectId("65f000000000000000000001"), "type": "meal", "timestamp": datetime(2026, 3, 1, 8),
+           "data": {"meal_type": "Breakfast", "calories": 420}}
+    yield {"_id": ObjectId("65f000000000000000000002"), "type": "weight", "timestamp": datetime(2026, 3, 1, 9),
+           "data": {"weight": 71.5}}
+
+
+async def collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+
+def test_export_formats_carry_resumable_cursors():
+    lines = asyncio.run(collect(ndjson_stream(fake_events()))).splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [row["type"] for row in rows] == ["meal", "weight"]
+    assert decode_cursor(rows[1]["cursor"]) == (datetime(2026, 3, 1, 9), ObjectId("65f000000000000000000002"))
+
+    csv_lines = asyncio.run(collect(csv_stream(fake_events()))).splitlines()
+    header = csv_lines[0].split(",")
+    assert header[:2] == ["timestamp", "type"] and header[-2:] == ["id", "cursor"]
+    weight = dict(zip(header, csv_lines[2].split(",")))
+    assert weight["weight"] == "71.5" and weight["calories"] == ""
+
+
+def test_iter_events_resumes_after_cursor(db):
+    events = [
+        ("65f000000000000000000001", "u1", "meal", datetime(2026, 3, 1, 8)),
+        ("65f000000000000000000003", "u1", "weight", datetime(2026, 3, 1, 9)),
+        ("65f000000000000000000002", "u1", "water", datetime(2026, 3, 1, 9)),  # same time: _id breaks the tie
+        ("65f000000000000000000005", "u2", "meal", datetime(2026, 3, 1, 8, 30)),
+        ("65f000000000000000000004", "u1", "meal", datetime(2026, 3, 1, 10)),
+    ]
+    for _id, user_id, log_type, at in events:
+        asyncio.run(db["progress"].insert_one({"_id": ObjectId(_id), "user_id": user_id, "type": log_type, "data": {}, "timestamp": at}))
+
+    def export(**kwargs):
+        stream = ndjson_stream(ProgressService().iter_events("u1", db, **kwargs))
+        return [json.loads(line) for line in asyncio.run(collect(stream)).splitlines()]
+
+    rows = export()
+    assert [row["id"][-1] for row in rows] == ["1", "2", "3", "4"]
+    assert [row["id"][-1] for row in export(after=rows[1]["cursor"])] == ["3", "4"]
+    assert [row["id"][-1] for row in export(after=rows[0]["cursor"], types=["meal"])] == ["4"]
+    assert export(after=rows[-1]["cursor"]) == []
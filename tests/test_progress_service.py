@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.models.user import UserInDB, latest_weight
+from app.services.progress_service import ROLLUP_COUNTERS, ProgressService
+
+
+def test_logged_events_add_up_in_their_day_rollup(db):
+    service = ProgressService()
+    day = datetime(2026, 3, 1)
+
+    asyncio.run(service._log("u1", "meal", {"calories": 450, "protein": 20, "carbs": None, "fat": 10}, db, timestamp=day.replace(hour=8)))
+    asyncio.run(service._log("u1", "meal", {"calories": 600, "protein": 30, "carbs": 70, "fat": 15}, db, timestamp=day.replace(hour=23, minute=30)))
+    asyncio.run(service._log("u1", "water", {"glasses": 2}, db, timestamp=day.replace(hour=9)))
+    asyncio.run(service._log("u1", "meal", {"calories": 999}, db, timestamp=datetime(2026, 3, 2, 0, 10)))
+
+    summary = asyncio.run(service.get_daily_summary("u1", day, db))
+    assert (summary["calories"], summary["protein"], summary["carbs"], summary["fat"]) == (1050, 50, 70, 25)
+    assert summary["meals_logged"] == 2 and summary["water_glasses"] == 2 and summary["steps"] == 0
+    assert "event_ids" not in summary and "_id" not in summary
+    assert len(db["progress"].docs) == 4
+
+
+def test_day_keeps_the_latest_weight_whatever_the_logging_order(db):
+    service = ProgressService()
+
+    asyncio.run(service._log("u1", "weight", {"weight": 71.5}, db, timestamp=datetime(2026, 3, 1, 9)))
+    asyncio.run(service._log("u1", "weight", {"weight": 72.0}, db, timestamp=datetime(2026, 3, 1, 8)))
+
+    summary = asyncio.run(service.get_daily_summary("u1", datetime(2026, 3, 1), db))
+    assert summary["last_weight"] == 71.5 and summary["last_weight_at"] == datetime(2026, 3, 1, 9)
+
+
+def test_rollups_match_aggregating_the_raw_events(db):
+    service = ProgressService()
+    day = datetime(2026, 3, 1)
+    events = [
+        ("meal", {"calories": 420, "protein": 18, "carbs": 60, "fat": 9}, 8),
+        ("water", {"glasses": 3}, 10),
+        ("steps", {"steps": 2500}, 12),
+        ("activity", {"steps": 1200, "calories_burned": 180}, 18),
+        ("weight", {"weight": 70.4}, 20),
+        ("weight", {"weight": 70.8}, 7),
+        ("meal", {"calories": 510, "protein": 25, "carbs": None, "fat": 14}, 21),
+    ]
+    for log_type, data, hour in events:
+        asyncio.run(service._log("u1", log_type, data, db, timestamp=day.replace(hour=hour)))
+
+    rollup = asyncio.run(service.get_daily_summary("u1", day, db))
+    aggregated, = asyncio.run(service.aggregate_daily_from_events("u1", day, day + timedelta(days=1), db))
+    for field in [*ROLLUP_COUNTERS, "last_weight", "last_weight_at"]:
+        assert rollup[field] == aggregated[field], field
+    assert rollup["steps"] == 3700 and rollup["last_weight"] == 70.4
+
+
+def test_weekly_summaries_aggregate_days_before_rollup_cutover(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_ROLLUPS_SINCE", "2026-03-03")
+    raw = [
+        ("meal", {"calories": 1500}, datetime(2026, 3, 1, 12)),
+        ("steps", {"steps": 4000}, datetime(2026, 3, 1, 18)),
+        ("meal", {"calories": 999}, datetime(2026, 3, 2, 12)),  # backfilled below: the rollup wins
+        ("meal", {"calories": 700}, datetime(2026, 3, 4, 12)),  # after the cutover: rollups only
+    ]
+    for log_type, data, at in raw:
+        asyncio.run(db["progress"].insert_one({"user_id": "u1", "type": log_type, "data": data, "timestamp": at}))
+    asyncio.run(db["progress_daily"].insert_one({"user_id": "u1", "date": "2026-03-02", "calories": 1800, "meals_logged": 3}))
+
+    days = asyncio.run(ProgressService().get_daily_summaries("u1", datetime(2026, 3, 1), 7, db))
+
+    assert [day["date"] for day in days] == [f"2026-03-0{i}" for i in range(1, 8)]
+    assert (days[0]["calories"], days[0]["steps"], days[0]["meals_logged"]) == (1500, 4000, 1)
+    assert days[1]["calories"] == 1800
+    assert days[3]["calories"] == 0 and days[6]["last_weight"] is None
+
+
+def test_weekly_summaries_skip_raw_events_after_cutover(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_ROLLUPS_SINCE", None)
+    asyncio.run(db["progress"].insert_one({"user_id": "u1", "type": "meal", "data": {"calories": 500}, "timestamp": datetime(2026, 3, 1, 12)}))
+
+    days = asyncio.run(ProgressService().get_daily_summaries("u1", datetime(2026, 3, 1), 7, db))
+
+    assert len(days) == 7 and all(day["calories"] == 0 for day in days)
+
+
+def test_batch_ingestion_reports_created_duplicate_and_invalid_entries(db):
+    entries = [
+        {"idempotency_key": "a", "type": "water", "timestamp": "2026-03-01T08:00:00", "data": {"glasses": 2}},
+        {"idempotency_key": "a", "type": "water", "timestamp": "2026-03-01T08:00:00", "data": {"glasses": 2}},
+        {"idempotency_key": "b", "type": "weight", "timestamp": "2026-03-01T07:00:00+05:30", "data": {}},
+        {"idempotency_key": "c", "type": "meal", "timestamp": "2026-03-01T13:00:00", "data": {"meal_type": "lunch", "calories": 600}},
+    ]
+    response = asyncio.run(ProgressService().ingest_batch("u1", entries, db))
+
+    assert [r.status for r in response.results] == ["created", "duplicate", "invalid", "created"]
+    assert (response.created, response.duplicates, response.rejected) == (2, 1, 1)
+    assert sorted(e["idempotency_key"] for e in db["progress"].docs) == ["a", "c"]
+
+    replay = asyncio.run(ProgressService().ingest_batch("u1", entries[:1], db))
+    assert replay.results[0].status == "duplicate" and len(db["progress"].docs) == 2
+    summary = asyncio.run(ProgressService().get_daily_summary("u1", datetime(2026, 3, 1), db))
+    assert (summary["water_glasses"], summary["calories"], summary["meals_logged"]) == (2, 600, 1)
+
+
+def test_batch_retry_after_partial_failure_counts_each_event_once(db):
+    rollups = db["progress_daily"]
+    bulk_write = rollups.bulk_write
+
+    async def fail_once(operations, ordered=True):
+        rollups.bulk_write = bulk_write
+        raise RuntimeError("rollup write failed")
+
+    rollups.bulk_write = fail_once
+    entries = [{"idempotency_key": "s1", "type": "steps", "timestamp": "2026-03-01T09:00:00", "data": {"steps": 500}}]
+
+    failed = asyncio.run(ProgressService().ingest_batch("u1", entries, db))
+    assert failed.results[0].status == "failed" and len(db["progress"].docs) == 1
+
+    retry = asyncio.run(ProgressService().ingest_batch("u1", entries, db))
+    assert retry.results[0].status == "duplicate" and len(db["progress"].docs) == 1
+    assert asyncio.run(ProgressService().get_daily_summary("u1", datetime(2026, 3, 1), db))["steps"] == 500
+
+
+def test_rewritten_events_are_counted_once(db):
+    service = ProgressService()
+    first = {"_id": ObjectId(), "user_id": "u1", "type": "steps", "data": {"steps": 300}, "timestamp": datetime(2026, 3, 1, 9)}
+    second = {"_id": ObjectId(), "user_id": "u1", "type": "steps", "data": {"steps": 200}, "timestamp": datetime(2026, 3, 1, 10)}
+
+    assert asyncio.run(service.write_events([dict(first)], db)) == {first["_id"]}
+    assert asyncio.run(service.write_events([dict(first), dict(second)], db)) == {second["_id"]}
+
+    assert asyncio.run(service.get_daily_summary("u1", datetime(2026, 3, 1), db))["steps"] == 500
+    assert len(db["progress"].docs) == 2
+
+
+def test_timeseries_mode_stores_user_and_type_in_meta(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_TIMESERIES", True)
+    service = ProgressService()
+    day = datetime(2026, 3, 1)
+    event = {"_id": ObjectId(), "user_id": "u1", "type": "water", "data": {"glasses": 2}, "timestamp": day.replace(hour=9)}
+
+    asyncio.run(service.write_events([dict(event)], db))
+    asyncio.run(service.write_events([dict(event)], db))
+    asyncio.run(service._log("u2", "water", {"glasses": 5}, db, timestamp=day.replace(hour=9)))
+
+    stored = db["progress_ts"].docs[0]
+    assert stored["meta"] == {"user_id": "u1", "type": "water"} and "user_id" not in stored
+    assert len(db["progress_ts"].docs) == 2 and "progress" not in db
+    logs = asyncio.run(service.get_daily_logs("u1", day, db))
+    assert [(log["user_id"], log["type"]) for log in logs] == [("u1", "water")]
+    aggregated, = asyncio.run(service.aggregate_daily_from_events("u1", day, day + timedelta(days=1), db))
+    assert aggregated["water_glasses"] == 2
+    assert asyncio.run(service.get_daily_summary("u1", day, db))["water_glasses"] == 2
+
+
+def test_logged_weight_becomes_current_weight_unless_newer_exists(db):
+    user_id = ObjectId("65f000000000000000000001")
+    asyncio.run(db["users"].insert_one({"_id": user_id, "email": "w@example.com"}))
+    service = ProgressService()
+
+    asyncio.run(service.log_weight(str(user_id), 71.5, db))
+    asyncio.run(service._log(str(user_id), "weight", {"weight": 70.9}, db, timestamp=datetime(2026, 3, 1, 8)))
+    assert db["users"].docs[0]["current_weight"] == 71.5
+
+    later = datetime.utcnow() + timedelta(hours=1)
+    asyncio.run(service._log(str(user_id), "weight", {"weight": 70.2}, db, timestamp=later))
+    assert (db["users"].docs[0]["current_weight"], db["users"].docs[0]["weight_updated_at"]) == (70.2, later)
+
+
+def test_user_without_current_weight_is_seeded_from_latest_logged_weight(db):
+    user_id = "65f000000000000000000001"
+    now = datetime(2026, 3, 1)
+    user = UserInDB(
+        id=user_id, email="seed@example.com", name="Seed", hashed_password="x", age=30,
+        gender="female", height=165, weight=72, activity_level="LA", diet="Vegetarian",
+        meal_plan_purchased=False, created_at=now, updated_at=now,
+    )
+    asyncio.run(db["users"].insert_one({"_id": ObjectId(user_id), "email": user.email}))
+    for weight, at in [(69.0, datetime(2026, 1, 15)), (68.2, datetime(2026, 2, 1))]:
+        asyncio.run(db["progress"].insert_one({"user_id": user_id, "type": "weight", "data": {"weight": weight}, "timestamp": at}))
+
+    seeded = asyncio.run(ProgressService().seed_current_weight(user, db))
+
+    assert latest_weight(seeded) == 68.2 and seeded.weight_updated_at == datetime(2026, 2, 1)
+    assert db["users"].docs[0]["current_weight"] == 68.2
+    assert asyncio.run(ProgressService().seed_current_weight(seeded, db)) is seeded
+
+
+def test_weight_history_reads_raw_events_before_rollup_cutover(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_ROLLUPS_SINCE", "2026-03-03")
+    for weight, at in [(72.0, datetime(2026, 3, 1, 8)), (71.8, datetime(2026, 3, 1, 20)), (75.0, datetime(2026, 2, 27))]:
+        asyncio.run(db["progress"].insert_one({"user_id": "u1", "type": "weight", "data": {"weight": weight}, "timestamp": at}))
+    for date, weight in [("2026-03-03", 71.5), ("2026-03-05", 71.0), ("2026-03-09", 70.5)]:
+        asyncio.run(db["progress_daily"].insert_one({"user_id": "u1", "date": date, "last_weight": weight}))
+    service = ProgressService()
+    start, end = datetime(2026, 3, 1, 15), datetime(2026, 3, 7)
+
+    days = asyncio.run(service.get_weight_history("u1", start, end, "day", db))
+    assert [(day["date"], day["weight"]) for day in days] == [("2026-03-01", 71.8), ("2026-03-03", 71.5), ("2026-03-05", 71.0)]
+
+    weeks = asyncio.run(service.get_weight_history("u1", start, end, "week", db))
+    assert [(week["date"], week["weight"], week["min"], week["max"], week["samples"]) for week in weeks] == [
+        ("2026-02-23", 71.8, 71.8, 71.8, 1),
+        ("2026-03-02", 71.0, 71.0, 71.5, 2),
+    ]
+
+    monkeypatch.setattr(settings, "PROGRESS_ROLLUPS_SINCE", None)
+    days = asyncio.run(service.get_weight_history("u1", start, end, "day", db))
+    assert [day["date"] for day in days] == ["2026-03-03", "2026-03-05"]
@@ -0,0 +1,79 @@
+import asyncio
+
+from app.services.meal_generator.templates import MealTemplateCache
+
+SNACK = [{"slot_type": "snack_item", "calorie_pct": 1.0, "required": True}]
+LUNCH_NORTH = [{"slot_type": "grain", "calorie_pct": 0.35, "required": True}]
+LUNCH_SOUTH = [{"slot_type": "grain", "calorie_pct": 0.40, "required": True}]
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return FakeResult(self.rows)
+
+
+ROWS = [
+    ("Lunch", "North", "Vegetarian", "Healthy", LUNCH_NORTH),
+    ("Lunch", "South", "Vegetarian", "Healthy", LUNCH_SOUTH),
+    ("Morning_Snack", "South", "Vegetarian", "Healthy", SNACK),
+]
+
+
+def test_resolve_exact_and_fallback_with_single_query():
+    cache = MealTemplateCache()
+    session = FakeSession(ROWS)
+
+    async def run():
+        exact = await cache.resolve(session, "Lunch", "South", "Vegetarian", "Healthy")
+        fallback = await cache.resolve(session, "Morning_Snack", "North", "Vegetarian", "Healthy")
+        missing = await cache.resolve(session, "Dinner", "North", "Vegetarian", "Healthy")
+        return exact, fallback, missing
+
+    exact, fallback, missing = asyncio.run(run())
+    assert exact == LUNCH_SOUTH
+    assert fallback == SNACK
+    assert missing is None
+    assert session.queries == 1
+
+
+def test_invalidate_and_reload():
+    cache = MealTemplateCache()
+    session = FakeSession(ROWS)
+    asyncio.run(cache.resolve(session, "Lunch", "North", "Vegetarian", "Healthy"))
+
+    cache.invalidate()
+    assert not cache.is_loaded
+
+    assert asyncio.run(cache.reload(session)) == 3
+    assert session.queries == 2
+
+
+def test_templates_are_reread_after_refresh_interval(monkeypatch):
+    monkeypatch.setattr("app.services.meal_generator.templates.settings.TEMPLATE_REFRESH_SECONDS", 60)
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.meal_generator.templates.time.monotonic", lambda: clock[0])
+    cache = MealTemplateCache()
+    session = FakeSession(ROWS)
+
+    asyncio.run(cache.resolve(session, "Lunch", "North", "Vegetarian", "Healthy"))
+    clock[0] += 30
+    asyncio.run(cache.resolve(session, "Lunch", "North", "Vegetarian", "Healthy"))
+    assert session.queries == 1
+
+    session.rows = [("Lunch", "North", "Vegetarian", "Healthy", LUNCH_SOUTH)]  # edited outside this process
+    clock[0] += 31
+    assert asyncio.run(cache.resolve(session, "Lunch", "North", "Vegetarian", "Healthy")) == LUNCH_SOUTH
+    assert session.queries == 2
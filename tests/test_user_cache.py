@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime
+
+from app.services.user_cache import UserCache
+from app.models.user import UserInDB
+
+
+def make_user(email):
+    now = datetime(2026, 1, 1)
+    return UserInDB(
+        id="1", email=email, name="Test", hashed_password="x", age=30, gender="male",
+        height=175, weight=70, activity_level="MA", diet="Vegetarian",
+        meal_plan_purchased=False, created_at=now, updated_at=now,
+    )
+
+
+def test_user_cache_hits_evicts_and_invalidates(monkeypatch):
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_TTL_SECONDS", 30)
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_REDIS_URL", None)
+    cache = UserCache()
+
+    async def scenario():
+        assert await cache.get("a@example.com") is None
+        for email in ("a@example.com", "b@example.com", "c@example.com"):
+            await cache.set(make_user(email))
+        assert await cache.get("a@example.com") is None  # evicted, oldest entry
+        assert (await cache.get("c@example.com")).email == "c@example.com"
+        await cache.invalidate("c@example.com")
+        assert await cache.get("c@example.com") is None
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert stats["backend"] == "local"
+    assert stats["hits"] == 1 and stats["misses"] == 3 and stats["hit_rate"] == 0.25
+
+
+def test_user_cache_entries_expire(monkeypatch):
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_TTL_SECONDS", 30)
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_REDIS_URL", None)
+    clock = [100.0]
+    monkeypatch.setattr("app.services.user_cache.time.monotonic", lambda: clock[0])
+    cache = UserCache()
+
+    asyncio.run(cache.set(make_user("a@example.com")))
+    assert asyncio.run(cache.get("a@example.com")) is not None
+    clock[0] += 31
+    assert asyncio.run(cache.get("a@example.com")) is None
+
+
+def test_user_cache_never_keeps_password_hash(monkeypatch):
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_TTL_SECONDS", 30)
+    monkeypatch.setattr("app.services.user_cache.settings.USER_CACHE_REDIS_URL", None)
+    cache = UserCache()
+
+    asyncio.run(cache.set(make_user("a@example.com")))
+    cached = asyncio.run(cache.get("a@example.com"))
+    assert cached.email == "a@example.com"
+    assert "hashed_password" not in cached.model_dump()
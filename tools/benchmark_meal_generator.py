@@ -0,0 +1,139 @@
+"""
+Benchmarks the "random" and "optimized" meal generator modes on a synthetic
+catalog: daily calorie/macro deviation from the plan targets, repeats inside
+the no-repeat window, and generation latency (p50/p99).
+
+Usage:
+    python tools/benchmark_meal_generator.py [--plans 200] [--items-per-slot 60]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.services.meal_generator.catalog import CatalogSnapshot
+from app.services.meal_generator.meal_generator import MealGenerator, MEAL_TYPES
+
+LUNCH_DINNER_SLOTS = [
+    {"slot_type": "grain",         "calorie_pct": 0.35, "required": True},
+    {"slot_type": "dal_protein",   "calorie_pct": 0.28, "required": True},
+    {"slot_type": "sabzi",         "calorie_pct": 0.22, "required": True},
+    {"slot_type": "accompaniment", "calorie_pct": 0.15, "required": False},
+]
+BREAKFAST_SLOTS = [
+    {"slot_type": "main_dish",      "calorie_pct": 0.70, "required": True},
+    {"slot_type": "accompaniment",  "calorie_pct": 0.20, "required": True},
+    {"slot_type": "beverage",       "calorie_pct": 0.10, "required": False},
+]
+SNACK_SLOTS = [
+    {"slot_type": "snack_item", "calorie_pct": 1.0, "required": True},
+]
+TEMPLATES = {
+    "Breakfast": BREAKFAST_SLOTS,
+    "MorningSnacks": SNACK_SLOTS,
+    "Lunch": LUNCH_DINNER_SLOTS,
+    "EveningSnacks": SNACK_SLOTS,
+    "Dinner": LUNCH_DINNER_SLOTS,
+}
+SLOT_MEAL_TIMES = {
+    "grain": ["Lunch", "Dinner"], "dal_protein": ["Lunch", "Dinner"], "sabzi": ["Lunch", "Dinner"],
+    "accompaniment": ["Breakfast", "Lunch", "Dinner"], "main_dish": ["Breakfast"],
+    "beverage": ["Breakfast"], "snack_item": ["Morning_Snack"],
+}
+PROFILES = [
+    {"height": 175, "weight": 70, "age": 25, "gender": "male", "activity_level": "MA", "health_condition": "Healthy"},
+    {"height": 160, "weight": 62, "age": 45, "gender": "female", "activity_level": "S", "health_condition": "Diabetic-Friendly"},
+    {"height": 182, "weight": 85, "age": 30, "gender": "male", "activity_level": "VA", "health_condition": "Gym-Friendly"},
+]
+
+
+def synthetic_catalog(items_per_slot, rng):
+    rows = []
+    next_id = 1
+    for slot_type, meal_times in SLOT_MEAL_TIMES.items():
+        for _ in range(items_per_slot):
+            cal = rng.uniform(60, 450)
+            # Random macro split per item so items differ in macro profile
+            p, c, f = rng.dirichlet([2, 5, 2])
+            rows.append({
+                "id": next_id,
+                "recipe_name": f"{slot_type}-{next_id}",
+                "slot_type": slot_type,
+                "diet_type": "Vegetarian",
+                "cal_per_serving": cal,
+                "protein_per_serving": cal * p / 4,
+                "carbs_per_serving": cal * c / 4,
+                "fat_per_serving": cal * f / 9,
+                "fiber_per_serving": rng.uniform(0.5, 8),
+                "sodium_per_serving": rng.uniform(0, 400),
+                "region_tags": list(rng.choice(["North", "South", "East", "West"], size=2, replace=False)),
+                "meal_time_tags": meal_times,
+                "plan_type_tags": ["Healthy", "Diabetic-Friendly", "Gym-Friendly"],
+                "ingredients": [{"name": f"ing-{next_id % 40}", "amount_g": 50}],
+            })
+            next_id += 1
+    return CatalogSnapshot(rows, version=("benchmark",))
+
+
+def plan_quality(generator, user_data, plan, window):
+    ctx = generator._build_context(user_data)
+    target = np.array([
+        sum(ctx.meal_targets[m] for m in MEAL_TYPES),
+        sum(ctx.protein_targets[m] for m in MEAL_TYPES),
+        sum(ctx.carb_targets[m] for m in MEAL_TYPES),
+        sum(ctx.fat_targets[m] for m in MEAL_TYPES),
+    ])
+    totals = defaultdict(lambda: np.zeros(4))
+    eaten = defaultdict(list)
+    dates = sorted({m["Date"] for m in plan["meals"]})
+    for meal in plan["meals"]:
+        totals[meal["Date"]] += [meal["Total Calories"], meal["Total Protein"], meal["Total Carbs"], meal["Total Fat"]]
+        for name in meal["Menu Names"].split(" + "):
+            eaten[name].append(dates.index(meal["Date"]))
+    deviation = np.mean([np.abs(t - target) / target for t in totals.values()], axis=0) * 100
+    repeats = sum(
+        1 for days in eaten.values() for i, a in enumerate(days) for b in days[:i] if abs(a - b) < window
+    )
+    return deviation, repeats
+
+
+def run(mode, generator, snapshot, plans):
+    latencies, deviations, repeats = [], [], []
+    for i in range(plans):
+        user_data = dict(PROFILES[i % len(PROFILES)], diet="Vegetarian", region="North", start_date="2026-01-05")
+        started = time.perf_counter()
+        plan = generator.build_meal_plan(user_data, snapshot, TEMPLATES, mode=mode)
+        latencies.append((time.perf_counter() - started) * 1000)
+        deviation, repeat_count = plan_quality(generator, user_data, plan, settings.OPTIMIZER_REPEAT_WINDOW_DAYS)
+        deviations.append(deviation)
+        repeats.append(repeat_count)
+
+    deviation = np.mean(deviations, axis=0)
+    print(
+        f"{mode:<10} cal {deviation[0]:6.2f}%  protein {deviation[1]:6.2f}%  carbs {deviation[2]:6.2f}%  "
+        f"fat {deviation[3]:6.2f}%  repeats/plan {np.mean(repeats):5.2f}  "
+        f"p50 {np.percentile(latencies, 50):7.2f} ms  p99 {np.percentile(latencies, 99):7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--items-per-slot", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    snapshot = synthetic_catalog(args.items_per_slot, np.random.default_rng(args.seed))
+    generator = MealGenerator()
+    print(f"{len(snapshot)} items, {args.plans} plans per mode, optimizer budget {settings.OPTIMIZER_TIME_BUDGET_MS} ms")
+    print("Mean absolute daily deviation from plan targets:")
+    for mode in ("random", "optimized"):
+        run(mode, generator, snapshot, args.plans)
@@ -0,0 +1,142 @@
+"""
+Compares the regular "progress" layout with the time-series layout
+(PROGRESS_TIMESERIES) on synthetic events: insert throughput, storage and
+index size, and latency (p50/p99) of the per-user range queries the app runs
+(one day of logs, the 7-day daily breakdown, the latest weight).
+
+Works on a scratch database (<DATABASE_NAME>_benchmark), dropped afterwards
+unless --keep is given.
+
+Usage:
+    python tools/benchmark_progress_storage.py [--events 1000000] [--users 2000] [--days 90] [--queries 300]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.core.mongo_indexes import MongoIndex, MongoIndexManager
+from app.services.progress_service import ProgressService
+
+# Rough mix of a day of logging: a few meals, several water/steps logs, rare weight
+TYPE_WEIGHTS = {"meal": 4, "water": 6, "steps": 8, "activity": 1, "weight": 0.3}
+
+
+def synthetic_event(rng, user_id, start, days):
+    log_type = rng.choices(list(TYPE_WEIGHTS), weights=list(TYPE_WEIGHTS.values()))[0]
+    timestamp = start + timedelta(seconds=rng.randrange(days * 86400))
+    if log_type == "meal":
+        data = {"meal_type": "Lunch", "food_name": "Dal rice", "calories": rng.randint(150, 900),
+                "protein": rng.randint(5, 40), "carbs": rng.randint(10, 120), "fat": rng.randint(2, 35)}
+    elif log_type == "water":
+        data = {"glasses": rng.randint(1, 3)}
+    elif log_type == "steps":
+        data = {"steps": rng.randint(100, 3000)}
+    elif log_type == "activity":
+        data = {"activity_type": "walk", "duration_minutes": 30, "calories_burned": rng.randint(80, 400), "steps": rng.randint(0, 5000)}
+    else:
+        data = {"weight": round(rng.uniform(50, 110), 1)}
+    return {"user_id": user_id, "type": log_type, "data": data, "timestamp": timestamp}
+
+
+async def load(db, service, events_total, users, start, days, rng, batch_size=10000):
+    collection = service.get_collection(db)
+    written = 0
+    elapsed = 0.0
+    while written < events_total:
+        count = min(batch_size, events_total - written)
+        batch = [synthetic_event(rng, f"user{rng.randrange(users)}", start, days) for _ in range(count)]
+        docs = [service._to_storage(event) for event in batch]
+        began = time.perf_counter()
+        await collection.insert_many(docs, ordered=False)
+        elapsed += time.perf_counter() - began
+        written += count
+    return written / elapsed
+
+
+async def storage(db, name):
+    stats = await db[name].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(length=None)
+    storage_stats = stats[0]["storageStats"] if stats else {}
+    return storage_stats.get("storageSize", 0), storage_stats.get("totalIndexSize", 0)
+
+
+async def timed(queries):
+    latencies = []
+    for query in queries:
+        began = time.perf_counter()
+        await query()
+        latencies.append((time.perf_counter() - began) * 1000)
+    return latencies
+
+
+async def run_layout(db, timeseries, args, start):
+    settings.PROGRESS_TIMESERIES = timeseries
+    name = f"progress_{'ts' if timeseries else 'flat'}"
+    service = ProgressService()
+    service.collection_name = service.timeseries_collection_name = name
+    rng = random.Random(args.seed)
+
+    if timeseries:
+        await service.ensure_timeseries_collection(db)
+    prefix = "meta." if timeseries else ""
+    indexes = [
+        MongoIndex(collection=name, name="user_id_timestamp", keys=[(f"{prefix}user_id", 1), ("timestamp", -1)]),
+        MongoIndex(collection=name, name="user_id_type_timestamp", keys=[(f"{prefix}user_id", 1), (f"{prefix}type", 1), ("timestamp", -1)]),
+    ]
+    await MongoIndexManager(db, indexes).ensure()
+
+    rate = await load(db, service, args.events, args.users, start, args.days, rng)
+    storage_size, index_size = await storage(db, name)
+
+    def day_logs():
+        user_id, day = f"user{rng.randrange(args.users)}", start + timedelta(days=rng.randrange(args.days))
+        return service.get_daily_logs(user_id, day, db)
+
+    def weekly():
+        user_id, first = f"user{rng.randrange(args.users)}", start + timedelta(days=rng.randrange(args.days - 7))
+        return service.aggregate_daily_from_events(user_id, first, first + timedelta(days=7), db)
+
+    def latest_weight():
+        return service.latest_event(f"user{rng.randrange(args.users)}", "weight", db)
+
+    print(f"{'time-series' if timeseries else 'regular':<12} insert {rate:>10,.0f} events/s  "
+          f"storage {storage_size / 2**20:8.1f} MiB  indexes {index_size / 2**20:8.1f} MiB")
+    for label, make_query in (("day logs", day_logs), ("7-day summary", weekly), ("latest weight", latest_weight)):
+        latencies = await timed([make_query for _ in range(args.queries)])
+        print(f"  {label:<14} p50 {np.percentile(latencies, 50):7.2f} ms  p99 {np.percentile(latencies, 99):7.2f} ms")
+
+
+async def main(args):
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[f"{settings.DATABASE_NAME}_benchmark"]
+    start = datetime(2026, 1, 1)
+    try:
+        version = (await client.server_info())["version"]
+        print(f"MongoDB {version}: {args.events:,} events, {args.users} users over {args.days} days, {args.queries} queries per kind")
+        for timeseries in (False, True):
+            await db.drop_collection(f"progress_{'ts' if timeseries else 'flat'}")
+            await run_layout(db, timeseries, args, start)
+    finally:
+        if not args.keep:
+            await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark database")
+    asyncio.run(main(parser.parse_args()))